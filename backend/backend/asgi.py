@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
+# Lido pelo settings.py para escolher o padrão das conexões com o banco
+os.environ.setdefault("DJANGO_ASGI", "1")
 
 application = get_asgi_application()
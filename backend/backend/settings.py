@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -58,6 +62,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "tarefas.replicas.middleware_replicas",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -108,28 +113,119 @@ WSGI_APPLICATION = "backend.wsgi.application"
 #    }
 #}
 
-# PostgreSQL
+# PostgreSQL (os valores podem vir de variáveis de ambiente DB_*; veja "Conexões com o banco" no README)
+def _env_bool(nome, padrao):
+    return os.environ.get(nome, str(padrao)).lower() in ('1', 'true', 'sim', 'yes')
+
+
+# backend/asgi.py define DJANGO_ASGI=1 antes de carregar estas configurações
+SERVIDOR_ASGI = _env_bool("DJANGO_ASGI", False)
+POOL_DISPONIVEL = find_spec("psycopg") is not None and find_spec("psycopg_pool") is not None
+
+# Pool nativo do Django 5.1+ (exige psycopg 3 com psycopg_pool, não o psycopg2).
+# Sob ASGI, fica ligado por padrão quando o psycopg 3 está instalado.
+DB_POOL = _env_bool("DB_POOL", SERVIDOR_ASGI and POOL_DISPONIVEL)
+if DB_POOL and not POOL_DISPONIVEL:
+    raise ImproperlyConfigured(
+        'DB_POOL exige o psycopg 3 com o pool (pip install "psycopg[binary,pool]"); '
+        "o requirements.txt instala só o psycopg2"
+    )
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.postgresql",
-        "NAME": "tarefas",
-        "USER": "postgres",
-        "PASSWORD": "postgres",
-        "HOST": "localhost",
-        "PORT": "5432",
+        "NAME": os.environ.get("DB_NAME", "tarefas"),
+        "USER": os.environ.get("DB_USER", "postgres"),
+        "PASSWORD": os.environ.get("DB_PASSWORD", "postgres"),
+        "HOST": os.environ.get("DB_HOST", "localhost"),
+        "PORT": os.environ.get("DB_PORT", "5432"),
+        # Conexão persistente por thread, reaproveitada entre requisições por até
+        # CONN_MAX_AGE segundos e testada antes do reuso. O pool exige 0. Sob
+        # ASGI o padrão também é 0: as views síncronas rodam em threads do
+        # executor, e cada uma seguraria a própria conexão persistente.
+        "CONN_MAX_AGE": 0 if DB_POOL else int(os.environ.get("DB_CONN_MAX_AGE", 0 if SERVIDOR_ASGI else 60)),
+        "CONN_HEALTH_CHECKS": _env_bool("DB_CONN_HEALTH_CHECKS", True),
     }
 }
+if DB_POOL:
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN", 2)),
+            "max_size": int(os.environ.get("DB_POOL_MAX", 10)),
+            # Segundos esperando uma conexão livre antes de falhar a requisição
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+        },
+    }
+
+# Réplicas de leitura (tarefas.replicas): DB_REPLICAS="host[:porta],host2[:porta]".
+# Nos testes, elas espelham o banco de teste do default.
+for _numero, _endereco in enumerate(filter(None, os.environ.get("DB_REPLICAS", "").split(",")), 1):
+    _host, _, _porta = _endereco.strip().partition(":")
+    DATABASES[f"replica{_numero}"] = {
+        **DATABASES["default"],
+        "HOST": _host,
+        "PORT": _porta or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["tarefas.replicas.RoteadorReplicas"]
+
+REPLICAS_LEITURA = {
+    'REPLICAS': [alias for alias in DATABASES if alias != "default"],
+    # Depois de uma escrita, as leituras ficam no primário por esse tempo (segundos)
+    'ATRASO_MAXIMO': int(os.environ.get("DB_REPLICAS_ATRASO_MAXIMO", 5)),
+    'CACHE': 'default',
+}
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'tarefas.autenticacao.TokenAuthenticationEmCache',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'PAGE_SIZE': 20,
+    # JSON via orjson (cai no json da biblioteca padrão se ele não estiver instalado).
+    # Para voltar ao padrão do DRF, troque pelas classes de rest_framework.renderers/parsers.
+    'DEFAULT_RENDERER_CLASSES': [
+        'tarefas.renderizadores.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'tarefas.renderizadores.JSONRapidoParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    # Compacto (sem espaços) é o padrão do DRF e o modo em que o orjson é usado
+    'COMPACT_JSON': True,
+}
+
+# Backends de cache. O locmem vale só para um processo; com vários workers, use um
+# cache compartilhado para as invalidações valerem em todos, por exemplo:
+#   'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/var/tmp/tarefas_cache'
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://127.0.0.1:6379'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+
+# Cache das respostas GET de projetos e tarefas (tarefas.cache_respostas)
+CACHE_RESPOSTAS = {
+    'CACHE': 'default',
+    'TTL': 300,
+}
+
+# Cache dos tokens validados (tarefas.autenticacao): LRU por processo e, se
+# CACHE_COMPARTILHADO apontar para um alias de CACHES (ex.: Redis), uma segunda camada
+TOKEN_CACHE = {
+    'TAMANHO': 10000,
+    'TTL': 30,
+    'CACHE_COMPARTILHADO': None,
+    'TTL_COMPARTILHADO': 300,
 }
 
 
@@ -1,7 +1,11 @@
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from tarefas.views import ProjetoViewSet, TarefaViewSet, UserViewSet, CustomAuthToken
+from tarefas.views import (
+    AnaliseViewSet, CustomAuthToken, DashboardViewSet, ProjetoViewSet, TarefaViewSet, TicketEventos, UserViewSet,
+    eventos_tarefas,
+)
+from tarefas import views_assincronas
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
@@ -10,6 +14,8 @@ router = DefaultRouter()
 router.register(r'usuarios', UserViewSet, basename='usuario')
 router.register(r'projetos', ProjetoViewSet, basename='projeto')
 router.register(r'tarefas', TarefaViewSet, basename='tarefa')
+router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'analise', AnaliseViewSet, basename='analise')
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -24,6 +30,13 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
+    # Server-Sent Events com as alterações de tarefas (só sob ASGI)
+    path('api/eventos/', eventos_tarefas, name='eventos_tarefas'),
+    path('api/eventos/ticket/', TicketEventos.as_view(), name='ticket_eventos'),
+    # Leituras mais usadas em versão assíncrona (ORM assíncrono, para servir sob ASGI)
+    path('api/async/tarefas/', views_assincronas.listar_tarefas),
+    path('api/async/tarefas/tarefas_por_usuario/', views_assincronas.tarefas_por_usuario),
+    path('api/async/projetos/<int:pk>/resumo_progresso/', views_assincronas.resumo_progresso),
     
     # Authentication endpoints
     path('api/auth/login/', CustomAuthToken.as_view(), name='api_token_auth'),
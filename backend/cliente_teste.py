@@ -6,6 +6,9 @@ BASE_URL = "http://localhost:8000/api"
 class APIClient:
     def __init__(self, base_url):
         self.base_url = base_url
+        # Espelho local das tarefas, atualizado de forma incremental (opção 12)
+        self.espelho_tarefas = {}
+        self.cursor_tarefas = None
     
     def menu_principal(self):
         while True:
@@ -100,6 +103,8 @@ class APIClient:
             print("9. Mudar status")
             print("10. Tarefas por usuário")
             print("11. Número de tarefas por projeto")
+            print("12. Sincronizar tarefas (só o que mudou)")
+            print("13. Exportar tarefas para arquivo")
             print("0. Voltar")
             
             opcao = input("Escolha uma opção: ")
@@ -126,6 +131,10 @@ class APIClient:
                 self.tarefas_por_usuario()
             elif opcao == "11":
                 self.numero_tarefas_por_projeto()
+            elif opcao == "12":
+                self.sincronizar_tarefas()
+            elif opcao == "13":
+                self.exportar_tarefas()
             elif opcao == "0":
                 break
             else:
@@ -184,7 +193,7 @@ class APIClient:
     # Métodos para Projetos
     def listar_projetos(self):
         try:
-            response = requests.get(f"{self.base_url}/projetos/")
+            response = requests.get(f"{self.base_url}/projetos/", params={"expand": "proprietario"})
             if response.status_code == 200:
                 projetos = response.json()
                 print("\n=== PROJETOS ===")
@@ -306,7 +315,7 @@ class APIClient:
     # Métodos para Tarefas
     def listar_tarefas(self):
         try:
-            response = requests.get(f"{self.base_url}/tarefas/")
+            response = requests.get(f"{self.base_url}/tarefas/", params={"expand": "projeto"})
             if response.status_code == 200:
                 tarefas = response.json()
                 print("\n=== TAREFAS ===")
@@ -462,6 +471,53 @@ class APIClient:
         except Exception as e:
             print(f"Erro de conexão: {e}")
 
+    def sincronizar_tarefas(self):
+        alteradas = removidas = 0
+        try:
+            mais = True
+            while mais:
+                params = {"desde": self.cursor_tarefas} if self.cursor_tarefas else {}
+                response = requests.get(f"{self.base_url}/tarefas/alteracoes/", params=params)
+                if response.status_code == 410:
+                    # Cursor antigo demais: recomeça do zero
+                    self.espelho_tarefas, self.cursor_tarefas = {}, None
+                    continue
+                if response.status_code != 200:
+                    print(f"Erro: {response.status_code} - {response.text}")
+                    return
+                dados = response.json()
+                for tarefa in dados["alteradas"]:
+                    self.espelho_tarefas[tarefa["id"]] = tarefa
+                for tarefa_id in dados["removidas"]:
+                    self.espelho_tarefas.pop(tarefa_id, None)
+                alteradas += len(dados["alteradas"])
+                removidas += len(dados["removidas"])
+                self.cursor_tarefas, mais = dados["cursor"], dados["mais"]
+            print(f"{alteradas} tarefa(s) recebida(s), {removidas} removida(s); "
+                  f"{len(self.espelho_tarefas)} tarefa(s) no espelho local")
+        except Exception as e:
+            print(f"Erro de conexão: {e}")
+
+    def exportar_tarefas(self):
+        formato = input("Formato (csv/ndjson) [csv]: ") or "csv"
+        comprimir = input("Comprimir em gzip? (s/n) [n]: ").lower() == "s"
+        params = {"formato": formato}
+        if comprimir:
+            params["gzip"] = 1
+        arquivo = f"tarefas.{formato}" + (".gz" if comprimir else "")
+        try:
+            # Grava aos poucos, sem carregar o arquivo inteiro na memória
+            with requests.get(f"{self.base_url}/tarefas/exportar/", params=params, stream=True) as response:
+                if response.status_code != 200:
+                    print(f"Erro: {response.status_code} - {response.text}")
+                    return
+                with open(arquivo, "wb") as destino:
+                    for parte in response.iter_content(chunk_size=64 * 1024):
+                        destino.write(parte)
+            print(f"Tarefas exportadas para {arquivo}")
+        except Exception as e:
+            print(f"Erro de conexão: {e}")
+
 if __name__ == "__main__":
     client = APIClient(BASE_URL)
     client.menu_principal()
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Projeto, Tarefa
+from .models import Projeto, RegistroExclusao, ResumoDiario, Tarefa
 
 admin.site.register(Projeto)
-admin.site.register(Tarefa)
\ No newline at end of file
+admin.site.register(Tarefa)
+admin.site.register(RegistroExclusao)
+admin.site.register(ResumoDiario)
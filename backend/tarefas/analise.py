@@ -0,0 +1,180 @@
+"""
+Séries temporais de vazão e tempo de ciclo das tarefas, e envelhecimento das
+tarefas abertas, calculados no banco (Trunc, agregações e funções de janela).
+
+Cada balde (dia ou semana, pelo fuso de settings.TIME_ZONE) da série de
+conclusões é guardado no cache separadamente. Um balde que terminou há mais de
+MARGEM está fechado: fica no cache sem expirar e nunca é recalculado. Os baldes
+ainda abertos entram na chave com a versão de Tarefa do cache de respostas, e
+são recalculados a cada escrita.
+
+Alterar a data de conclusão de tarefas de baldes fechados (ou reabri-las, ou
+excluí-las) não se reflete na série. Para recalcular tudo, limpe o cache.
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.cache import caches
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, FloatField, Min, Q, Window
+from django.db.models.functions import CumeDist, Rank, Trunc
+from django.utils import timezone
+
+from .cache_respostas import TAREFA, configuracao, versoes
+from .models import Tarefa
+from .replicas import leu_de_replica
+
+PERIODOS = {'dia': timedelta(days=1), 'semana': timedelta(weeks=1)}
+TRUNC = {'dia': 'day', 'semana': 'week'}
+# Baldes devolvidos quando a requisição não informa o início
+PADRAO_BALDES = {'dia': 30, 'semana': 12}
+LIMITE_BALDES = 400
+PERCENTIS = {'p50': 0.5, 'p90': 0.9}
+# Tempo, depois do fim de um balde, para considerá-lo fechado (escritas atrasadas)
+MARGEM = timedelta(minutes=5)
+# Faixas de idade das tarefas abertas: (nome, idade máxima)
+FAIXAS_IDADE = [
+    ('ate_1_dia', timedelta(days=1)),
+    ('ate_7_dias', timedelta(days=7)),
+    ('ate_30_dias', timedelta(days=30)),
+]
+
+
+class PeriodoInvalido(Exception):
+    pass
+
+
+def _cache():
+    return caches[configuracao()['CACHE']]
+
+
+def inicio_do_balde(periodo, momento):
+    local = timezone.localtime(momento)
+    data = local.date()
+    if periodo == 'semana':
+        data -= timedelta(days=data.weekday())
+    return timezone.make_aware(datetime.combine(data, time.min))
+
+
+def baldes(periodo, inicio=None, fim=None):
+    """Inícios dos baldes que cobrem [inicio, fim); por padrão, os PADRAO_BALDES mais recentes."""
+    if periodo not in PERIODOS:
+        raise PeriodoInvalido(f'periodo deve ser um de: {", ".join(PERIODOS)}')
+    fim = fim or timezone.now()
+    atual = inicio_do_balde(periodo, inicio or fim - PERIODOS[periodo] * (PADRAO_BALDES[periodo] - 1))
+    inicios = []
+    while atual < fim:
+        inicios.append(atual)
+        if len(inicios) > LIMITE_BALDES:
+            raise PeriodoInvalido(f'O intervalo passa de {LIMITE_BALDES} baldes')
+        # Soma pela data local, para atravessar mudanças de horário de verão
+        atual = inicio_do_balde(periodo, atual + PERIODOS[periodo] + timedelta(hours=12))
+    return inicios
+
+
+def _escopo(queryset, projeto=None, usuario=None):
+    if projeto is not None:
+        queryset = queryset.filter(projeto_id=projeto)
+    if usuario is not None:
+        queryset = queryset.filter(atribuido_a_id=usuario)
+    return queryset
+
+
+def _horas(duracao):
+    return None if duracao is None else round(duracao.total_seconds() / 3600, 2)
+
+
+def _calcular_conclusoes(periodo, inicio, fim, projeto, usuario):
+    """{inicio do balde: valores} das tarefas concluídas em [inicio, fim), em 1 + len(PERCENTIS) consultas."""
+    balde = Trunc('data_conclusao', TRUNC[periodo])
+    concluidas = _escopo(
+        # Reabrir uma tarefa não limpa data_conclusao: só contam as que seguem concluídas
+        Tarefa.objects.filter(status='concluída', data_conclusao__gte=inicio, data_conclusao__lt=fim),
+        projeto,
+        usuario,
+    ).annotate(
+        balde=balde,
+        duracao=ExpressionWrapper(F('data_conclusao') - F('data_criacao'), output_field=DurationField()),
+    )
+    resultado = {
+        linha['balde']: {
+            'concluidas': linha['concluidas'],
+            'tempo_medio_horas': _horas(linha['media']),
+            **{nome: None for nome in PERCENTIS},
+        }
+        for linha in concluidas.values('balde').annotate(concluidas=Count('id'), media=Avg('duracao')).order_by()
+    }
+
+    # Percentil por posição: a menor duração cuja fração acumulada (CUME_DIST) alcança p.
+    # (RANK - 1) / total é a fração das durações estritamente menores, então a linha
+    # escolhida é a única duração com anteriores < p <= acumulado.
+    particao = {'partition_by': F('balde'), 'order_by': F('duracao').asc()}
+    posicoes = concluidas.annotate(
+        acumulado=Window(CumeDist(), **particao),
+        anteriores=ExpressionWrapper(
+            (Window(Rank(), **particao) - 1) * 1.0 / Window(Count('id'), partition_by=F('balde')),
+            output_field=FloatField(),
+        ),
+    )
+    for nome, fracao in PERCENTIS.items():
+        linhas = posicoes.filter(acumulado__gte=fracao, anteriores__lt=fracao).values_list('balde', 'duracao')
+        for inicio_balde, duracao in linhas.distinct():
+            resultado[inicio_balde][nome] = _horas(duracao)
+    return resultado
+
+
+def _chave(periodo, projeto, usuario, inicio_balde, versao=None):
+    chave = f'analise:conclusoes:{periodo}:{projeto}:{usuario}:{inicio_balde.isoformat()}'
+    return chave if versao is None else f'{chave}:{versao}'
+
+
+def serie_conclusoes(periodo, inicio=None, fim=None, projeto=None, usuario=None):
+    """Por balde: tarefas concluídas, tempo médio e percentis de data_criacao até data_conclusao (em horas)."""
+    inicios = baldes(periodo, inicio, fim)
+    if not inicios:
+        return []
+    agora = timezone.now()
+    versao = versoes(TAREFA)[0]
+    chaves, fechados = {}, set()
+    for inicio_balde in inicios:
+        if inicio_balde + PERIODOS[periodo] + MARGEM <= agora:
+            fechados.add(inicio_balde)
+        chaves[inicio_balde] = _chave(
+            periodo, projeto, usuario, inicio_balde, None if inicio_balde in fechados else versao
+        )
+    cache = _cache()
+    guardados = cache.get_many(list(chaves.values()))
+
+    faltando = [inicio_balde for inicio_balde, chave in chaves.items() if chave not in guardados]
+    if faltando:
+        fim_calculo = inicio_do_balde(periodo, faltando[-1] + PERIODOS[periodo] + timedelta(hours=12))
+        calculados = _calcular_conclusoes(periodo, faltando[0], fim_calculo, projeto, usuario)
+        vazio = {'concluidas': 0, 'tempo_medio_horas': None, **{nome: None for nome in PERCENTIS}}
+        novos = {chaves[inicio_balde]: calculados.get(inicio_balde, vazio) for inicio_balde in faltando}
+        guardados.update(novos)
+        # Baldes fechados não expiram; os abertos já mudam de chave a cada escrita
+        cache.set_many({chaves[i]: novos[chaves[i]] for i in faltando if i in fechados}, None)
+        if not leu_de_replica():
+            # Lidos de uma réplica atrasada, os baldes abertos ficariam sob a versão nova com dados antigos
+            cache.set_many(
+                {chaves[i]: novos[chaves[i]] for i in faltando if i not in fechados}, configuracao()['TTL']
+            )
+
+    return [{'inicio': inicio_balde, **guardados[chaves[inicio_balde]]} for inicio_balde in inicios]
+
+
+def envelhecimento(projeto=None, usuario=None):
+    """Tarefas ainda não concluídas por faixa de idade, em uma consulta."""
+    agora = timezone.now()
+    abertas = _escopo(Tarefa.objects.exclude(status='concluída'), projeto, usuario)
+    faixas = {}
+    limite_anterior = None
+    for nome, idade in FAIXAS_IDADE:
+        condicao = Q(data_criacao__gte=agora - idade)
+        if limite_anterior is not None:
+            condicao &= Q(data_criacao__lt=agora - limite_anterior)
+        faixas[nome] = Count('id', filter=condicao)
+        limite_anterior = idade
+    faixas['mais_de_30_dias'] = Count('id', filter=Q(data_criacao__lt=agora - limite_anterior))
+    dados = abertas.aggregate(abertas=Count('id'), mais_antiga=Min('data_criacao'), **faixas)
+    mais_antiga = dados.pop('mais_antiga')
+    dados['idade_maxima_horas'] = _horas(agora - mais_antiga) if mais_antiga else None
+    return dados
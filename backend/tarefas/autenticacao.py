@@ -0,0 +1,195 @@
+"""
+TokenAuthentication com cache dos tokens já validados, para não consultar
+authtoken_token + auth_user a cada requisição.
+
+Duas camadas, configuradas em settings.TOKEN_CACHE:
+  - LRU em memória do processo, limitada a TAMANHO entradas e com TTL curto
+    (é o que limita o atraso de invalidação nos outros workers);
+  - opcionalmente um cache compartilhado do Django (CACHE_COMPARTILHADO, o alias
+    em settings.CACHES) com TTL_COMPARTILHADO, invalidado na hora.
+
+A invalidação (token removido/rotacionado, usuário alterado ou desativado) é
+feita pelos sinais de `tarefas.signals`. Alterações feitas com QuerySet.update()
+não disparam sinais e só expiram pelo TTL. No cache compartilhado, cada token
+tem uma geração que entra na chave e que a invalidação incrementa: uma
+requisição que leu o banco antes da invalidação grava sob a geração velha, que
+ninguém mais lê.
+
+Cada requisição recebe a própria cópia do token e do usuário: alterar
+request.user não muda o objeto guardado nem o das requisições concorrentes.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+PADRAO = {
+    'TAMANHO': 10000,
+    'TTL': 30,
+    'CACHE_COMPARTILHADO': None,
+    'TTL_COMPARTILHADO': 300,
+}
+
+
+def configuracao():
+    return {**PADRAO, **getattr(settings, 'TOKEN_CACHE', {})}
+
+
+class CacheLRU:
+    """Dicionário limitado, com expiração por entrada e seguro entre threads."""
+
+    def __init__(self, tamanho, ttl):
+        self.tamanho = tamanho
+        self.ttl = ttl
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave):
+        with self._trava:
+            item = self._itens.get(chave)
+            if item is None:
+                return None
+            valor, expira_em = item
+            if expira_em < time.monotonic():
+                del self._itens[chave]
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, valor):
+        with self._trava:
+            self._itens[chave] = (valor, time.monotonic() + self.ttl)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho:
+                self._itens.popitem(last=False)
+
+    def remover(self, chave):
+        with self._trava:
+            self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def __len__(self):
+        return len(self._itens)
+
+
+_local = None
+
+
+def cache_local():
+    global _local
+    if _local is None:
+        config = configuracao()
+        _local = CacheLRU(config['TAMANHO'], config['TTL'])
+    return _local
+
+
+def _compartilhado():
+    alias = configuracao()['CACHE_COMPARTILHADO']
+    return caches[alias] if alias else None
+
+
+def _resumo(chave):
+    # O token em si não vai para o cache compartilhado, só o seu hash
+    return hashlib.sha256(chave.encode()).hexdigest()
+
+
+def _chave_geracao(chave):
+    return f'token:geracao:{_resumo(chave)}'
+
+
+def _chave_compartilhada(chave, geracao):
+    return f'token:{_resumo(chave)}:{geracao}'
+
+
+def geracao(chave):
+    """Geração atual do token no cache compartilhado (0 sem cache compartilhado ou nunca invalidado)."""
+    compartilhado = _compartilhado()
+    return 0 if compartilhado is None else compartilhado.get(_chave_geracao(chave), 0)
+
+
+def _copia(token):
+    copia = copy.copy(token)
+    copia.user = copy.copy(token.user)
+    return copia
+
+
+def obter_token(chave):
+    """Cópia do token guardado (com o usuário), ou None."""
+    token = cache_local().obter(chave)
+    if token is None:
+        compartilhado = _compartilhado()
+        if compartilhado is not None:
+            token = compartilhado.get(_chave_compartilhada(chave, geracao(chave)))
+            if token is not None:
+                cache_local().guardar(chave, token)
+    return None if token is None else _copia(token)
+
+
+def guardar_token(token, geracao_lida=None):
+    """
+    Guarda uma cópia do token (com o usuário já carregado) nas duas camadas.
+    Quem leu o token do banco passa a geração lida antes da consulta.
+    """
+    cache_local().guardar(token.key, _copia(token))
+    compartilhado = _compartilhado()
+    if compartilhado is not None:
+        if geracao_lida is None:
+            geracao_lida = geracao(token.key)
+        compartilhado.set(
+            _chave_compartilhada(token.key, geracao_lida), token, configuracao()['TTL_COMPARTILHADO']
+        )
+
+
+def invalidar_tokens(*chaves):
+    for chave in chaves:
+        cache_local().remover(chave)
+    compartilhado = _compartilhado()
+    if compartilhado is None:
+        return
+    for chave in chaves:
+        atual = geracao(chave)
+        # Sem expiração: se a geração voltasse a 0, entradas velhas dela voltariam a valer
+        if not compartilhado.add(_chave_geracao(chave), 1, None):
+            compartilhado.incr(_chave_geracao(chave))
+        compartilhado.delete(_chave_compartilhada(chave, atual))
+
+
+class TokenAuthenticationEmCache(TokenAuthentication):
+    """Mesmo contrato do TokenAuthentication, consultando o banco só em cache miss."""
+
+    def authenticate_credentials(self, key):
+        token = obter_token(key)
+        if token is not None:
+            return (token.user, token)
+        geracao_lida = geracao(key)
+        user, token = super().authenticate_credentials(key)
+        guardar_token(token, geracao_lida)
+        return (user, token)
+
+
+def chave_do_cabecalho(request):
+    """Chave de `Authorization: Token <chave>`, ou None."""
+    cabecalho = request.headers.get('Authorization', '')
+    return cabecalho[len('Token '):] if cabecalho.startswith('Token ') else None
+
+
+async def autenticar_assincrono(chave):
+    """
+    Usuário do token, para views assíncronas; levanta AuthenticationFailed.
+    Só a LRU local é lida no loop: o cache compartilhado e o banco são
+    consultados em uma thread.
+    """
+    token = cache_local().obter(chave)
+    if token is not None:
+        return _copia(token).user
+    usuario, _ = await sync_to_async(TokenAuthenticationEmCache().authenticate_credentials)(chave)
+    return usuario
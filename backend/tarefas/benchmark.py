@@ -0,0 +1,159 @@
+"""Utilitários compartilhados pelos comandos benchmark_*."""
+import asyncio
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .models import Projeto, Tarefa
+
+PREFIXO = 'benchmark'
+
+
+@contextmanager
+def datas_manuais():
+    """Desliga o auto_now_add de data_criacao para semear datas espalhadas no tempo."""
+    campos = [Tarefa._meta.get_field('data_criacao'), Projeto._meta.get_field('data_criacao')]
+    for campo in campos:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo in campos:
+            campo.auto_now_add = True
+
+
+def semear(tarefas, projetos=100, usuarios=50, dias=365, lote=10000, semente=42, saida=None):
+    """
+    Cria usuários, projetos e tarefas de benchmark (reaproveitando o que já existe)
+    e devolve o queryset de projetos semeados.
+    """
+    aleatorio = random.Random(semente)
+    agora = timezone.now()
+
+    existentes = set(User.objects.filter(username__startswith=PREFIXO).values_list('username', flat=True))
+    User.objects.bulk_create(
+        User(username=f'{PREFIXO}{i}', email=f'{PREFIXO}{i}@exemplo.com')
+        for i in range(usuarios) if f'{PREFIXO}{i}' not in existentes
+    )
+    ids_usuarios = list(User.objects.filter(username__startswith=PREFIXO).values_list('pk', flat=True))
+
+    faltando = projetos - Projeto.objects.filter(nome__startswith=PREFIXO).count()
+    with datas_manuais():
+        Projeto.objects.bulk_create(
+            Projeto(
+                nome=f'{PREFIXO} {i}',
+                descricao='Projeto gerado para benchmark',
+                proprietario_id=aleatorio.choice(ids_usuarios),
+                data_criacao=agora - timedelta(days=dias),
+            )
+            for i in range(max(faltando, 0))
+        )
+    projetos_semeados = Projeto.objects.filter(nome__startswith=PREFIXO)
+    ids_projetos = list(projetos_semeados.values_list('pk', flat=True))
+
+    faltando = tarefas - Tarefa.objects.filter(projeto__in=ids_projetos).count()
+    status = [valor for valor, _ in Tarefa.STATUS_CHOICES]
+    criadas = 0
+    with datas_manuais():
+        while criadas < faltando:
+            objs = []
+            for _ in range(min(lote, faltando - criadas)):
+                criacao = agora - timedelta(seconds=aleatorio.randint(0, dias * 86400))
+                estado = aleatorio.choice(status)
+                conclusao = None
+                if estado == 'concluída':
+                    conclusao = min(criacao + timedelta(hours=aleatorio.expovariate(1 / 72)), agora)
+                objs.append(Tarefa(
+                    titulo=f'Tarefa {criadas + len(objs)}',
+                    descricao='Descrição gerada para benchmark ' * aleatorio.randint(1, 8),
+                    status=estado,
+                    data_criacao=criacao,
+                    data_conclusao=conclusao,
+                    projeto_id=aleatorio.choice(ids_projetos),
+                    atribuido_a_id=aleatorio.choice(ids_usuarios) if aleatorio.random() < 0.7 else None,
+                ))
+            Tarefa.objects.bulk_create(objs, batch_size=2000)
+            criadas += len(objs)
+            if saida:
+                saida.write(f'  {criadas}/{faltando} tarefas criadas')
+    return projetos_semeados
+
+
+def cronometrar(funcao, repeticoes=20, aquecimento=2):
+    """Executa `funcao` várias vezes e devolve estatísticas de latência em milissegundos."""
+    for _ in range(aquecimento):
+        funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return {
+        'media': statistics.fmean(tempos),
+        'p50': tempos[len(tempos) // 2],
+        'p99': tempos[min(len(tempos) - 1, int(len(tempos) * 0.99))],
+    }
+
+
+def melhor_tempo(funcao, repeticoes=5):
+    """Menor tempo (em segundos) de `repeticoes` execuções de `funcao`."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def formatar(estatisticas):
+    return ' '.join(f'{nome}={valor:.2f}ms' for nome, valor in estatisticas.items())
+
+
+async def obter_http(url, cabecalhos=None):
+    """GET mínimo (HTTP/1.1, uma conexão por requisição) para gerar carga sem dependências; devolve o status."""
+    partes = urlsplit(url)
+    caminho = partes.path + (f'?{partes.query}' if partes.query else '')
+    leitor, escritor = await asyncio.open_connection(partes.hostname, partes.port or 80)
+    try:
+        linhas = [f'GET {caminho} HTTP/1.1', f'Host: {partes.netloc}', 'Connection: close']
+        linhas += [f'{nome}: {valor}' for nome, valor in (cabecalhos or {}).items()]
+        escritor.write(('\r\n'.join(linhas) + '\r\n\r\n').encode())
+        await escritor.drain()
+        status = int((await leitor.readline()).split()[1])
+        await leitor.read()
+        return status
+    finally:
+        escritor.close()
+
+
+async def carga_concorrente(urls, concorrencia, cabecalhos=None):
+    """
+    Dispara `urls` com `concorrencia` clientes simultâneos e devolve
+    (requisições por segundo, latências em ms ordenadas, erros).
+    """
+    fila = list(reversed(urls))
+    latencias, erros = [], 0
+
+    async def cliente():
+        nonlocal erros
+        while fila:
+            url = fila.pop()
+            inicio = time.perf_counter()
+            try:
+                status = await obter_http(url, cabecalhos)
+            except OSError:
+                status = None
+            if status != 200:
+                erros += 1
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*[cliente() for _ in range(concorrencia)])
+    return len(urls) / (time.perf_counter() - inicio), sorted(latencias), erros
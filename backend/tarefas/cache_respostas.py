@@ -0,0 +1,198 @@
+"""
+Cache das respostas GET da API, por usuário e por URL, invalidado por versão,
+e GET condicional (ETag/If-None-Match) calculado a partir das mesmas versões.
+
+Cada modelo tem um número de versão guardado no próprio cache. A chave de uma
+resposta inclui as versões dos modelos de que ela depende; qualquer escrita em
+um deles incrementa a versão e as entradas antigas deixam de ser encontradas
+(e expiram pelo TTL). As escritas chamam `invalidar()` a partir dos sinais de
+`tarefas.signals` e dos métodos em massa de `tarefas.models`.
+
+O backend é o alias de settings.CACHES indicado em settings.CACHE_RESPOSTAS.
+Com mais de um processo, use um cache compartilhado (arquivo, Redis, Memcached):
+com o locmem, cada processo só enxerga as próprias invalidações.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+from .replicas import leu_de_replica, registrar_escrita
+
+TAREFA = 'tarefas.tarefa'
+PROJETO = 'tarefas.projeto'
+USUARIO = 'auth.user'
+RESUMO = 'tarefas.resumodiario'
+
+PADRAO = {
+    'CACHE': 'default',
+    'TTL': 300,
+}
+
+_metricas = Counter()
+_trava_metricas = threading.Lock()
+
+
+def configuracao():
+    return {**PADRAO, **getattr(settings, 'CACHE_RESPOSTAS', {})}
+
+
+def _cache():
+    return caches[configuracao()['CACHE']]
+
+
+def _chave_versao(modelo):
+    return f'versao:{modelo}'
+
+
+def versoes(*modelos):
+    """Versões atuais dos modelos, criando as que não existem (ou foram descartadas)."""
+    cache = _cache()
+    chaves = [_chave_versao(modelo) for modelo in modelos]
+    atuais = cache.get_many(chaves)
+    for chave in chaves:
+        if chave not in atuais:
+            # Começa de um valor novo para nunca reaproveitar entradas de uma versão perdida
+            cache.add(chave, time.time_ns(), None)
+            atuais[chave] = cache.get(chave)
+    return [atuais[chave] for chave in chaves]
+
+
+def _incrementar(modelos):
+    registrar_escrita()
+    cache = _cache()
+    for modelo in modelos:
+        try:
+            cache.incr(_chave_versao(modelo))
+        except ValueError:
+            cache.set(_chave_versao(modelo), time.time_ns(), None)
+
+
+def invalidar(*modelos, using=None):
+    """
+    Invalida as respostas que dependem dos modelos. Incrementa agora e de novo
+    no commit, para que uma leitura feita no meio da transação não deixe em
+    cache dados que ainda iam mudar.
+    """
+    _incrementar(modelos)
+    if transaction.get_connection(using).in_atomic_block:
+        transaction.on_commit(lambda: _incrementar(modelos), using=using)
+
+
+def _registrar(resultado):
+    with _trava_metricas:
+        _metricas[resultado] += 1
+
+
+def metricas():
+    """
+    Acertos e falhas deste processo desde o início (ou do último zerar_metricas());
+    `nao_modificadas` conta as respostas 304, que não chegam a consultar o cache.
+    """
+    with _trava_metricas:
+        acertos, falhas, nao_modificadas = _metricas['hit'], _metricas['miss'], _metricas['not_modified']
+    total = acertos + falhas
+    return {
+        'acertos': acertos,
+        'falhas': falhas,
+        'nao_modificadas': nao_modificadas,
+        'taxa_acerto': acertos / total if total else 0.0,
+    }
+
+
+def zerar_metricas():
+    with _trava_metricas:
+        _metricas.clear()
+
+
+def chave_resposta(request, dependencias):
+    usuario = request.user.pk if request.user.is_authenticated else 'anonimo'
+    formato = getattr(getattr(request, 'accepted_renderer', None), 'format', '')
+    url = hashlib.sha256(f'{formato}:{request.build_absolute_uri()}'.encode()).hexdigest()
+    versao = '.'.join(str(v) for v in versoes(*dependencias))
+    return f'resposta:{versao}:{usuario}:{url}'
+
+
+def etag(chave):
+    # A chave já identifica a representação (versões, usuário, URL e formato)
+    return '"%s"' % hashlib.sha256(chave.encode()).hexdigest()[:32]
+
+
+def _etag_confere(request, valor):
+    enviados = request.headers.get('If-None-Match')
+    if not enviados:
+        return False
+    return valor in [item.strip() for item in enviados.split(',')]
+
+
+def _qualquer_etag(request):
+    # If-None-Match: * só confere se o recurso existe, o que só a view sabe (RFC 9110, 13.1.2)
+    return (request.headers.get('If-None-Match') or '').strip() == '*'
+
+
+def _validadores(resposta, valor):
+    resposta['ETag'] = valor
+    # O navegador guarda a resposta, mas revalida sempre com If-None-Match
+    resposta['Cache-Control'] = 'private, no-cache'
+    resposta['Vary'] = 'Accept, Authorization'
+
+
+def _nao_modificada(valor_etag):
+    _registrar('not_modified')
+    resposta = Response(status=304)
+    if valor_etag is not None:
+        _validadores(resposta, valor_etag)
+    return resposta
+
+
+def em_cache(*dependencias):
+    """
+    Decora uma ação GET de ViewSet: guarda os dados das respostas 200 sob uma
+    chave por usuário, URL completa e versões de `dependencias`, e marca a
+    resposta com X-Cache: HIT/MISS. Respostas em streaming não são guardadas.
+    A mesma chave dá o ETag: com If-None-Match igual, responde 304 sem consultar
+    o cache nem serializar nada. Com If-None-Match: *, responde 304 só quando a
+    resposta seria 200 (há entrada no cache ou a view respondeu 200). Respostas
+    calculadas com leituras em uma réplica (que pode estar atrasada em relação
+    às versões) não são guardadas nem recebem ETag.
+    """
+    def decorador(metodo):
+        @wraps(metodo)
+        def envolvido(self, request, *args, **kwargs):
+            if request.method != 'GET':
+                return metodo(self, request, *args, **kwargs)
+            cache = _cache()
+            chave = chave_resposta(request, dependencias)
+            valor_etag = etag(chave)
+            if _etag_confere(request, valor_etag):
+                return _nao_modificada(valor_etag)
+            dados = cache.get(chave)
+            if dados is not None:
+                # Só respostas 200 são guardadas: o recurso existe
+                if _qualquer_etag(request):
+                    return _nao_modificada(valor_etag)
+                _registrar('hit')
+                resposta = Response(dados)
+                resposta['X-Cache'] = 'HIT'
+                _validadores(resposta, valor_etag)
+                return resposta
+            _registrar('miss')
+            resposta = metodo(self, request, *args, **kwargs)
+            if isinstance(resposta, Response) and resposta.status_code == 200:
+                de_replica = leu_de_replica()
+                if not de_replica:
+                    cache.set(chave, resposta.data, configuracao()['TTL'])
+                if _qualquer_etag(request):
+                    return _nao_modificada(None if de_replica else valor_etag)
+                resposta['X-Cache'] = 'MISS'
+                if not de_replica:
+                    _validadores(resposta, valor_etag)
+            return resposta
+        return envolvido
+    return decorador
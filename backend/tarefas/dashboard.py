@@ -0,0 +1,48 @@
+"""
+Números do dashboard em três consultas agregadas, no lugar de baixar todos os
+projetos, tarefas e usuários para contar no navegador.
+
+Os totais por status vêm dos contadores desnormalizados de Projeto (uma linha
+por projeto, não por tarefa); as tarefas do usuário usam o índice
+(atribuido_a, status).
+"""
+from django.contrib.auth.models import User
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .models import Projeto, Tarefa
+
+
+def _por_status(pendentes=0, em_progresso=0, concluidas=0):
+    return {
+        'total': pendentes + em_progresso + concluidas,
+        'pendentes': pendentes,
+        'em_progresso': em_progresso,
+        'concluidas': concluidas,
+    }
+
+
+def estatisticas(usuario):
+    projetos = Projeto.objects.aggregate(
+        total=Count('id'),
+        meus=Count('id', filter=Q(proprietario=usuario)),
+        pendentes=Coalesce(Sum('tarefas_pendentes'), 0),
+        em_progresso=Coalesce(Sum('tarefas_em_progresso'), 0),
+        concluidas=Coalesce(Sum('tarefas_concluidas'), 0),
+    )
+    minhas = dict(
+        Tarefa.objects.filter(atribuido_a=usuario)
+        .order_by()
+        .values('status')
+        .annotate(n=Count('id'))
+        .values_list('status', 'n')
+    )
+    return {
+        'projetos': projetos['total'],
+        'usuarios': User.objects.count(),
+        'tarefas': _por_status(projetos['pendentes'], projetos['em_progresso'], projetos['concluidas']),
+        'meus_projetos': projetos['meus'],
+        'minhas_tarefas': _por_status(
+            minhas.get('pendente', 0), minhas.get('em_progresso', 0), minhas.get('concluída', 0)
+        ),
+    }
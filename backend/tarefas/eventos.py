@@ -0,0 +1,174 @@
+"""
+Eventos de tarefas (criada, alterada, removida) publicados em tempo real para
+assinantes via Server-Sent Events (`/api/eventos/`).
+
+Um único broker em memória por processo recebe os eventos das escritas em
+Tarefa (publicados só depois do commit) e os distribui aos assinantes dos
+canais `projeto:<id>` e `usuario:<id>`. Cada assinante acumula os eventos por
+tarefa (coalescência): várias alterações da mesma tarefa dentro da janela de
+envio viram um único evento com o estado final.
+
+Como o broker é local, o push só enxerga as escritas feitas no mesmo processo:
+sirva a API inteira por um processo ASGI (ex.: `uvicorn backend.asgi:application`).
+Com vários processos, ou se a conexão cair, o cliente recupera o que perdeu por
+`/api/tarefas/alteracoes/` (sincronização incremental).
+
+O EventSource do navegador não envia cabeçalhos: em vez do token na URL (que
+acaba nos logs), ele abre o fluxo com um ticket de uso único, emitido por
+`/api/eventos/ticket/` e válido por VALIDADE_TICKET segundos.
+"""
+import asyncio
+import secrets
+import threading
+from collections import defaultdict
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+# Tempo que um assinante espera, depois do primeiro evento, para juntar os seguintes
+JANELA = 0.1
+# Tarefas distintas pendentes por assinante; acima disso, ele recebe "ressincronizar"
+LIMITE_PENDENTES = 1000
+# Segundos entre emitir um ticket e abrir o fluxo com ele
+VALIDADE_TICKET = 30
+PREFIXO_TICKET = 'eventos:ticket:'
+
+
+def emitir_ticket(usuario_id):
+    ticket = secrets.token_urlsafe(32)
+    cache.set(PREFIXO_TICKET + ticket, usuario_id, VALIDADE_TICKET)
+    return ticket
+
+
+async def consumir_ticket(ticket):
+    """Id do usuário do ticket, que deixa de valer; None se não existe, expirou ou já foi usado."""
+    chave = PREFIXO_TICKET + ticket
+    usuario_id = await cache.aget(chave)
+    # Entre dois usos simultâneos, só quem apagar a chave leva
+    if usuario_id is None or not await cache.adelete(chave):
+        return None
+    return usuario_id
+
+
+def canais(projeto=None, atribuido_a=None):
+    resultado = set()
+    if projeto is not None:
+        resultado.add(f'projeto:{projeto}')
+    if atribuido_a is not None:
+        resultado.add(f'usuario:{atribuido_a}')
+    return resultado
+
+
+class Assinatura:
+    """Fila coalescente de um assinante; só é manipulada no loop em que foi criada."""
+
+    def __init__(self, canais, loop):
+        self.canais = frozenset(canais)
+        self.loop = loop
+        self.pendentes = {}
+        self.transbordou = False
+        self._sinal = asyncio.Event()
+
+    def entregar(self, evento):
+        anterior = self.pendentes.pop(evento['id'], None)
+        if anterior is not None and anterior['tipo'] == 'criada' and evento['tipo'] == 'alterada':
+            evento = {**evento, 'tipo': 'criada'}
+        if len(self.pendentes) >= LIMITE_PENDENTES:
+            self.transbordou = True
+            self.pendentes.clear()
+        else:
+            self.pendentes[evento['id']] = evento
+        self._sinal.set()
+
+    async def proximos(self, espera=None):
+        """Aguarda eventos (até `espera` segundos) e devolve os acumulados; [] no timeout."""
+        try:
+            await asyncio.wait_for(self._sinal.wait(), espera)
+        except asyncio.TimeoutError:
+            return []
+        await asyncio.sleep(JANELA)
+        self._sinal.clear()
+        if self.transbordou:
+            self.transbordou = False
+            return [{'tipo': 'ressincronizar'}]
+        eventos = list(self.pendentes.values())
+        self.pendentes.clear()
+        return eventos
+
+
+class Broker:
+    def __init__(self):
+        self._por_canal = defaultdict(set)
+        self._trava = threading.Lock()
+
+    def assinar(self, canais):
+        assinatura = Assinatura(canais, asyncio.get_running_loop())
+        with self._trava:
+            for canal in assinatura.canais:
+                self._por_canal[canal].add(assinatura)
+        return assinatura
+
+    def cancelar(self, assinatura):
+        with self._trava:
+            for canal in assinatura.canais:
+                assinantes = self._por_canal.get(canal)
+                if assinantes is not None:
+                    assinantes.discard(assinatura)
+                    if not assinantes:
+                        del self._por_canal[canal]
+
+    def tem_assinantes(self):
+        return bool(self._por_canal)
+
+    def total_assinaturas(self):
+        with self._trava:
+            return len({a for assinantes in self._por_canal.values() for a in assinantes})
+
+    def publicar(self, eventos):
+        """Entrega os eventos aos assinantes dos canais de cada um; pode ser chamado de qualquer thread."""
+        por_assinatura = defaultdict(list)
+        with self._trava:
+            for evento in eventos:
+                alvos = set()
+                for canal in evento['canais']:
+                    alvos.update(self._por_canal.get(canal, ()))
+                for assinatura in alvos:
+                    por_assinatura[assinatura].append(evento['dados'])
+        for assinatura, lista in por_assinatura.items():
+            try:
+                assinatura.loop.call_soon_threadsafe(_entregar_lista, assinatura, lista)
+            except RuntimeError:
+                # Loop encerrado sem cancelar a assinatura
+                self.cancelar(assinatura)
+
+
+def _entregar_lista(assinatura, eventos):
+    for evento in eventos:
+        assinatura.entregar(evento)
+
+
+broker = Broker()
+
+
+def publicar_tarefas(alteracoes, using=None):
+    """
+    Agenda, para depois do commit, os eventos de uma lista de
+    (tipo, pk, (projeto, status, atribuido_a) anterior ou None, posterior ou None).
+    """
+    if not broker.tem_assinantes():
+        return
+    eventos = []
+    for tipo, pk, antes, depois in alteracoes:
+        atual = depois or antes
+        if tipo == 'alterada' and antes == depois:
+            continue
+        destinos = canais(atual[0], atual[2])
+        if antes:
+            destinos |= canais(antes[0], antes[2])
+        eventos.append({
+            'canais': destinos,
+            'dados': {'tipo': tipo, 'id': pk, 'projeto': atual[0], 'status': atual[1], 'atribuido_a': atual[2]},
+        })
+    if eventos:
+        transaction.on_commit(partial(broker.publicar, eventos), using=using)
@@ -0,0 +1,134 @@
+"""
+Exportação de tarefas e projetos em CSV ou NDJSON, gerada aos poucos.
+
+As linhas vêm de `.values_list()` (sem instanciar modelos), lidas em lotes de
+TAMANHO_LOTE por `streaming.lotes`, e cada lote vira um bloco de bytes que pode
+passar pelo gzip antes de sair. A memória fica constante independentemente do
+número de linhas: o mesmo gerador serve a resposta HTTP e o comando `exportar`.
+"""
+import csv
+import io
+import zlib
+
+from .filtros import filtrar_tarefas
+from .models import Projeto, Tarefa
+from .renderizadores import codificar
+from .streaming import TAMANHO_LOTE, fixar_banco, lotes
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+NIVEL_GZIP = 6
+
+# (coluna na saída, campo do values_list) de cada modelo exportado
+COLUNAS = {
+    'tarefas': [
+        ('id', 'id'),
+        ('titulo', 'titulo'),
+        ('descricao', 'descricao'),
+        ('status', 'status'),
+        ('data_criacao', 'data_criacao'),
+        ('data_conclusao', 'data_conclusao'),
+        ('data_atualizacao', 'data_atualizacao'),
+        ('projeto_id', 'projeto_id'),
+        ('projeto', 'projeto__nome'),
+        ('atribuido_a_id', 'atribuido_a_id'),
+        ('atribuido_a', 'atribuido_a__username'),
+    ],
+    'projetos': [
+        ('id', 'id'),
+        ('nome', 'nome'),
+        ('descricao', 'descricao'),
+        ('data_criacao', 'data_criacao'),
+        ('data_atualizacao', 'data_atualizacao'),
+        ('proprietario_id', 'proprietario_id'),
+        ('proprietario', 'proprietario__username'),
+        ('tarefas_pendentes', 'tarefas_pendentes'),
+        ('tarefas_em_progresso', 'tarefas_em_progresso'),
+        ('tarefas_concluidas', 'tarefas_concluidas'),
+    ],
+}
+
+
+class ExportacaoInvalida(Exception):
+    pass
+
+
+def linhas(modelo, parametros=None):
+    """
+    values_list das colunas de `modelo` ('tarefas' ou 'projetos'), em ordem de
+    id. Nas tarefas, `parametros` aceita os filtros de `tarefas.filtros`.
+    """
+    if modelo == 'tarefas':
+        queryset = filtrar_tarefas(Tarefa.objects.all(), parametros or {})
+    elif modelo == 'projetos':
+        queryset = Projeto.objects.all()
+    else:
+        raise ExportacaoInvalida(f'modelo deve ser um de: {", ".join(COLUNAS)}')
+    # Ordem pela chave primária: o índice dela dispensa ordenar no banco
+    return queryset.order_by('id').values_list(*[campo for _, campo in COLUNAS[modelo]])
+
+
+def _colunas_de_data(colunas):
+    return [i for i, (_, campo) in enumerate(colunas) if campo.startswith('data_')]
+
+
+def gerar_csv(queryset, colunas, tamanho=TAMANHO_LOTE):
+    """Cabeçalho e um bloco de linhas CSV por lote; datas em ISO 8601, nulos vazios."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+    escritor.writerow([nome for nome, _ in colunas])
+    datas = _colunas_de_data(colunas)
+    for lote in lotes(queryset, tamanho):
+        for linha in lote:
+            if datas:
+                linha = list(linha)
+                for i in datas:
+                    if linha[i] is not None:
+                        linha[i] = linha[i].isoformat()
+            escritor.writerow(linha)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gerar_ndjson(queryset, colunas, tamanho=TAMANHO_LOTE):
+    """Um objeto JSON por linha, com as colunas como chaves; um bloco por lote."""
+    nomes = [nome for nome, _ in colunas]
+    for lote in lotes(queryset, tamanho):
+        yield b''.join(codificar(dict(zip(nomes, linha))) + b'\n' for linha in lote)
+
+
+GERADORES = {
+    'csv': gerar_csv,
+    'ndjson': gerar_ndjson,
+}
+
+
+def comprimir(partes, nivel=NIVEL_GZIP):
+    """Comprime um gerador de bytes em gzip à medida que as partes chegam."""
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        for parte in partes:
+            saida = compressor.compress(parte)
+            if saida:
+                yield saida
+        yield compressor.flush()
+    finally:
+        # Se o cliente desistir, fecha já a leitura (e a transação) do gerador de origem
+        partes.close()
+
+
+def exportar(modelo, formato, gzip=False, parametros=None, tamanho=TAMANHO_LOTE):
+    """Gerador com os bytes da exportação de `modelo` em `formato` ('csv' ou 'ndjson')."""
+    if formato not in GERADORES:
+        raise ExportacaoInvalida(f'formato deve ser um de: {", ".join(GERADORES)}')
+    conteudo = GERADORES[formato](fixar_banco(linhas(modelo, parametros)), COLUNAS[modelo], tamanho)
+    return comprimir(conteudo) if gzip else conteudo
+
+
+def nome_arquivo(modelo, formato, gzip=False):
+    return f'{modelo}.{formato}' + ('.gz' if gzip else '')
@@ -0,0 +1,141 @@
+"""
+Filtros, ordenação e busca textual das listagens de tarefas.
+
+    ?status=pendente,em_progresso      ?projeto=3        ?atribuido_a=7 (ou "nenhum")
+    ?criada_apos= / ?criada_antes=     ?concluida_apos= / ?concluida_antes=   (data ou data e hora ISO)
+    ?busca=relatorio mensal            ?ordenar=-data_criacao
+
+Cada combinação tem um índice que começa pelas colunas filtradas e termina na
+ordenação padrão (data_criacao, id), para que uma página seja uma leitura de
+intervalo do índice, e não uma ordenação de todas as linhas filtradas (ver
+Tarefa.Meta.indexes). No PostgreSQL, a busca usa a coluna `busca` (tsvector
+gerado de titulo e descricao, com índice GIN, criada na migração 0005); nos
+outros bancos, cada palavra precisa aparecer no título ou na descrição.
+"""
+from datetime import datetime, time
+
+from django.db import connections
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Tarefa
+
+CAMPOS_ORDENACAO = ('data_criacao', 'data_conclusao', 'data_atualizacao')
+ORDENACAO_PADRAO = ('data_criacao', 'id')
+CONFIGURACAO_BUSCA = 'portuguese'
+
+# parâmetro -> lookup dos intervalos de datas
+INTERVALOS = {
+    'criada_apos': 'data_criacao__gte',
+    'criada_antes': 'data_criacao__lt',
+    'concluida_apos': 'data_conclusao__gte',
+    'concluida_antes': 'data_conclusao__lt',
+}
+
+
+def inteiro(parametro, valor):
+    try:
+        return int(valor)
+    except ValueError:
+        raise ValidationError({parametro: 'Informe um id numérico'})
+
+
+def data_hora(parametro, valor):
+    try:
+        momento = parse_datetime(valor)
+        if momento is None:
+            data = parse_date(valor)
+            momento = datetime.combine(data, time.min) if data else None
+    except ValueError:
+        momento = None
+    if momento is None:
+        raise ValidationError({parametro: 'Informe uma data (AAAA-MM-DD) ou data e hora ISO 8601'})
+    if timezone.is_naive(momento):
+        momento = timezone.make_aware(momento)
+    return momento
+
+
+def buscar(queryset, termo):
+    """Tarefas cujo título ou descrição casam com `termo`."""
+    conexao = connections[queryset.db]
+    if conexao.vendor == 'postgresql':
+        coluna = f'{conexao.ops.quote_name(Tarefa._meta.db_table)}.busca'
+        return queryset.filter(RawSQL(
+            f'{coluna} @@ websearch_to_tsquery(%s::regconfig, %s)',
+            (CONFIGURACAO_BUSCA, termo),
+            output_field=BooleanField(),
+        ))
+    for palavra in termo.split():
+        queryset = queryset.filter(Q(titulo__icontains=palavra) | Q(descricao__icontains=palavra))
+    return queryset
+
+
+def filtrar_tarefas(queryset, parametros):
+    """Aplica os filtros de `parametros` (query params); valores inválidos levantam ValidationError."""
+    status = parametros.get('status')
+    if status:
+        valores = status.split(',')
+        invalidos = set(valores) - set(dict(Tarefa.STATUS_CHOICES))
+        if invalidos:
+            raise ValidationError({'status': f'Status inválido: {", ".join(sorted(invalidos))}'})
+        queryset = queryset.filter(status__in=valores) if len(valores) > 1 else queryset.filter(status=valores[0])
+    projeto = parametros.get('projeto')
+    if projeto:
+        queryset = queryset.filter(projeto_id=inteiro('projeto', projeto))
+    atribuido_a = parametros.get('atribuido_a')
+    if atribuido_a == 'nenhum':
+        queryset = queryset.filter(atribuido_a__isnull=True)
+    elif atribuido_a:
+        queryset = queryset.filter(atribuido_a_id=inteiro('atribuido_a', atribuido_a))
+    for parametro, lookup in INTERVALOS.items():
+        valor = parametros.get(parametro)
+        if valor:
+            queryset = queryset.filter(**{lookup: data_hora(parametro, valor)})
+    termo = parametros.get('busca', '').strip()
+    if termo:
+        queryset = buscar(queryset, termo)
+    return queryset
+
+
+def ordenacao(valor):
+    """Colunas de ORDER BY para ?ordenar=, com o id no fim para a ordem ser estável."""
+    if not valor:
+        return list(ORDENACAO_PADRAO)
+    campo = valor.lstrip('-')
+    if campo not in CAMPOS_ORDENACAO or valor.count('-') > 1:
+        raise ValidationError(
+            {'ordenar': f'Ordene por um de: {", ".join(CAMPOS_ORDENACAO)} (com "-" para decrescente)'}
+        )
+    sentido = '-' if valor.startswith('-') else ''
+    return [valor, f'{sentido}id']
+
+
+def ordenar_tarefas(queryset, valor):
+    colunas = ordenacao(valor)
+    if colunas[0].lstrip('-') == 'data_conclusao':
+        # Só as concluídas têm data de conclusão; o filtro também casa com o índice parcial
+        queryset = queryset.filter(data_conclusao__isnull=False)
+    return queryset.order_by(*colunas)
+
+
+class FiltroTarefas(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        return filtrar_tarefas(queryset, request.query_params)
+
+
+class OrdenacaoTarefas(BaseFilterBackend):
+    """
+    ?ordenar= sobre CAMPOS_ORDENACAO. Expõe get_ordering(), que a paginação por
+    cursor usa no lugar da ordenação fixa dela.
+    """
+    parametro = 'ordenar'
+
+    def get_ordering(self, request, queryset, view):
+        return ordenacao(request.query_params.get(self.parametro))
+
+    def filter_queryset(self, request, queryset, view):
+        return ordenar_tarefas(queryset, request.query_params.get(self.parametro))
@@ -0,0 +1,126 @@
+"""
+Caminho rápido de leitura: gera a mesma representação dos serializers a partir
+de linhas de `.values()`, sem instanciar modelos nem percorrer os campos do DRF
+a cada linha.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .serializers import parametro_lista
+
+# Campos cujo to_representation devolve o próprio valor vindo do banco
+CAMPOS_IDENTIDADE = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.ChoiceField,
+    serializers.BooleanField,
+    serializers.ReadOnlyField,
+)
+
+
+class NaoSuportado(Exception):
+    """O serializer usa algo que o caminho rápido não sabe reproduzir."""
+
+
+def _identidade(valor):
+    return valor
+
+
+def _conversor_data_hora(campo):
+    formato = getattr(campo, 'format', api_settings.DATETIME_FORMAT)
+    if not settings.USE_TZ or formato is None or formato.lower() != ISO_8601 or hasattr(campo, 'timezone'):
+        return campo.to_representation
+
+    # Mesmo resultado de DateTimeField.to_representation, sem o enforce_timezone genérico
+    def converter(valor):
+        if isinstance(valor, str) or valor.tzinfo is None:
+            return campo.to_representation(valor)
+        texto = valor.astimezone(timezone.get_current_timezone()).isoformat()
+        if texto.endswith('+00:00'):
+            texto = texto[:-6] + 'Z'
+        return texto
+
+    return converter
+
+
+def _conversor(campo):
+    if isinstance(campo, serializers.DateTimeField):
+        return _conversor_data_hora(campo)
+    if isinstance(campo, CAMPOS_IDENTIDADE) and not isinstance(campo, serializers.SerializerMethodField):
+        return _identidade
+    if isinstance(campo, serializers.Field) and not isinstance(campo, serializers.BaseSerializer):
+        return campo.to_representation
+    raise NaoSuportado(campo)
+
+
+class LeitorRapido:
+    """Plano pré-compilado de colunas e conversores para um serializer já configurado."""
+
+    def __init__(self, serializer, prefixo=''):
+        self.colunas = []
+        self.plano = []
+        modelo = serializer.Meta.model
+        self.coluna_pk = f'{prefixo}{modelo._meta.pk.name}'
+        self.colunas.append(self.coluna_pk)
+        for nome, campo in serializer.fields.items():
+            if campo.write_only:
+                continue
+            fonte = campo.source
+            if '.' in fonte or fonte == '*':
+                raise NaoSuportado(campo)
+            if isinstance(campo, serializers.ListSerializer) or getattr(campo, 'many', False):
+                raise NaoSuportado(campo)
+            if isinstance(campo, serializers.ModelSerializer):
+                aninhado = LeitorRapido(campo, f'{prefixo}{fonte}__')
+                self.colunas.extend(aninhado.colunas)
+                self.plano.append((nome, None, aninhado))
+            elif isinstance(campo, serializers.PrimaryKeyRelatedField):
+                self.colunas.append(f'{prefixo}{fonte}')
+                self.plano.append((nome, f'{prefixo}{fonte}', _identidade))
+            else:
+                try:
+                    modelo._meta.get_field(fonte)  # só campos concretos do modelo
+                except FieldDoesNotExist:
+                    raise NaoSuportado(campo)
+                self.colunas.append(f'{prefixo}{fonte}')
+                self.plano.append((nome, f'{prefixo}{fonte}', _conversor(campo)))
+        self.colunas = list(dict.fromkeys(self.colunas))
+
+    def __call__(self, linha):
+        resultado = {}
+        for nome, coluna, conversor in self.plano:
+            if coluna is None:
+                # Relação nula: o DRF devolve None em vez do objeto aninhado
+                resultado[nome] = conversor(linha) if linha[conversor.coluna_pk] is not None else None
+            else:
+                valor = linha[coluna]
+                resultado[nome] = None if valor is None else conversor(valor)
+        return resultado
+
+    def valores(self, queryset, *extras):
+        """O queryset em forma de `.values()` com as colunas que o plano lê (mais `extras`)."""
+        return queryset.values(*dict.fromkeys(self.colunas + list(extras)))
+
+
+@lru_cache(maxsize=256)
+def _compilar(serializer_class, campos, expandir):
+    serializer = serializer_class(campos=list(campos) if campos is not None else None, expandir=list(expandir))
+    return LeitorRapido(serializer)
+
+
+def leitor_para(serializer_class, request=None):
+    """
+    Leitor para o serializer com os `?fields=`/`?expand=` da request, ou None se o
+    serializer não puder ser reproduzido pelo caminho rápido.
+    """
+    campos = parametro_lista(request, 'fields')
+    expandir = parametro_lista(request, 'expand') or []
+    try:
+        return _compilar(serializer_class, tuple(campos) if campos is not None else None, tuple(expandir))
+    except NaoSuportado:
+        return None
@@ -0,0 +1,207 @@
+"""
+Operações em lote sobre Tarefa: cada lote roda em uma transação, com
+bulk_create/bulk_update, e devolve um resultado por item.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.functions import Now
+
+from .models import Projeto, Tarefa
+from .serializers import TarefaLoteSerializer
+
+LIMITE_LOTE = 10000
+
+
+class LoteInvalido(Exception):
+    pass
+
+
+def _validar_lista(itens):
+    if not isinstance(itens, list):
+        raise LoteInvalido('Envie uma lista de itens')
+    if len(itens) > LIMITE_LOTE:
+        raise LoteInvalido(f'O lote aceita no máximo {LIMITE_LOTE} itens')
+
+
+def _inteiro(valor):
+    # bool é subclasse de int: True não pode virar o id 1
+    return type(valor) is int
+
+
+def _validar_ids(ids):
+    _validar_lista(ids)
+    if not all(_inteiro(tarefa_id) for tarefa_id in ids):
+        raise LoteInvalido('Os ids devem ser numéricos')
+
+
+def _validar_itens(itens, partial=False):
+    """Valida cada item e confere as FKs referenciadas com uma consulta por tabela."""
+    validados, erros = {}, {}
+    for indice, item in enumerate(itens):
+        serializer = TarefaLoteSerializer(data=item, partial=partial)
+        if serializer.is_valid():
+            validados[indice] = serializer.validated_data
+        else:
+            erros[indice] = serializer.errors
+
+    projetos = {dados['projeto'] for dados in validados.values() if 'projeto' in dados}
+    usuarios = {dados['atribuido_a'] for dados in validados.values() if dados.get('atribuido_a') is not None}
+    projetos_existentes = set(Projeto.objects.filter(pk__in=projetos).values_list('pk', flat=True))
+    usuarios_existentes = set(User.objects.filter(pk__in=usuarios).values_list('pk', flat=True))
+    for indice, dados in list(validados.items()):
+        if 'projeto' in dados and dados['projeto'] not in projetos_existentes:
+            erros[indice] = {'projeto': ['Projeto não encontrado']}
+        elif dados.get('atribuido_a') is not None and dados['atribuido_a'] not in usuarios_existentes:
+            erros[indice] = {'atribuido_a': ['Usuário não encontrado']}
+        else:
+            continue
+        del validados[indice]
+    return validados, erros
+
+
+def _atributos(dados):
+    """Converte os ids validados nos nomes de atributo do modelo."""
+    atributos = dict(dados)
+    if 'projeto' in atributos:
+        atributos['projeto_id'] = atributos.pop('projeto')
+    if 'atribuido_a' in atributos:
+        atributos['atribuido_a_id'] = atributos.pop('atribuido_a')
+    return atributos
+
+
+def _resultados(total, sucessos, erros):
+    return [
+        sucessos.get(indice) or {'indice': indice, 'resultado': 'erro', 'erros': erros[indice]}
+        for indice in range(total)
+    ]
+
+
+def criar_em_lote(itens):
+    _validar_lista(itens)
+    validados, erros = _validar_itens(itens)
+    objetos = {indice: Tarefa(**_atributos(dados)) for indice, dados in validados.items()}
+    with transaction.atomic():
+        Tarefa.objects.bulk_create(objetos.values(), batch_size=1000)
+    sucessos = {
+        indice: {'indice': indice, 'resultado': 'criada', 'id': tarefa.pk} for indice, tarefa in objetos.items()
+    }
+    return _resultados(len(itens), sucessos, erros)
+
+
+def atualizar_em_lote(itens):
+    """Atualizações parciais: cada item traz o `id` da tarefa e os campos a alterar."""
+    _validar_lista(itens)
+    ids = {}
+    erros = {}
+    for indice, item in enumerate(itens):
+        if not isinstance(item, dict) or not _inteiro(item.get('id')):
+            erros[indice] = {'id': ['Informe o id numérico da tarefa']}
+        else:
+            ids[indice] = item['id']
+    sem_id = [
+        {campo: valor for campo, valor in item.items() if campo != 'id'} if indice in ids else {}
+        for indice, item in enumerate(itens)
+    ]
+    validados, erros_validacao = _validar_itens(sem_id, partial=True)
+    erros.update({indice: erro for indice, erro in erros_validacao.items() if indice in ids})
+
+    with transaction.atomic():
+        tarefas = Tarefa.objects.select_for_update().in_bulk(ids.values())
+        alteradas, campos, sucessos = {}, set(), {}
+        for indice, tarefa_id in ids.items():
+            if indice in erros:
+                continue
+            tarefa = alteradas.get(tarefa_id) or tarefas.get(tarefa_id)
+            if tarefa is None:
+                erros[indice] = {'id': ['Tarefa não encontrada']}
+                continue
+            atributos = _atributos(validados[indice])
+            for campo, valor in atributos.items():
+                setattr(tarefa, campo, valor)
+            campos.update(atributos)
+            alteradas[tarefa_id] = tarefa
+            sucessos[indice] = {'indice': indice, 'resultado': 'atualizada', 'id': tarefa_id}
+        if alteradas and campos:
+            Tarefa.objects.bulk_update(alteradas.values(), sorted(campos), batch_size=1000)
+    return _resultados(len(itens), sucessos, erros)
+
+
+def remover_em_lote(ids):
+    _validar_ids(ids)
+    with transaction.atomic():
+        existentes = set(Tarefa.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        Tarefa.objects.filter(pk__in=existentes).delete()
+    sucessos, erros = {}, {}
+    for indice, tarefa_id in enumerate(ids):
+        if tarefa_id in existentes:
+            sucessos[indice] = {'indice': indice, 'resultado': 'removida', 'id': tarefa_id}
+        else:
+            erros[indice] = {'id': ['Tarefa não encontrada']}
+    return _resultados(len(ids), sucessos, erros)
+
+
+# Critérios aceitos em {"filtro": {...}} e o lookup correspondente
+FILTROS = {
+    'projeto': 'projeto_id',
+    'status': 'status',
+    'atribuido_a': 'atribuido_a_id',
+}
+
+
+def selecionar_tarefas(dados):
+    """
+    Tarefas alvo de uma ação em lote: `{"ids": [...]}` e/ou
+    `{"filtro": {"projeto": 1, "status": "pendente", "atribuido_a": null}}`.
+    """
+    if not isinstance(dados, dict):
+        raise LoteInvalido('Envie um objeto com "ids" e/ou "filtro"')
+    ids, filtro = dados.get('ids'), dados.get('filtro')
+    if ids is None and not filtro:
+        raise LoteInvalido('Informe "ids" ou um "filtro" não vazio')
+    tarefas = Tarefa.objects.all()
+    if ids is not None:
+        _validar_ids(ids)
+        tarefas = tarefas.filter(pk__in=ids)
+    if filtro:
+        if not isinstance(filtro, dict) or set(filtro) - set(FILTROS):
+            raise LoteInvalido(f'O filtro aceita apenas: {", ".join(FILTROS)}')
+        for chave, valor in filtro.items():
+            if valor is None:
+                tarefas = tarefas.filter(**{f'{FILTROS[chave]}__isnull': True})
+                continue
+            if chave == 'status' and not isinstance(valor, str):
+                raise LoteInvalido('O status do filtro deve ser um texto')
+            if chave != 'status' and not _inteiro(valor):
+                raise LoteInvalido(f'O filtro "{chave}" deve ser um id numérico ou null')
+            tarefas = tarefas.filter(**{FILTROS[chave]: valor})
+    return tarefas
+
+
+def mudar_status_em_lote(tarefas, novo_status):
+    """
+    Muda o status das tarefas que ainda não estão no status pedido, em uma
+    transação com três comandos por seleção (não por tarefa): o SELECT ...
+    FOR UPDATE que lê o estado anterior, o UPDATE das tarefas e o UPDATE dos
+    contadores dos projetos (ver TarefaQuerySet.update).
+    """
+    if not isinstance(novo_status, str) or novo_status not in dict(Tarefa.STATUS_CHOICES):
+        raise LoteInvalido('Status inválido')
+    valores = {'status': novo_status}
+    if novo_status == 'concluída':
+        valores['data_conclusao'] = Now()
+    return tarefas.exclude(status=novo_status).update(**valores)
+
+
+def atribuir_em_lote(tarefas, user_id):
+    """
+    Atribui (ou, com user_id nulo, remove) o responsável com um UPDATE. Com
+    assinantes de eventos conectados, um SELECT ... FOR UPDATE antes lê os
+    responsáveis anteriores; os contadores não mudam.
+    """
+    if user_id is not None and not _inteiro(user_id):
+        raise LoteInvalido('user_id deve ser um id numérico ou null')
+    if user_id is not None and not User.objects.filter(pk=user_id).exists():
+        raise LookupError('Usuário não encontrado')
+    if user_id is None:
+        return tarefas.exclude(atribuido_a__isnull=True).update(atribuido_a=None)
+    return tarefas.exclude(atribuido_a_id=user_id).update(atribuido_a_id=user_id)
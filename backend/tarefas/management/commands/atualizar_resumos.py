@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tarefas.resumos import atualizar, divergencias
+
+
+class Command(BaseCommand):
+    help = (
+        'Atualiza o resumo diário de tarefas (ResumoDiario) recalculando só os dias tocados '
+        'desde a última execução, ou verifica o resumo contra a tabela de tarefas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--completo', action='store_true', help='Recalcula todos os dias')
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Só compara o resumo com a tabela de tarefas, sem alterar nada',
+        )
+
+    def handle(self, *args, **options):
+        if options['verificar']:
+            diferentes = divergencias()
+            for (dia, projeto, status, atribuido_a), (gravado, esperado) in sorted(
+                diferentes.items(), key=lambda item: str(item[0])
+            ):
+                self.stdout.write(
+                    f'{dia} projeto {projeto} {status} responsável {atribuido_a}: '
+                    f'gravado {gravado}, esperado {esperado}'
+                )
+            if diferentes:
+                raise CommandError(f'{len(diferentes)} linha(s) do resumo divergente(s)')
+            self.stdout.write(self.style.SUCCESS('Resumo consistente'))
+            return
+
+        dias = atualizar(completo=options['completo'])
+        self.stdout.write(self.style.SUCCESS(f'{dias} dia(s) recalculado(s)'))
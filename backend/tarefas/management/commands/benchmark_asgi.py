@@ -0,0 +1,53 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from tarefas.benchmark import carga_concorrente
+
+# (rota DRF servida pelo WSGI, rota equivalente de views_assincronas servida pelo ASGI)
+ROTAS = [
+    ('/api/tarefas/?page={pagina}', '/api/async/tarefas/?page={pagina}'),
+    (
+        '/api/tarefas/tarefas_por_usuario/?user_id={usuario}&page={pagina}',
+        '/api/async/tarefas/tarefas_por_usuario/?user_id={usuario}&page={pagina}',
+    ),
+    ('/api/projetos/{projeto}/resumo_progresso/', '/api/async/projetos/{projeto}/resumo_progresso/'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera carga concorrente contra um servidor WSGI e um ASGI já em execução (mesmo banco) '
+        'e compara requisições/s e latência p50/p99 das leituras mais usadas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', default='http://localhost:8000', help='Ex.: gunicorn backend.wsgi -w 1 --threads 8')
+        parser.add_argument('--asgi', default='http://localhost:8001', help='Ex.: uvicorn backend.asgi:application')
+        parser.add_argument('--token', required=True)
+        parser.add_argument('--concorrencia', type=int, default=100)
+        parser.add_argument('--requisicoes', type=int, default=2000)
+        parser.add_argument('--usuario', type=int, default=1)
+        parser.add_argument('--projeto', type=int, default=1)
+        parser.add_argument('--paginas', type=int, default=5, help='Páginas distintas alternadas nas listagens')
+
+    def handle(self, *args, **options):
+        cabecalhos = {'Authorization': f'Token {options["token"]}'}
+        for rota_wsgi, rota_asgi in ROTAS:
+            for nome, base, rota in (('WSGI', options['wsgi'], rota_wsgi), ('ASGI', options['asgi'], rota_asgi)):
+                # O parâmetro extra muda a URL a cada requisição e passa ao largo do cache de respostas
+                urls = [
+                    base + rota.format(usuario=options['usuario'], projeto=options['projeto'],
+                                       pagina=i % options['paginas'] + 1)
+                    + ('&' if '?' in rota else '?') + f'_b={i}'
+                    for i in range(options['requisicoes'])
+                ]
+                por_segundo, latencias, erros = asyncio.run(
+                    carga_concorrente(urls, options['concorrencia'], cabecalhos)
+                )
+                p50 = latencias[len(latencias) // 2]
+                p99 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.99))]
+                self.stdout.write(
+                    f'{nome} {rota.split("?")[0]}: {por_segundo:,.0f} req/s, '
+                    f'p50={p50:.1f}ms p99={p99:.1f}ms, {erros} erro(s)'
+                )
@@ -0,0 +1,67 @@
+import itertools
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from tarefas.benchmark import PREFIXO, cronometrar, formatar, semear
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a latência de uma requisição real da API abrindo uma conexão nova por '
+        'requisição e reaproveitando a conexão (CONN_MAX_AGE ou pool)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tarefas', type=int, default=10000)
+        parser.add_argument('--requisicoes', type=int, default=500)
+
+    def handle(self, *args, **options):
+        projeto = semear(options['tarefas'], saida=self.stdout).first()
+        token, _ = Token.objects.get_or_create(user=User.objects.filter(username__startswith=PREFIXO).first())
+        cliente = Client(headers={'Authorization': f'Token {token.key}'})
+        sequencia = itertools.count()
+
+        def requisicao():
+            # O parâmetro extra passa ao largo do cache de respostas, para sempre consultar o banco
+            cliente.get(f'/api/projetos/{projeto.pk}/resumo_progresso/?_b={next(sequencia)}')
+            # O Client de teste não fecha conexões ao fim da requisição; aqui fazemos como o handler real
+            close_old_connections()
+
+        abertas = 0
+
+        def contar(**kwargs):
+            nonlocal abertas
+            abertas += 1
+
+        connection_created.connect(contar)
+        configuracao = connection.settings_dict
+        original = configuracao['CONN_MAX_AGE']
+        pool = bool(configuracao.get('OPTIONS', {}).get('pool'))
+        cenarios = [('conexão nova por requisição' if not pool else 'pool', 0)]
+        if not pool:
+            cenarios.append(('conexão persistente', 600))
+        resultados = {}
+        try:
+            for nome, idade in cenarios:
+                # O tempo de vida é lido a cada connect(); fechar força uma conexão com a nova configuração
+                configuracao['CONN_MAX_AGE'] = idade
+                connection.close()
+                abertas = 0
+                resultados[nome] = cronometrar(requisicao, options['requisicoes'])
+                self.stdout.write(f'{nome}: {formatar(resultados[nome])}, {abertas} conexão(ões) aberta(s)')
+        finally:
+            configuracao['CONN_MAX_AGE'] = original
+            connection_created.disconnect(contar)
+            connection.close()
+
+        if len(resultados) == 2:
+            nova, persistente = resultados.values()
+            self.stdout.write(
+                f'Economia por requisição: {nova["media"] - persistente["media"]:.2f}ms na média, '
+                f'{nova["p99"] - persistente["p99"]:.2f}ms no p99'
+            )
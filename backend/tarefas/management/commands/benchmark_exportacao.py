@@ -0,0 +1,70 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tarefas.benchmark import semear
+from tarefas.exportacao import GERADORES, exportar, linhas
+from tarefas.models import Tarefa
+
+
+def _consumir(conteudo):
+    """Percorre a exportação; devolve (bytes gerados, segundos até o primeiro bloco, segundos no total)."""
+    inicio = time.perf_counter()
+    primeiro = None
+    total = 0
+    for parte in conteudo:
+        if primeiro is None:
+            primeiro = time.perf_counter() - inicio
+        total += len(parte)
+    return total, primeiro or 0, time.perf_counter() - inicio
+
+
+def _pico_memoria(funcao):
+    """Pico de memória alocada pelo Python durante `funcao`, em MB (não inclui buffers do driver)."""
+    tracemalloc.start()
+    try:
+        funcao()
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a exportação de tarefas (CSV e NDJSON, com e sem gzip): linhas/s, tempo até o primeiro '
+        'bloco e pico de memória, que deve ficar constante independentemente do número de linhas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tarefas', type=int, default=1000000)
+        parser.add_argument('--projetos', type=int, default=1000)
+        parser.add_argument('--usuarios', type=int, default=200)
+        parser.add_argument(
+            '--sem-comparacao',
+            action='store_true',
+            help='Não mede a memória de carregar todas as linhas de uma vez (lento em tabelas grandes)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stderr.write('Sem PostgreSQL, o .iterator() não usa cursor no servidor')
+        semear(options['tarefas'], projetos=options['projetos'], usuarios=options['usuarios'], saida=self.stdout)
+        total_linhas = Tarefa.objects.count()
+        self.stdout.write(f'{total_linhas:,} tarefas na tabela\n')
+
+        self.stdout.write(f'{"":16}{"linhas/s":>12}{"MB/s":>10}{"MB gerados":>12}{"1º bloco":>12}{"pico MB":>10}')
+        for formato in GERADORES:
+            for gzip in (False, True):
+                gerados, primeiro, duracao = _consumir(exportar('tarefas', formato, gzip))
+                pico = _pico_memoria(lambda: _consumir(exportar('tarefas', formato, gzip)))
+                nome = formato + (' + gzip' if gzip else '')
+                self.stdout.write(
+                    f'{nome:16}{total_linhas / duracao:12,.0f}{gerados / 1024 / 1024 / duracao:10.1f}'
+                    f'{gerados / 1024 / 1024:12.1f}{primeiro * 1000:10.0f}ms{pico:10.1f}'
+                )
+
+        if not options['sem_comparacao']:
+            pico = _pico_memoria(lambda: list(linhas('tarefas')))
+            self.stdout.write(f'\nPara comparar, carregar todas as linhas em uma lista: pico de {pico:,.1f} MB')
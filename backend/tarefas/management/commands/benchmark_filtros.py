@@ -0,0 +1,67 @@
+import itertools
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from tarefas.benchmark import PREFIXO, cronometrar, semear
+from tarefas.models import Tarefa
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede a primeira página de /api/tarefas/ com cada combinação de filtros enquanto a tabela '
+        'cresce: com os índices de Tarefa, a latência deve crescer bem menos que o número de linhas'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanhos', default='10000,100000,1000000', help='Totais de tarefas, em ordem crescente')
+        parser.add_argument('--projetos', type=int, default=1000)
+        parser.add_argument('--usuarios', type=int, default=200)
+        parser.add_argument('--repeticoes', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stderr.write('Sem PostgreSQL, a busca cai no LIKE, que varre a tabela')
+        tamanhos = [int(tamanho) for tamanho in options['tamanhos'].split(',')]
+        sequencia = itertools.count()
+        resultados = {}
+        for tamanho in tamanhos:
+            self.stdout.write(f'Semeando {tamanho} tarefas...')
+            projetos = semear(tamanho, projetos=options['projetos'], usuarios=options['usuarios'], saida=self.stdout)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {Tarefa._meta.db_table}')
+            usuario = User.objects.filter(username__startswith=PREFIXO).first()
+            token, _ = Token.objects.get_or_create(user=usuario)
+            cliente = Client(headers={'Authorization': f'Token {token.key}'})
+            projeto = projetos.order_by('pk').first()
+            # A paginação por cursor evita o COUNT(*), que é linear no número de linhas filtradas
+            consultas = {
+                'status': 'status=em_progresso',
+                'projeto + status': f'projeto={projeto.pk}&status=pendente',
+                'responsável + status': f'atribuido_a={usuario.pk}&status=pendente',
+                'criadas no último mês': f'criada_apos={(timezone.now() - timedelta(days=30)).date()}',
+                'concluídas recentemente': 'ordenar=-data_conclusao',
+                'busca': 'busca=gerada%20benchmark',
+            }
+            for nome, parametros in consultas.items():
+                def requisicao():
+                    # O parâmetro extra passa ao largo do cache de respostas
+                    resposta = cliente.get(f'/api/tarefas/?paginacao=cursor&{parametros}&_b={next(sequencia)}')
+                    assert resposta.status_code == 200, resposta.content
+                resultados[nome, tamanho] = cronometrar(requisicao, options['repeticoes'])['p50']
+
+        self.stdout.write('\np50 em ms por total de tarefas')
+        self.stdout.write(f'{"":26}' + ''.join(f'{tamanho:>12,}' for tamanho in tamanhos) + '   crescimento')
+        for nome in consultas:
+            tempos = [resultados[nome, tamanho] for tamanho in tamanhos]
+            self.stdout.write(
+                f'{nome:26}' + ''.join(f'{tempo:12.2f}' for tempo in tempos)
+                + f'   {tempos[-1] / tempos[0]:.1f}x para {tamanhos[-1] / tamanhos[0]:.0f}x linhas'
+            )
+
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.db.models import Count
+
+from tarefas.benchmark import cronometrar, formatar, semear
+from tarefas.models import Tarefa
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Semeia tarefas no PostgreSQL e compara planos de execução e latências das consultas '
+        'mais frequentes com os índices de Tarefa e sem eles (apenas para bancos locais)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tarefas', type=int, default=1_000_000)
+        parser.add_argument('--projetos', type=int, default=1000)
+        parser.add_argument('--usuarios', type=int, default=200)
+        parser.add_argument('--repeticoes', type=int, default=20)
+        parser.add_argument('--sem-planos', action='store_true', help='Não imprime o EXPLAIN ANALYZE')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Este benchmark precisa de um banco PostgreSQL')
+
+        self.stdout.write(f"Semeando {options['tarefas']} tarefas...")
+        projetos = semear(
+            options['tarefas'], projetos=options['projetos'], usuarios=options['usuarios'], saida=self.stdout
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Tarefa._meta.db_table}')
+
+        projeto = projetos.order_by('-tarefas_pendentes').first()
+        usuario_id = (
+            Tarefa.objects.filter(projeto__in=projetos, atribuido_a__isnull=False)
+            .values_list('atribuido_a_id', flat=True).first()
+        )
+        consultas = {
+            'status dentro do projeto': (
+                Tarefa.objects.filter(projeto=projeto).values('status').annotate(n=Count('id')).order_by()
+            ),
+            'tarefas_do_projeto pendentes': Tarefa.objects.filter(projeto=projeto, status='pendente')[:20],
+            'tarefas_por_usuario': Tarefa.objects.filter(atribuido_a_id=usuario_id)[:20],
+            'tarefas_por_usuario + status': (
+                Tarefa.objects.filter(atribuido_a_id=usuario_id, status='em_progresso')[:20]
+            ),
+            'mais recentes': Tarefa.objects.order_by('-data_criacao')[:20],
+            'concluídas recentemente': (
+                Tarefa.objects.filter(data_conclusao__isnull=False).order_by('-data_conclusao')[:20]
+            ),
+        }
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nCom os índices atuais'))
+        self.medir(consultas, options)
+
+        # DDL é transacional no PostgreSQL: volta ao esquema original (só os índices
+        # das FKs) dentro de uma transação que é desfeita no final.
+        try:
+            with transaction.atomic(), connection.schema_editor(atomic=False) as editor:
+                for indice in Tarefa._meta.indexes:
+                    editor.remove_index(Tarefa, indice)
+                for campo in ('projeto', 'atribuido_a'):
+                    editor.add_index(Tarefa, models.Index(fields=[campo], name=f'benchmark_{campo}_idx'))
+                with connection.cursor() as cursor:
+                    cursor.execute(f'ANALYZE {Tarefa._meta.db_table}')
+                self.stdout.write(self.style.MIGRATE_HEADING('\nSem os índices (esquema original)'))
+                self.medir(consultas, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def medir(self, consultas, options):
+        for nome, queryset in consultas.items():
+            sql, parametros = queryset.query.sql_with_params()
+            estatisticas = cronometrar(lambda: list(queryset.all()), repeticoes=options['repeticoes'])
+            self.stdout.write(f'{nome}: {formatar(estatisticas)}')
+            if not options['sem_planos']:
+                with connection.cursor() as cursor:
+                    cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS) {sql}', parametros)
+                    for (linha,) in cursor.fetchall():
+                        self.stdout.write(f'    {linha}')
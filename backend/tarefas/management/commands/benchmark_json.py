@@ -0,0 +1,57 @@
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from tarefas import renderizadores
+from tarefas.benchmark import melhor_tempo, semear
+from tarefas.models import Tarefa
+from tarefas.serializers import TarefaSerializer
+
+CENARIOS = {
+    'ids': [],
+    'projeto e responsável': ['projeto', 'atribuido_a'],
+    'tudo expandido': ['projeto.proprietario', 'atribuido_a'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Compara o JSONRenderer/JSONParser do DRF com os baseados em orjson sobre payloads de TarefaSerializer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tarefas', type=int, default=20000)
+        parser.add_argument('--linhas', type=int, default=1000, help='Tarefas por payload')
+        parser.add_argument('--repeticoes', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if renderizadores.orjson is None:
+            raise CommandError('orjson não está instalado')
+        semear(options['tarefas'], saida=self.stdout)
+        queryset = Tarefa.objects.order_by('pk')[:options['linhas']]
+
+        padrao, rapido = JSONRenderer(), renderizadores.JSONRapidoRenderer()
+        parser_padrao, parser_rapido = JSONParser(), renderizadores.JSONRapidoParser()
+        for nome, expandir in CENARIOS.items():
+            dados = TarefaSerializer(
+                TarefaSerializer.otimizar_queryset(queryset, expandir=expandir), many=True, expandir=expandir
+            ).data
+            corpo = padrao.render(dados)
+            if rapido.render(dados) != corpo:
+                raise CommandError(f'Saídas diferentes no cenário "{nome}"')
+
+            megabytes = len(corpo) / 1024 / 1024
+            t_padrao = melhor_tempo(lambda: padrao.render(dados), options['repeticoes'])
+            t_rapido = melhor_tempo(lambda: rapido.render(dados), options['repeticoes'])
+            self.stdout.write(
+                f'render {nome} ({megabytes:.2f} MB): json {megabytes / t_padrao:,.0f} MB/s, '
+                f'orjson {megabytes / t_rapido:,.0f} MB/s ({t_padrao / t_rapido:.1f}x)'
+            )
+
+            t_padrao = melhor_tempo(lambda: parser_padrao.parse(BytesIO(corpo)), options['repeticoes'])
+            t_rapido = melhor_tempo(lambda: parser_rapido.parse(BytesIO(corpo)), options['repeticoes'])
+            self.stdout.write(
+                f'parse  {nome}: json {megabytes / t_padrao:,.0f} MB/s, '
+                f'orjson {megabytes / t_rapido:,.0f} MB/s ({t_padrao / t_rapido:.1f}x)'
+            )
+
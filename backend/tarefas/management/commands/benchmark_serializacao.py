@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from tarefas.benchmark import melhor_tempo, semear
+from tarefas.leitura_rapida import leitor_para
+from tarefas.serializers import ProjetoSerializer, TarefaSerializer, UserSerializer
+
+CENARIOS = [
+    (TarefaSerializer, ''),
+    (TarefaSerializer, 'expand=projeto,atribuido_a'),
+    (TarefaSerializer, 'expand=projeto.proprietario,atribuido_a'),
+    (TarefaSerializer, 'fields=id,titulo,status'),
+    (ProjetoSerializer, 'expand=proprietario'),
+    (UserSerializer, ''),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compara linhas/s dos serializers DRF com o caminho rápido de leitura (e confere se a saída é idêntica)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tarefas', type=int, default=20000)
+        parser.add_argument('--linhas', type=int, default=5000, help='Linhas serializadas por medição')
+        parser.add_argument('--repeticoes', type=int, default=3)
+
+    def handle(self, *args, **options):
+        semear(options['tarefas'], saida=self.stdout)
+        renderizar = JSONRenderer().render
+
+        for serializer_class, consulta in CENARIOS:
+            request = Request(RequestFactory().get(f'/?{consulta}'))
+            contexto = {'request': request}
+            queryset = serializer_class.Meta.model.objects.order_by('pk')[:options['linhas']]
+            queryset = serializer_class.otimizar_queryset(queryset, context=contexto)
+            leitor = leitor_para(serializer_class, request)
+            if leitor is None:
+                raise CommandError(f'{serializer_class.__name__} não é suportado pelo caminho rápido')
+
+            # Mede só a serialização: as linhas já estão carregadas
+            instancias = list(queryset)
+            linhas = list(leitor.valores(queryset))
+            repeticoes = options['repeticoes']
+            drf = melhor_tempo(lambda: serializer_class(instancias, many=True, context=contexto).data, repeticoes)
+            rapido = melhor_tempo(lambda: [leitor(linha) for linha in linhas], repeticoes)
+
+            esperado = renderizar(serializer_class(instancias, many=True, context=contexto).data)
+            identico = renderizar([leitor(linha) for linha in linhas]) == esperado
+            n = len(instancias)
+            self.stdout.write(
+                f'{serializer_class.__name__} ?{consulta}: '
+                f'DRF {n / drf:,.0f} linhas/s, rápido {n / rapido:,.0f} linhas/s '
+                f'({drf / rapido:.1f}x), saída idêntica: {"sim" if identico else "NÃO"}'
+            )
+            if not identico:
+                raise CommandError('O caminho rápido divergiu do serializer')
@@ -0,0 +1,52 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from tarefas.exportacao import COLUNAS, GERADORES, ExportacaoInvalida, exportar
+
+
+class Command(BaseCommand):
+    help = (
+        'Exporta tarefas (com projeto e responsável) ou projetos em CSV ou NDJSON, '
+        'lendo o banco em lotes, com memória constante'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('modelo', choices=list(COLUNAS))
+        parser.add_argument('--formato', choices=list(GERADORES), default='csv')
+        parser.add_argument('--gzip', action='store_true', help='Comprime a saída em gzip')
+        parser.add_argument('--saida', help='Arquivo de destino (padrão: saída padrão)')
+        parser.add_argument(
+            '--filtro',
+            action='append',
+            default=[],
+            metavar='PARAMETRO=VALOR',
+            help='Filtro de tarefas, como na listagem (ex.: --filtro status=pendente); pode repetir',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            parametros = dict(filtro.split('=', 1) for filtro in options['filtro'])
+        except ValueError:
+            raise CommandError('Use --filtro PARAMETRO=VALOR')
+        try:
+            conteudo = exportar(options['modelo'], options['formato'], options['gzip'], parametros)
+        except ExportacaoInvalida as erro:
+            raise CommandError(str(erro))
+        except ValidationError as erro:
+            # Cada parâmetro traz uma mensagem só (str) ou uma lista delas
+            raise CommandError('; '.join(
+                f'{parametro}: {mensagens if isinstance(mensagens, str) else " ".join(map(str, mensagens))}'
+                for parametro, mensagens in erro.detail.items()
+            ))
+
+        destino = open(options['saida'], 'wb') if options['saida'] else sys.stdout.buffer
+        try:
+            for parte in conteudo:
+                destino.write(parte)
+        finally:
+            if options['saida']:
+                destino.close()
+            else:
+                destino.flush()
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tarefas.models import RegistroExclusao
+from tarefas.sincronizacao import RETENCAO
+
+
+class Command(BaseCommand):
+    help = (
+        'Apaga os registros de exclusão mais antigos que a retenção da sincronização incremental '
+        f'({RETENCAO.days} dias); cursores mais antigos que isso já recebem 410'
+    )
+
+    def handle(self, *args, **options):
+        removidos, _ = RegistroExclusao.objects.filter(data_exclusao__lt=timezone.now() - RETENCAO).delete()
+        self.stdout.write(self.style.SUCCESS(f'{removidos} registro(s) de exclusão removido(s)'))
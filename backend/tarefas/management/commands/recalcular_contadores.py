@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tarefas.models import CONTADORES_POR_STATUS, Projeto
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói (ou apenas verifica) os contadores de tarefas por status de cada projeto'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Só compara os contadores com a tabela de tarefas, sem alterar nada',
+        )
+        parser.add_argument('--projeto', type=int, action='append', help='Restringe a um ou mais projetos')
+
+    def handle(self, *args, **options):
+        projetos = Projeto.objects.all()
+        if options['projeto']:
+            projetos = projetos.filter(pk__in=options['projeto'])
+
+        if options['verificar']:
+            divergentes = list(projetos.divergencias())
+            for projeto, esperado in divergentes:
+                atual = {campo: getattr(projeto, campo) for campo in CONTADORES_POR_STATUS.values()}
+                self.stdout.write(f'Projeto {projeto.pk}: gravado {atual}, esperado {esperado}')
+            if divergentes:
+                raise CommandError(f'{len(divergentes)} projeto(s) com contadores divergentes')
+            self.stdout.write(self.style.SUCCESS('Contadores consistentes'))
+            return
+
+        corrigidos = projetos.recalcular_contadores()
+        self.stdout.write(self.style.SUCCESS(f'{len(corrigidos)} projeto(s) corrigido(s)'))
@@ -0,0 +1,154 @@
+import asyncio
+import time
+import tracemalloc
+import urllib.request
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tarefas.eventos import JANELA, broker
+
+
+def _percentis(valores):
+    valores = sorted(valores)
+    if not valores:
+        return 'sem amostras'
+    p50 = valores[len(valores) // 2] * 1000
+    p99 = valores[min(len(valores) - 1, int(len(valores) * 0.99))] * 1000
+    return f'p50={p50:.1f}ms p99={p99:.1f}ms'
+
+
+class Command(BaseCommand):
+    help = (
+        'Teste de carga do push de eventos: milhares de assinantes ociosos e alguns ativos. '
+        'Sem --url, exercita o broker em processo; com --url, abre conexões SSE reais contra '
+        'um servidor ASGI em execução.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--assinantes', type=int, default=5000, help='Assinantes ociosos (outros canais)')
+        parser.add_argument('--ativos', type=int, default=100, help='Assinantes do canal que recebe os eventos')
+        parser.add_argument('--eventos', type=int, default=1000)
+        parser.add_argument('--url', help='Base do servidor ASGI, ex.: http://localhost:8000')
+        parser.add_argument('--token', help='Token de autenticação (modo --url)')
+        parser.add_argument('--projeto', type=int, help='Projeto assinado pelos ativos (modo --url)')
+        parser.add_argument('--tarefa', type=int, help='Tarefa do projeto cujo status é alternado (modo --url)')
+
+    def handle(self, *args, **options):
+        if options['url']:
+            if not (options['token'] and options['projeto'] and options['tarefa']):
+                raise CommandError('O modo --url exige --token, --projeto e --tarefa')
+            asyncio.run(self.carga_http(options))
+        else:
+            asyncio.run(self.carga_em_processo(options))
+
+    async def carga_em_processo(self, options):
+        tracemalloc.start()
+        memoria_antes = tracemalloc.get_traced_memory()[0]
+        ociosos = [
+            broker.assinar({f'projeto:{1000 + i % 997}', f'usuario:{1000 + i}'})
+            for i in range(options['assinantes'])
+        ]
+        ativos = [broker.assinar({'projeto:0'}) for _ in range(options['ativos'])]
+        espera_ociosos = [asyncio.ensure_future(a.proximos()) for a in ociosos]
+        memoria = (tracemalloc.get_traced_memory()[0] - memoria_antes) / len(ociosos) if ociosos else 0
+        tracemalloc.stop()
+        self.stdout.write(f'{broker.total_assinaturas()} assinaturas, ~{memoria:,.0f} bytes por assinante ocioso')
+
+        enviados = {}
+        latencias, recebidos = [], 0
+
+        async def consumir(assinatura):
+            nonlocal recebidos
+            while True:
+                for evento in await assinatura.proximos():
+                    recebidos += 1
+                    latencias.append(time.perf_counter() - enviados[evento['id']])
+
+        consumidores = [asyncio.ensure_future(consumir(a)) for a in ativos]
+
+        def publicar():
+            for i in range(options['eventos']):
+                enviados[i % 50] = time.perf_counter()
+                broker.publicar([{
+                    'canais': {'projeto:0'},
+                    'dados': {'tipo': 'alterada', 'id': i % 50, 'projeto': 0, 'status': 'pendente', 'atribuido_a': None},
+                }])
+                time.sleep(0.001)
+
+        inicio = time.perf_counter()
+        await asyncio.to_thread(publicar)
+        duracao = time.perf_counter() - inicio
+        await asyncio.sleep(JANELA * 3)
+        for tarefa in consumidores + espera_ociosos:
+            tarefa.cancel()
+        for assinatura in ociosos + ativos:
+            broker.cancelar(assinatura)
+
+        entregas = options['eventos'] * options['ativos']
+        self.stdout.write(
+            f'{options["eventos"]} eventos em {duracao:.2f}s ({options["eventos"] / duracao:,.0f}/s); '
+            f'{recebidos:,} entregas para {entregas:,} publicações '
+            f'({1 - recebidos / entregas:.0%} coalescidas); latência {_percentis(latencias)}'
+        )
+
+    async def carga_http(self, options):
+        partes = urlsplit(options['url'])
+        host, porta = partes.hostname, partes.port or 80
+        caminho = '/api/eventos/?'
+
+        async def conectar(parametros):
+            leitor, escritor = await asyncio.open_connection(host, porta)
+            escritor.write(
+                f'GET {caminho}{urlencode(parametros)} HTTP/1.1\r\nHost: {host}\r\n'
+                f'Authorization: Token {options["token"]}\r\nAccept: text/event-stream\r\n\r\n'.encode()
+            )
+            await escritor.drain()
+            status = await leitor.readline()
+            if b' 200 ' not in status:
+                raise CommandError(f'Resposta inesperada: {status!r}')
+            while (await leitor.readline()) not in (b'\r\n', b''):
+                pass
+            return leitor, escritor
+
+        inicio = time.perf_counter()
+        resultados = await asyncio.gather(
+            *[conectar({'projeto': 10 ** 9 + i}) for i in range(options['assinantes'])],
+            *[conectar({'projeto': options['projeto']}) for _ in range(options['ativos'])],
+            return_exceptions=True,
+        )
+        falhas = [r for r in resultados if isinstance(r, BaseException)]
+        conexoes = [r for r in resultados if not isinstance(r, BaseException)]
+        self.stdout.write(
+            f'{len(conexoes)} conexões abertas em {time.perf_counter() - inicio:.1f}s, {len(falhas)} falha(s)'
+        )
+        ativos = conexoes[-options['ativos']:] if len(conexoes) > options['assinantes'] else []
+
+        latencias = []
+
+        async def aguardar_evento(leitor, enviado):
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    return
+                if linha.startswith(b'event: '):
+                    latencias.append(time.perf_counter() - enviado)
+                    return
+
+        def mudar_status(status):
+            requisicao = urllib.request.Request(
+                f'{options["url"]}/api/tarefas/{options["tarefa"]}/mudar_status/',
+                data=urlencode({'status': status}).encode(),
+                headers={'Authorization': f'Token {options["token"]}'},
+            )
+            urllib.request.urlopen(requisicao).read()
+
+        # Alterna o status: mudar para o status atual não gera evento
+        for i in range(max(1, options['eventos'] // 100)):
+            enviado = time.perf_counter()
+            espera = [asyncio.ensure_future(aguardar_evento(leitor, enviado)) for leitor, _ in ativos]
+            await asyncio.to_thread(mudar_status, ['em_progresso', 'pendente'][i % 2])
+            await asyncio.wait(espera, timeout=5)
+        for _, escritor in conexoes:
+            escritor.close()
+        self.stdout.write(f'{len(latencias)} eventos recebidos pelos ativos; latência {_percentis(latencias)}')
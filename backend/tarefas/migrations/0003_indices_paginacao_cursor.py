@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0002_indices_tarefa'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tarefa',
+            name='tarefa_data_criacao_idx',
+        ),
+        migrations.AddIndex(
+            model_name='projeto',
+            index=models.Index(fields=['data_criacao', 'id'], name='projeto_criacao_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['data_criacao', 'id'], name='tarefa_criacao_id_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:11
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0003_indices_paginacao_cursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistroExclusao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('modelo', models.CharField(choices=[('tarefa', 'Tarefa'), ('projeto', 'Projeto')], max_length=20)),
+                ('objeto_id', models.BigIntegerField()),
+                ('data_exclusao', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Registro de exclusão',
+                'verbose_name_plural': 'Registros de exclusão',
+            },
+        ),
+        migrations.AddField(
+            model_name='projeto',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tarefa',
+            name='data_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='projeto',
+            index=models.Index(fields=['data_atualizacao', 'id'], name='projeto_atualizacao_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['data_atualizacao', 'id'], name='tarefa_atualizacao_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroexclusao',
+            index=models.Index(fields=['modelo', 'data_exclusao', 'id'], name='exclusao_modelo_data_id_idx'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Busca textual (tarefas.filtros.buscar): coluna tsvector gerada com índice GIN, só no
+# PostgreSQL. Fora do modelo, para os outros bancos (testes) seguirem sem ela.
+def criar_busca(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        "ALTER TABLE tarefas_tarefa ADD COLUMN busca tsvector GENERATED ALWAYS AS ("
+        "to_tsvector('portuguese'::regconfig, coalesce(titulo, '') || ' ' || coalesce(descricao, ''))"
+        ") STORED"
+    )
+    schema_editor.execute('CREATE INDEX tarefa_busca_idx ON tarefas_tarefa USING gin (busca)')
+
+
+def remover_busca(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE tarefas_tarefa DROP COLUMN busca')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0004_sincronizacao_incremental'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tarefa',
+            name='tarefa_projeto_status_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='tarefa',
+            name='tarefa_atribuido_status_idx',
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['projeto', 'status', 'data_criacao', 'id'], name='tarefa_projeto_status_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(condition=models.Q(('atribuido_a__isnull', False)), fields=['atribuido_a', 'status', 'data_criacao', 'id'], name='tarefa_atrib_status_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['status', 'data_criacao', 'id'], name='tarefa_status_data_idx'),
+        ),
+        migrations.RunPython(criar_busca, remover_busca),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0005_filtros_busca'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AtualizacaoResumo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('marca', models.DateTimeField()),
+                ('dias', models.PositiveIntegerField()),
+                ('data_execucao', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Atualização de resumos',
+                'verbose_name_plural': 'Atualizações de resumos',
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dia', models.DateField()),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('em_progresso', 'Em Progresso'), ('concluída', 'Concluída')], max_length=20)),
+                ('quantidade', models.PositiveIntegerField()),
+                ('atribuido_a', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('projeto', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='resumos_diarios', to='tarefas.projeto')),
+            ],
+            options={
+                'verbose_name': 'Resumo diário',
+                'verbose_name_plural': 'Resumos diários',
+                'indexes': [models.Index(fields=['dia'], name='resumo_dia_idx'), models.Index(fields=['projeto', 'dia'], name='resumo_projeto_dia_idx'), models.Index(condition=models.Q(('atribuido_a__isnull', False)), fields=['atribuido_a'], name='resumo_atribuido_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0006_resumo_diario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='registroexclusao',
+            name='dia_criacao',
+            field=models.DateField(blank=True, null=True),
+        ),
+    ]
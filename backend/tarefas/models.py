@@ -1,5 +1,247 @@
-from django.db import models
+from collections import Counter, defaultdict
+
+from django.db import models, router, transaction
+from django.db.models import Case, Count, F, Q, Value, When
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+from .cache_respostas import PROJETO, TAREFA, invalidar
+from .eventos import broker, publicar_tarefas
+
+
+# Contadores materializados em Projeto para cada status de Tarefa
+CONTADORES_POR_STATUS = {
+    'pendente': 'tarefas_pendentes',
+    'em_progresso': 'tarefas_em_progresso',
+    'concluída': 'tarefas_concluidas',
+}
+
+
+def _com_data_atualizacao(kwargs):
+    """
+    O auto_now de data_atualizacao não vale para QuerySet.update() nem para
+    save(update_fields=...) que não o inclua: acrescenta o campo nesses casos.
+    """
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and 'data_atualizacao' not in update_fields:
+        kwargs['update_fields'] = [*update_fields, 'data_atualizacao']
+    return kwargs
+
+
+def _sem_contadores(instancia, kwargs):
+    """
+    Os contadores só mudam por UPDATE relativo (ajustar_contadores): um save()
+    de uma instância carregada antes não pode sobrescrevê-los com valores
+    velhos. Tira-os de update_fields, ou lista os demais campos quando o
+    save() gravaria todos. A inserção grava os valores iniciais.
+    """
+    if instancia._state.adding or kwargs.get('force_insert'):
+        return kwargs
+    contadores = set(CONTADORES_POR_STATUS.values())
+    update_fields = kwargs.get('update_fields')
+    if update_fields is None:
+        update_fields = [campo.name for campo in instancia._meta.concrete_fields if not campo.primary_key]
+    kwargs['update_fields'] = [campo for campo in update_fields if campo not in contadores]
+    return kwargs
+
+
+class ProjetoQuerySet(models.QuerySet):
+    def com_progresso(self):
+        """Anota o progresso a partir dos contadores, sem varrer as tarefas."""
+        return self.annotate(
+            total_tarefas=F('tarefas_pendentes') + F('tarefas_em_progresso') + F('tarefas_concluidas'),
+            concluidas=F('tarefas_concluidas'),
+            pendentes=F('tarefas_pendentes'),
+            em_progresso=F('tarefas_em_progresso'),
+        )
+
+    def visiveis_para(self, usuario_id):
+        """Projetos de que o usuário é proprietário ou em que tem tarefas atribuídas."""
+        return self.filter(Q(proprietario_id=usuario_id) | Q(tarefas__atribuido_a_id=usuario_id)).distinct()
+
+    def ajustar_contadores(self, deltas):
+        """Aplica deltas {(projeto_id, status): n} com um único UPDATE."""
+        por_campo = defaultdict(dict)
+        for (projeto_id, status), delta in deltas.items():
+            if delta and status in CONTADORES_POR_STATUS:
+                campo = CONTADORES_POR_STATUS[status]
+                por_campo[campo][projeto_id] = por_campo[campo].get(projeto_id, 0) + delta
+        if not por_campo:
+            return
+        ids = set()
+        atualizacoes = {}
+        for campo, por_projeto in por_campo.items():
+            ids.update(por_projeto)
+            atualizacoes[campo] = F(campo) + Case(
+                *[When(pk=pk, then=Value(delta)) for pk, delta in por_projeto.items()],
+                default=Value(0),
+            )
+        self.filter(pk__in=ids).update(**atualizacoes)
+
+    def divergencias(self):
+        """Gera (projeto, contadores esperados) dos projetos com contadores incorretos."""
+        campos = list(CONTADORES_POR_STATUS.values())
+        projetos = self.order_by('pk').only('pk', *campos)
+        reais = defaultdict(dict)
+        contagens = (
+            Tarefa.objects.using(self.db).filter(projeto__in=self.values('pk'))
+            .values('projeto_id', 'status')
+            .annotate(n=Count('id'))
+            .order_by()
+        )
+        for linha in contagens:
+            if linha['status'] in CONTADORES_POR_STATUS:
+                reais[linha['projeto_id']][CONTADORES_POR_STATUS[linha['status']]] = linha['n']
+        for projeto in projetos.iterator(chunk_size=2000):
+            esperado = {campo: reais[projeto.pk].get(campo, 0) for campo in campos}
+            if any(getattr(projeto, campo) != valor for campo, valor in esperado.items()):
+                yield projeto, esperado
+
+    def recalcular_contadores(self):
+        """Reconstrói os contadores a partir da tabela de tarefas; devolve os projetos corrigidos."""
+        with transaction.atomic(using=self.db):
+            # Trava os projetos antes de contar para serializar com as escritas em Tarefa
+            list(self.select_for_update().values_list('pk', flat=True))
+            corrigidos = []
+            for projeto, esperado in self.divergencias():
+                for campo, valor in esperado.items():
+                    setattr(projeto, campo, valor)
+                corrigidos.append(projeto)
+            self.bulk_update(corrigidos, list(CONTADORES_POR_STATUS.values()), batch_size=1000)
+        return corrigidos
+
+    # Escritas em massa não disparam sinais: invalidam o cache de respostas aqui.
+    # bulk_update() e ajustar_contadores() passam por update().
+    def bulk_create(self, objs, *args, **kwargs):
+        criados = super().bulk_create(objs, *args, **kwargs)
+        invalidar(PROJETO, using=self.db)
+        return criados
+
+    def update(self, **kwargs):
+        # Os contadores não fazem parte da representação do projeto: não contam como alteração
+        if set(kwargs) - set(CONTADORES_POR_STATUS.values()):
+            kwargs.setdefault('data_atualizacao', timezone.now())
+        atualizadas = super().update(**kwargs)
+        invalidar(PROJETO, using=self.db)
+        return atualizadas
+
+    update.alters_data = True
+
+    def delete(self):
+        resultado = super().delete()
+        invalidar(PROJETO, TAREFA, using=self.db)
+        return resultado
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+def _novo_estado(kwargs, antigo):
+    """(projeto_id, status, atribuido_a_id) de uma linha depois de update(**kwargs) com valores simples."""
+    projeto_id, status, atribuido_a_id = antigo
+    for nome in ('projeto', 'projeto_id'):
+        if nome in kwargs:
+            projeto_id = getattr(kwargs[nome], 'pk', kwargs[nome])
+    for nome in ('atribuido_a', 'atribuido_a_id'):
+        if nome in kwargs:
+            atribuido_a_id = getattr(kwargs[nome], 'pk', kwargs[nome])
+    return projeto_id, kwargs.get('status', status), atribuido_a_id
+
+
+def _diferenca(antes, depois):
+    deltas = Counter(depois)
+    deltas.subtract(antes)
+    return deltas
+
+
+class TarefaQuerySet(models.QuerySet):
+    """
+    Mantém os contadores de Projeto em dia para as operações em massa, que não
+    passam por Tarefa.save()/delete(). bulk_update() é coberto por update().
+    """
+
+    CAMPOS_RASTREADOS = {'status', 'projeto', 'projeto_id'}
+    # Também geram eventos de tarefa (tarefas.eventos), mas não mexem nos contadores
+    CAMPOS_EVENTOS = {'atribuido_a', 'atribuido_a_id'}
+
+    def _estados_bloqueados(self, *extras):
+        """(pk, projeto_id, status, atribuido_a_id, *extras) das linhas, travadas até o fim da transação."""
+        return list(
+            self.select_for_update(of=('self',)).values_list('pk', 'projeto_id', 'status', 'atribuido_a_id', *extras)
+        )
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            criados = super().bulk_create(objs, *args, **kwargs)
+            if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+                # Não há como saber quais linhas entraram: recalcula os projetos envolvidos
+                Projeto.objects.filter(pk__in={obj.projeto_id for obj in objs}).recalcular_contadores()
+            else:
+                Projeto.objects.ajustar_contadores(Counter((obj.projeto_id, obj.status) for obj in objs))
+                publicar_tarefas(
+                    [('criada', obj.pk, None, (obj.projeto_id, obj.status, obj.atribuido_a_id)) for obj in objs],
+                    using=self.db,
+                )
+            invalidar(TAREFA, using=self.db)
+        return criados
+
+    def update(self, **kwargs):
+        """
+        Sem campos rastreados, um UPDATE só. Com eles, três comandos na mesma
+        transação, qualquer que seja o número de linhas: SELECT ... FOR UPDATE
+        do estado anterior, o UPDATE das tarefas e o UPDATE dos contadores
+        (mais um SELECT do estado novo quando os valores são expressões).
+        """
+        kwargs.setdefault('data_atualizacao', timezone.now())
+        campos = set(kwargs)
+        rastrear = self.CAMPOS_RASTREADOS & campos or (self.CAMPOS_EVENTOS & campos and broker.tem_assinantes())
+        if not rastrear:
+            atualizadas = super().update(**kwargs)
+            invalidar(TAREFA, using=self.db)
+            return atualizadas
+        with transaction.atomic(using=self.db):
+            estados = self._estados_bloqueados()
+            atualizadas = super().update(**kwargs)
+            rastreados = (self.CAMPOS_RASTREADOS | self.CAMPOS_EVENTOS) & campos
+            if any(hasattr(kwargs[campo], 'resolve_expression') for campo in rastreados):
+                novos = dict(
+                    (pk, (projeto_id, status, atribuido_a_id))
+                    for pk, projeto_id, status, atribuido_a_id in Tarefa.objects.filter(
+                        pk__in=[pk for pk, *_ in estados]
+                    ).values_list('pk', 'projeto_id', 'status', 'atribuido_a_id')
+                )
+            else:
+                novos = {pk: _novo_estado(kwargs, antigo) for pk, *antigo in estados}
+            anteriores = {pk: tuple(antigo) for pk, *antigo in estados}
+            Projeto.objects.ajustar_contadores(_diferenca(
+                [estado[:2] for estado in anteriores.values()], [estado[:2] for estado in novos.values()]
+            ))
+            publicar_tarefas(
+                [('alterada', pk, anteriores[pk], novo) for pk, novo in novos.items()], using=self.db
+            )
+            invalidar(TAREFA, using=self.db)
+        return atualizadas
+
+    update.alters_data = True
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            estados = self._estados_bloqueados('data_criacao')
+            resultado = super().delete()
+            Projeto.objects.ajustar_contadores(
+                _diferenca([(projeto_id, status) for _, projeto_id, status, _, _ in estados], [])
+            )
+            RegistroExclusao.registrar(
+                'tarefa', [pk for pk, *_ in estados], using=self.db,
+                criadas_em={pk: data_criacao for pk, *_, data_criacao in estados},
+            )
+            publicar_tarefas([('removida', pk, tuple(antigo), None) for pk, *antigo, _ in estados], using=self.db)
+            invalidar(TAREFA, using=self.db)
+        return resultado
+
+    delete.alters_data = True
+    delete.queryset_only = True
 
 
 class Projeto(models.Model):
@@ -7,13 +249,36 @@ class Projeto(models.Model):
     descricao = models.TextField()
     data_criacao = models.DateTimeField(auto_now_add=True)
     proprietario = models.ForeignKey(User, on_delete=models.CASCADE)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+    tarefas_pendentes = models.IntegerField(default=0, editable=False)
+    tarefas_em_progresso = models.IntegerField(default=0, editable=False)
+    tarefas_concluidas = models.IntegerField(default=0, editable=False)
+
+    objects = ProjetoQuerySet.as_manager()
 
     def __str__(self):
         return self.nome
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **_com_data_atualizacao(_sem_contadores(self, kwargs)))
+
+    def resumo_progresso(self):
+        return {
+            "total_tarefas": self.tarefas_pendentes + self.tarefas_em_progresso + self.tarefas_concluidas,
+            "concluidas": self.tarefas_concluidas,
+            "pendentes": self.tarefas_pendentes,
+            "em_progresso": self.tarefas_em_progresso,
+        }
+
     class Meta:
         verbose_name = "Projeto"
         verbose_name_plural = "Projetos"
+        indexes = [
+            # ordenação estável da paginação por cursor
+            models.Index(fields=['data_criacao', 'id'], name='projeto_criacao_id_idx'),
+            # sincronização incremental (alteracoes?desde=)
+            models.Index(fields=['data_atualizacao', 'id'], name='projeto_atualizacao_id_idx'),
+        ]
 
 
 class Tarefa(models.Model):
@@ -28,18 +293,179 @@ class Tarefa(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pendente')
     data_criacao = models.DateTimeField(auto_now_add=True)
     data_conclusao = models.DateTimeField(null=True, blank=True)
-    projeto = models.ForeignKey(Projeto, related_name='tarefas', on_delete=models.CASCADE)
+    data_atualizacao = models.DateTimeField(auto_now=True)
+    # Os índices compostos de Meta.indexes já começam pelas FKs e substituem os implícitos
+    projeto = models.ForeignKey(Projeto, related_name='tarefas', on_delete=models.CASCADE, db_index=False)
     atribuido_a = models.ForeignKey(
         User, 
         null=True, 
         blank=True, 
         related_name='tarefas_atribuidas', 
-        on_delete=models.SET_NULL
+        on_delete=models.SET_NULL,
+        db_index=False,
     )
 
+    objects = TarefaQuerySet.as_manager()
+
     def __str__(self):
         return self.titulo
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        campos = set(update_fields) if update_fields is not None else None
+        _com_data_atualizacao(kwargs)
+        if campos is not None and not (
+            TarefaQuerySet.CAMPOS_RASTREADOS & campos
+            or (TarefaQuerySet.CAMPOS_EVENTOS & campos and broker.tem_assinantes())
+        ):
+            return super().save(*args, **kwargs)
+        using = kwargs.get('using') or router.db_for_write(Tarefa, instance=self)
+        with transaction.atomic(using=using):
+            anterior = None
+            if not self._state.adding:
+                # Lê o estado gravado (e não o carregado) para não errar sob concorrência
+                anterior = (
+                    Tarefa.objects.using(using).select_for_update()
+                    .filter(pk=self.pk).values_list('projeto_id', 'status', 'atribuido_a_id').first()
+                )
+            super().save(*args, **kwargs)
+            estado = [self.projeto_id, self.status, self.atribuido_a_id]
+            if anterior is not None and campos is not None:
+                # Campos fora de update_fields continuam com o valor gravado
+                grupos = [{'projeto', 'projeto_id'}, {'status'}, TarefaQuerySet.CAMPOS_EVENTOS]
+                for indice, nomes in enumerate(grupos):
+                    if not nomes & campos:
+                        estado[indice] = anterior[indice]
+            estado = tuple(estado)
+            Projeto.objects.using(using).ajustar_contadores(
+                _diferenca([anterior[:2]] if anterior else [], [estado[:2]])
+            )
+            publicar_tarefas([('alterada' if anterior else 'criada', self.pk, anterior, estado)], using=using)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(Tarefa, instance=self)
+        with transaction.atomic(using=using):
+            linha = (
+                Tarefa.objects.using(using).select_for_update()
+                .filter(pk=self.pk).values_list('projeto_id', 'status', 'atribuido_a_id', 'data_criacao').first()
+            )
+            anterior = linha[:3] if linha else None
+            pk = self.pk
+            resultado = super().delete(*args, **kwargs)
+            if anterior:
+                Projeto.objects.using(using).ajustar_contadores(_diferenca([anterior[:2]], []))
+                RegistroExclusao.registrar('tarefa', [pk], using=using, criadas_em={pk: linha[3]})
+                publicar_tarefas([('removida', pk, anterior, None)], using=using)
+            # Sem receptor de post_delete em Tarefa, para o Django seguir apagando em massa sem carregar as linhas
+            invalidar(TAREFA, using=using)
+        return resultado
+
     class Meta:
         verbose_name = "Tarefa"
         verbose_name_plural = "Tarefas"
+        indexes = [
+            # Os filtros de tarefas.filtros: colunas filtradas + a ordenação padrão (data_criacao, id),
+            # para uma página ser um intervalo do índice. Também servem os resumos por status.
+            models.Index(fields=['projeto', 'status', 'data_criacao', 'id'], name='tarefa_projeto_status_data_idx'),
+            # tarefas_por_usuario e ?atribuido_a=; tarefas sem responsável ficam fora do índice
+            models.Index(
+                fields=['atribuido_a', 'status', 'data_criacao', 'id'],
+                name='tarefa_atrib_status_data_idx',
+                condition=Q(atribuido_a__isnull=False),
+            ),
+            models.Index(fields=['status', 'data_criacao', 'id'], name='tarefa_status_data_idx'),
+            # ordenação estável da paginação por cursor
+            models.Index(fields=['data_criacao', 'id'], name='tarefa_criacao_id_idx'),
+            models.Index(
+                fields=['data_conclusao'],
+                name='tarefa_data_conclusao_idx',
+                condition=Q(data_conclusao__isnull=False),
+            ),
+            # sincronização incremental (alteracoes?desde=)
+            models.Index(fields=['data_atualizacao', 'id'], name='tarefa_atualizacao_id_idx'),
+        ]
+
+
+class RegistroExclusao(models.Model):
+    """Marca (tombstone) de uma tarefa ou projeto excluído, lida pela sincronização incremental."""
+
+    MODELOS = [
+        ("tarefa", "Tarefa"),
+        ("projeto", "Projeto"),
+    ]
+
+    modelo = models.CharField(max_length=20, choices=MODELOS)
+    objeto_id = models.BigIntegerField()
+    data_exclusao = models.DateTimeField(default=timezone.now)
+    # Dia (no fuso local) em que a tarefa excluída foi criada: o dia a recalcular no ResumoDiario
+    dia_criacao = models.DateField(null=True, blank=True)
+
+    @classmethod
+    def registrar(cls, modelo, ids, using=None, criadas_em=None):
+        """`criadas_em`, opcional, leva o pk de cada tarefa à data_criacao dela."""
+        agora = timezone.now()
+        criadas_em = criadas_em or {}
+        cls.objects.using(using).bulk_create(
+            [
+                cls(
+                    modelo=modelo, objeto_id=pk, data_exclusao=agora,
+                    dia_criacao=timezone.localdate(criadas_em[pk]) if pk in criadas_em else None,
+                )
+                for pk in ids
+            ],
+            batch_size=1000,
+        )
+
+    def __str__(self):
+        return f'{self.modelo} {self.objeto_id}'
+
+    class Meta:
+        verbose_name = "Registro de exclusão"
+        verbose_name_plural = "Registros de exclusão"
+        indexes = [
+            models.Index(fields=['modelo', 'data_exclusao', 'id'], name='exclusao_modelo_data_id_idx'),
+        ]
+
+
+class ResumoDiario(models.Model):
+    """
+    Tarefas criadas em cada dia, por projeto, status e responsável: um agregado
+    para relatórios, atualizado de forma incremental pelo comando atualizar_resumos
+    (ver tarefas.resumos). Reflete as tarefas até a última execução do comando.
+    """
+
+    dia = models.DateField()
+    projeto = models.ForeignKey(Projeto, related_name='resumos_diarios', on_delete=models.CASCADE, db_index=False)
+    status = models.CharField(max_length=20, choices=Tarefa.STATUS_CHOICES)
+    atribuido_a = models.ForeignKey(
+        User, null=True, blank=True, related_name='+', on_delete=models.CASCADE, db_index=False
+    )
+    quantidade = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f'{self.dia} {self.projeto_id} {self.status}: {self.quantidade}'
+
+    class Meta:
+        verbose_name = "Resumo diário"
+        verbose_name_plural = "Resumos diários"
+        indexes = [
+            # recálculo de dias inteiros e relatórios por período
+            models.Index(fields=['dia'], name='resumo_dia_idx'),
+            models.Index(fields=['projeto', 'dia'], name='resumo_projeto_dia_idx'),
+            # apagar um usuário remove as linhas dele (o recálculo seguinte as refaz sem responsável)
+            models.Index(
+                fields=['atribuido_a'], name='resumo_atribuido_idx', condition=Q(atribuido_a__isnull=False)
+            ),
+        ]
+
+
+class AtualizacaoResumo(models.Model):
+    """Execuções de atualizar_resumos; `marca` é o ponto de partida da execução seguinte."""
+
+    marca = models.DateTimeField()
+    dias = models.PositiveIntegerField()
+    data_execucao = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Atualização de resumos"
+        verbose_name_plural = "Atualizações de resumos"
@@ -0,0 +1,44 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class PaginacaoCursor(CursorPagination):
+    """
+    Paginação por keyset em (data_criacao, id): cada página é um
+    `WHERE data_criacao > <posição> ORDER BY data_criacao, id LIMIT n`
+    servido pelo índice, sem COUNT(*) nem OFFSET crescente.
+    """
+    ordering = ('data_criacao', 'id')
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+
+class PaginacaoHibrida(PageNumberPagination):
+    """
+    Mantém a paginação por número de página por padrão e passa para a de cursor
+    quando o cliente pede `?paginacao=cursor` ou já envia um `?cursor=`.
+    """
+    modo_query_param = 'paginacao'
+    classe_cursor = PaginacaoCursor
+
+    def usa_cursor(self, request):
+        return (
+            request.query_params.get(self.modo_query_param) == 'cursor'
+            or self.classe_cursor.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginacao_cursor = self.classe_cursor() if self.usa_cursor(request) else None
+        if self.paginacao_cursor is not None:
+            return self.paginacao_cursor.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.paginacao_cursor is not None:
+            return self.paginacao_cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            super().get_schema_operation_parameters(view)
+            + self.classe_cursor().get_schema_operation_parameters(view)
+        )
@@ -0,0 +1,70 @@
+"""
+Renderer e parser JSON baseados no orjson, com datetime nativo. Se o orjson não
+estiver instalado, ou se a resposta pedir indentação/separadores que ele não
+produz, caem no comportamento padrão do DRF.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependência opcional
+    orjson = None
+
+OPCOES_ORJSON = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+_codificador_drf = JSONEncoder()
+
+
+def _padrao(objeto):
+    # Tipos que o orjson não conhece (Decimal, strings lazy, QuerySet...) seguem o encoder do DRF
+    return _codificador_drf.default(objeto)
+
+
+def _escapar_separadores(conteudo):
+    # Mesmo escape do JSONRenderer: \u2028/\u2029 quebram JSON embutido em JavaScript
+    if b'\xe2\x80\xa8' in conteudo or b'\xe2\x80\xa9' in conteudo:
+        conteudo = conteudo.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return conteudo
+
+
+def codificar(dados):
+    """JSON compacto em bytes, com o orjson quando disponível."""
+    if orjson is None:
+        return JSONRenderer().render(dados)
+    return _escapar_separadores(orjson.dumps(dados, default=_padrao, option=OPCOES_ORJSON))
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """
+    Mesma saída do JSONRenderer em modo compacto (`COMPACT_JSON`, padrão do DRF),
+    codificada pelo orjson. Com COMPACT_JSON desligado, ensure_ascii ligado ou
+    indentação pedida (API navegável, `; indent=`), usa o JSONRenderer padrão.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        usar_padrao = (
+            orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        )
+        if usar_padrao:
+            return super().render(data, accepted_media_type, renderer_context)
+        return _escapar_separadores(orjson.dumps(data, default=_padrao, option=OPCOES_ORJSON))
+
+
+class JSONRapidoParser(JSONParser):
+    renderer_class = JSONRapidoRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
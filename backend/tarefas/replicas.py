@@ -0,0 +1,146 @@
+"""
+Leituras em réplicas do banco.
+
+O middleware `middleware_replicas` libera, só nas requisições GET/HEAD/OPTIONS,
+o envio das leituras para uma das réplicas de settings.REPLICAS_LEITURA
+(listagens, detalhes, relatórios e as demais ações GET). Todo o resto fica no
+primário `default`:
+  - escritas, e qualquer leitura feita depois de uma escrita na mesma
+    requisição (a primeira escrita fixa a requisição no primário);
+  - leituras dentro de transações abertas no primário;
+  - requisições do mesmo cliente que chegam até ATRASO_MAXIMO segundos depois
+    de uma escrita dele (ler as próprias escritas). O cliente é identificado
+    pelo cabeçalho Authorization, pelo cookie de sessão ou pelo IP, e a marca
+    da escrita fica no alias CACHE de settings.CACHES; com mais de um
+    processo, use um cache compartilhado. Os demais clientes continuam nas
+    réplicas e podem ver os dados com até ATRASO_MAXIMO de atraso.
+
+Como uma réplica pode estar atrasada, as respostas calculadas com leituras nela
+não entram no cache de respostas nem recebem ETag (ver `leu_de_replica`).
+
+Fora de requisições (comandos, shell), as leituras vão para o primário, a não
+ser dentro de `leituras_em_replica()`.
+"""
+import hashlib
+import random
+from asyncio import iscoroutinefunction
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+PADRAO = {
+    'REPLICAS': [],
+    # Atraso de replicação tolerado, em segundos
+    'ATRASO_MAXIMO': 5,
+    'CACHE': 'default',
+}
+
+METODOS_SEGUROS = {'GET', 'HEAD', 'OPTIONS'}
+PREFIXO_ESCRITA = 'replicas:escrita:'
+
+_em_replica = ContextVar('em_replica', default=False)
+# Cliente da requisição atual, a quem as escritas fixam no primário
+_cliente = ContextVar('cliente', default=None)
+# Alguma leitura desta requisição foi para uma réplica
+_leu_de_replica = ContextVar('leu_de_replica', default=False)
+
+
+def configuracao():
+    return {**PADRAO, **getattr(settings, 'REPLICAS_LEITURA', {})}
+
+
+def _resumir(credencial):
+    return hashlib.sha256(credencial.encode()).hexdigest()[:32]
+
+
+def identificar_cliente(request):
+    """Identificador opaco de quem fez a requisição: token, sessão ou, sem eles, o IP."""
+    return _resumir(
+        request.headers.get('Authorization')
+        or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        or request.META.get('REMOTE_ADDR', '')
+    )
+
+
+def cliente_do_token(chave):
+    """O identificador que as próximas requisições, com `Authorization: Token <chave>`, vão ter."""
+    return _resumir(f'Token {chave}')
+
+
+def registrar_escrita(cliente=None):
+    """
+    Mantém as leituras de `cliente` (por padrão, o da requisição atual) no
+    primário pelos próximos ATRASO_MAXIMO segundos.
+    """
+    config = configuracao()
+    if cliente is None:
+        cliente = _cliente.get()
+    if config['REPLICAS'] and cliente is not None:
+        caches[config['CACHE']].set(PREFIXO_ESCRITA + cliente, True, config['ATRASO_MAXIMO'])
+
+
+def escrita_recente(cliente):
+    if cliente is None:
+        return False
+    config = configuracao()
+    return caches[config['CACHE']].get(PREFIXO_ESCRITA + cliente) is not None
+
+
+def leu_de_replica():
+    return _leu_de_replica.get()
+
+
+@contextmanager
+def leituras_em_replica(permitir=True, cliente=None):
+    permitir = permitir and bool(configuracao()['REPLICAS']) and not escrita_recente(cliente)
+    marcas = (_em_replica.set(permitir), _cliente.set(cliente), _leu_de_replica.set(False))
+    try:
+        yield
+    finally:
+        for variavel, marca in zip((_em_replica, _cliente, _leu_de_replica), marcas):
+            variavel.reset(marca)
+
+
+@sync_and_async_middleware
+def middleware_replicas(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with leituras_em_replica(request.method in METODOS_SEGUROS, identificar_cliente(request)):
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with leituras_em_replica(request.method in METODOS_SEGUROS, identificar_cliente(request)):
+                return get_response(request)
+    return middleware
+
+
+class RoteadorReplicas:
+    def db_for_read(self, model, **hints):
+        replicas = configuracao()['REPLICAS']
+        if not _em_replica.get() or not replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # Explícito: sem isso, o Django seguiria o banco de onde a instância veio
+            return DEFAULT_DB_ALIAS
+        _leu_de_replica.set(True)
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # Leitura depois de escrita na mesma requisição precisa enxergar a escrita
+        if _em_replica.get():
+            _em_replica.set(False)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bancos = {DEFAULT_DB_ALIAS, *configuracao()['REPLICAS']}
+        if obj1._state.db in bancos and obj2._state.db in bancos:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # As réplicas recebem o schema pela replicação
+        if db in configuracao()['REPLICAS']:
+            return False
+        return None
@@ -0,0 +1,104 @@
+"""
+Atualização incremental de ResumoDiario (tarefas criadas por dia, projeto,
+status e responsável).
+
+Cada execução recalcula só os dias tocados desde a anterior: os dias de criação
+das tarefas com data_atualizacao depois da marca da última execução (recuada em
+MARGEM, como na sincronização incremental, para não perder transações em
+andamento), mais os dias de criação guardados nos registros de exclusão de
+tarefas feitos desde a marca. `divergencias` compara o resumo inteiro com a
+tabela de tarefas, só para verificação. Rode um comando por vez (ex.: de hora
+em hora pelo cron).
+"""
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .cache_respostas import RESUMO, invalidar
+from .models import AtualizacaoResumo, RegistroExclusao, ResumoDiario, Tarefa
+from .sincronizacao import MARGEM
+
+CHAVE = ('dia', 'projeto_id', 'status', 'atribuido_a_id')
+# Dias recalculados por transação
+DIAS_POR_LOTE = 31
+
+
+def _contagens(tarefas):
+    return (
+        tarefas.annotate(dia=TruncDate('data_criacao'))
+        .values(*CHAVE)
+        .annotate(quantidade=Count('id'))
+        .order_by()
+    )
+
+
+def _criadas_nos_dias(dias):
+    """Filtro por intervalos de data_criacao (usa o índice, ao contrário de data_criacao__date)."""
+    intervalos = Q()
+    for dia in dias:
+        inicio = timezone.make_aware(datetime.combine(dia, time.min))
+        intervalos |= Q(data_criacao__gte=inicio, data_criacao__lt=inicio + timedelta(days=1))
+    return Tarefa.objects.filter(intervalos)
+
+
+def recalcular_dias(dias):
+    """Refaz as linhas de ResumoDiario dos dias informados a partir da tabela de tarefas."""
+    dias = sorted(dias)
+    for inicio in range(0, len(dias), DIAS_POR_LOTE):
+        lote = dias[inicio:inicio + DIAS_POR_LOTE]
+        with transaction.atomic():
+            ResumoDiario.objects.filter(dia__in=lote).delete()
+            ResumoDiario.objects.bulk_create(
+                (ResumoDiario(**linha) for linha in _contagens(_criadas_nos_dias(lote))), batch_size=1000
+            )
+    if dias:
+        invalidar(RESUMO)
+
+
+def divergencias():
+    """{(dia, projeto_id, status, atribuido_a_id): (gravado, esperado)} das linhas que não conferem."""
+    esperado = {tuple(linha[c] for c in CHAVE): linha['quantidade'] for linha in _contagens(Tarefa.objects.all())}
+    gravado = {
+        tuple(linha[c] for c in CHAVE): linha['quantidade']
+        for linha in ResumoDiario.objects.values(*CHAVE).annotate(quantidade=Sum('quantidade')).order_by()
+    }
+    return {
+        chave: (gravado.get(chave, 0), esperado.get(chave, 0))
+        for chave in esperado.keys() | gravado.keys()
+        if gravado.get(chave, 0) != esperado.get(chave, 0)
+    }
+
+
+def dias_tocados(marca):
+    """Dias que mudaram desde `marca` (todos, se for None)."""
+    if marca is None:
+        return set(Tarefa.objects.dates('data_criacao', 'day'))
+    dias = set(
+        Tarefa.objects.filter(data_atualizacao__gt=marca)
+        .annotate(dia=TruncDate('data_criacao'))
+        .values_list('dia', flat=True)
+        .distinct()
+    )
+    # Exclusões não deixam data_atualizacao: o dia vem do registro de exclusão
+    dias |= set(
+        RegistroExclusao.objects.filter(modelo='tarefa', data_exclusao__gt=marca, dia_criacao__isnull=False)
+        .values_list('dia_criacao', flat=True)
+        .distinct()
+    )
+    return dias
+
+
+def atualizar(completo=False):
+    """Recalcula os dias tocados desde a última execução (ou todos) e devolve quantos foram."""
+    agora = timezone.now()
+    ultima = None if completo else AtualizacaoResumo.objects.order_by('-data_execucao', '-pk').first()
+    dias = dias_tocados(ultima.marca if ultima else None)
+    if completo:
+        # Dias que não têm mais tarefas também precisam sumir do resumo
+        dias |= set(ResumoDiario.objects.values_list('dia', flat=True).distinct())
+    recalcular_dias(dias)
+    AtualizacaoResumo.objects.create(marca=agora - MARGEM, dias=len(dias))
+    return len(dias)
@@ -2,23 +2,135 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Projeto, Tarefa
 
-class UserSerializer(serializers.ModelSerializer):
+
+def relacoes_aninhadas(serializer, prefixo=''):
+    """Percorre os serializers aninhados e devolve (select_related, prefetch_related)."""
+    select_related, prefetch_related = [], []
+    for campo in serializer.fields.values():
+        if isinstance(campo, serializers.ListSerializer):
+            caminho = prefixo + campo.source
+            prefetch_related.append(caminho)
+            aninhado = relacoes_aninhadas(campo.child, caminho + '__')
+            prefetch_related.extend(aninhado[0] + aninhado[1])
+        elif isinstance(campo, serializers.BaseSerializer):
+            caminho = prefixo + campo.source
+            select_related.append(caminho)
+            aninhado = relacoes_aninhadas(campo, caminho + '__')
+            select_related.extend(aninhado[0])
+            prefetch_related.extend(aninhado[1])
+    return select_related, prefetch_related
+
+
+class ConsultaOtimizadaMixin:
+    """Monta o queryset com os joins que a representação do serializer exige."""
+
+    @classmethod
+    def otimizar_queryset(cls, queryset, **kwargs):
+        select_related, prefetch_related = relacoes_aninhadas(cls(**kwargs))
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        return queryset
+
+
+def _dividir_caminhos(caminhos):
+    """['projeto.proprietario', 'atribuido_a'] -> {'projeto': ['proprietario'], 'atribuido_a': []}"""
+    arvore = {}
+    for caminho in caminhos:
+        nome, _, resto = caminho.partition('.')
+        filhos = arvore.setdefault(nome, [])
+        if resto:
+            filhos.append(resto)
+    return arvore
+
+
+def parametro_lista(request, nome):
+    valor = request.query_params.get(nome) if request is not None else None
+    if valor is None:
+        return None
+    return [item.strip() for item in valor.split(',') if item.strip()]
+
+
+class CamposDinamicosMixin:
+    """
+    Representação esparsa: `?fields=id,titulo,projeto.nome` limita os campos e
+    `?expand=projeto,projeto.proprietario` aninha relações (somente leitura), que
+    por padrão saem só com o id. Sem `campos`/`expandir` explícitos, lê ambos da request no contexto.
+    """
+    campos_expansiveis = {}
+
+    def __init__(self, *args, campos=None, expandir=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if campos is None and expandir is None:
+            request = self.context.get('request')
+            campos = parametro_lista(request, 'fields')
+            expandir = parametro_lista(request, 'expand')
+        self.campos = campos
+        self.expandir = expandir or []
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandir = _dividir_caminhos(self.expandir)
+        campos = _dividir_caminhos(self.campos) if self.campos is not None else None
+        for nome, serializer_class in self.campos_expansiveis.items():
+            if nome not in fields:
+                continue
+            # `?fields=projeto.nome` já implica expandir projeto
+            if nome in expandir or (campos is not None and campos.get(nome)):
+                fields[nome] = serializer_class(
+                    read_only=True,
+                    allow_null=fields[nome].allow_null,
+                    campos=(campos.get(nome) or None) if campos is not None else None,
+                    expandir=expandir.get(nome, []),
+                )
+        if campos is not None:
+            fields = {nome: campo for nome, campo in fields.items() if nome in campos}
+        return fields
+
+
+class UserSerializer(CamposDinamicosMixin, ConsultaOtimizadaMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name']
 
-class ProjetoSerializer(serializers.ModelSerializer):
-    proprietario = UserSerializer(read_only=True)
+class ProjetoSerializer(CamposDinamicosMixin, ConsultaOtimizadaMixin, serializers.ModelSerializer):
+    campos_expansiveis = {'proprietario': UserSerializer}
+
     class Meta:
         model = Projeto
-        fields = ['id', 'nome', 'descricao', 'data_criacao', 'proprietario']
+        fields = ['id', 'nome', 'descricao', 'data_criacao', 'data_atualizacao', 'proprietario']
+        read_only_fields = ['proprietario']
+
+class TarefaSerializer(CamposDinamicosMixin, ConsultaOtimizadaMixin, serializers.ModelSerializer):
+    campos_expansiveis = {'projeto': ProjetoSerializer, 'atribuido_a': UserSerializer}
+    # O frontend envia o projeto como projeto_id
+    projeto_id = serializers.PrimaryKeyRelatedField(
+        source='projeto', queryset=Projeto.objects.all(), write_only=True, required=False
+    )
 
-class TarefaSerializer(serializers.ModelSerializer):
-    projeto = ProjetoSerializer(read_only=True)
-    atribuido_a = UserSerializer(read_only=True)
     class Meta:
         model = Tarefa
         fields = [
-            'id', 'titulo', 'descricao', 'status', 'data_criacao',
-            'data_conclusao', 'projeto', 'atribuido_a'
+            'id', 'titulo', 'descricao', 'status', 'data_criacao', 'data_atualizacao',
+            'data_conclusao', 'projeto', 'atribuido_a', 'projeto_id'
         ]
+        extra_kwargs = {'projeto': {'required': False}}
+
+    def validate(self, attrs):
+        if self.instance is None and 'projeto' not in attrs:
+            raise serializers.ValidationError({'projeto': 'Este campo é obrigatório.'})
+        return attrs
+
+
+class TarefaLoteSerializer(serializers.ModelSerializer):
+    """
+    Validação de um item das operações em lote. As FKs chegam como ids e são
+    conferidas todas de uma vez, em vez de uma consulta por item.
+    """
+    projeto = serializers.IntegerField()
+    atribuido_a = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Tarefa
+        fields = ['titulo', 'descricao', 'status', 'data_conclusao', 'projeto', 'atribuido_a']
@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .autenticacao import invalidar_tokens
+from .cache_respostas import PROJETO, TAREFA, USUARIO, invalidar
+from .eventos import publicar_tarefas
+from .models import Projeto, RegistroExclusao, Tarefa
+
+
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=Token)
+def invalidar_token(sender, instance, **kwargs):
+    # A chave é a PK do token: rotacionar é apagar o antigo e criar outro
+    invalidar_tokens(instance.key)
+
+
+@receiver(post_save, sender=User)
+def invalidar_tokens_do_usuario(sender, instance, update_fields=None, **kwargs):
+    # O login só grava last_login; qualquer outra alteração (inclusive desativar) invalida
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidar_tokens(*Token.objects.filter(user_id=instance.pk).values_list('key', flat=True))
+
+
+@receiver(post_save, sender=Tarefa)
+def invalidar_respostas_tarefa(sender, using, **kwargs):
+    invalidar(TAREFA, using=using)
+
+
+@receiver(post_save, sender=Projeto)
+@receiver(post_delete, sender=Projeto)
+def invalidar_respostas_projeto(sender, using, **kwargs):
+    # Apagar um projeto leva junto as tarefas dele
+    invalidar(PROJETO, TAREFA, using=using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_respostas_usuario(sender, using, update_fields=None, **kwargs):
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    invalidar(USUARIO, PROJETO, TAREFA, using=using)
+
+
+@receiver(pre_delete, sender=Projeto)
+def registrar_exclusao_projeto(sender, instance, using, **kwargs):
+    # As tarefas saem em cascata, sem passar por Tarefa.delete(): registra as exclusões aqui
+    tarefas = list(
+        Tarefa.objects.using(using).filter(projeto_id=instance.pk)
+        .values_list('pk', 'status', 'atribuido_a_id', 'data_criacao')
+    )
+    RegistroExclusao.registrar(
+        'tarefa', [pk for pk, *_ in tarefas], using=using,
+        criadas_em={pk: data_criacao for pk, *_, data_criacao in tarefas},
+    )
+    RegistroExclusao.registrar('projeto', [instance.pk], using=using)
+    publicar_tarefas(
+        [('removida', pk, (instance.pk, status, atribuido_a_id), None) for pk, status, atribuido_a_id, _ in tarefas],
+        using=using,
+    )
+
+
+@receiver(pre_delete, sender=User)
+def desatribuir_tarefas(sender, instance, using, **kwargs):
+    # O SET_NULL da exclusão não atualiza data_atualizacao; fazer antes pelo QuerySet garante isso
+    Tarefa.objects.using(using).filter(atribuido_a_id=instance.pk).update(atribuido_a=None)
@@ -0,0 +1,110 @@
+"""
+Sincronização incremental: devolve só o que foi criado, alterado ou excluído
+depois de um cursor opaco, para o cliente manter um espelho local.
+
+O cursor guarda duas posições, (data_atualizacao, id) nas linhas e
+(data_exclusao, id) nos registros de exclusão. Quando a resposta alcança o fim,
+a próxima posição recua MARGEM em relação ao relógio: uma transação que ainda
+não tinha feito commit não se perde, ao custo de reenviar as últimas alterações.
+A entrega é "ao menos uma vez", e o cliente deve aplicar os itens como upsert.
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import RegistroExclusao
+
+LIMITE = 1000
+MARGEM = timedelta(seconds=5)
+# Registros de exclusão mais antigos que isso podem ser apagados (comando limpar_exclusoes)
+RETENCAO = timedelta(days=30)
+
+
+class CursorInvalido(Exception):
+    pass
+
+
+class CursorExpirado(Exception):
+    pass
+
+
+def codificar_cursor(alteradas, removidas):
+    posicoes = [[momento.isoformat(), pk] for momento, pk in (alteradas, removidas)]
+    return base64.urlsafe_b64encode(json.dumps(posicoes).encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """Devolve as posições (alteradas, removidas); sem cursor, começa do início."""
+    if not cursor:
+        return None, None
+    try:
+        posicoes = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        (alteradas, id_alteradas), (removidas, id_removidas) = posicoes
+        alteradas = (datetime.fromisoformat(alteradas), int(id_alteradas))
+        removidas = (datetime.fromisoformat(removidas), int(id_removidas))
+        if alteradas[0].tzinfo is None or removidas[0].tzinfo is None:
+            raise ValueError('Posição sem fuso horário')
+    except (ValueError, TypeError):
+        raise CursorInvalido('Cursor inválido')
+    if removidas[0] < timezone.now() - RETENCAO:
+        raise CursorExpirado('Cursor expirado: refaça a sincronização completa')
+    return alteradas, removidas
+
+
+def _depois(queryset, campo, posicao):
+    if posicao is None:
+        return queryset
+    momento, pk = posicao
+    return queryset.filter(Q(**{f'{campo}__gt': momento}) | Q(**{campo: momento, 'pk__gt': pk}))
+
+
+def _proxima(posicao, ultima, pagina_cheia, agora):
+    if pagina_cheia:
+        return ultima
+    # Alcançou o fim: avança até agora - MARGEM, sem nunca voltar
+    limite = (agora - MARGEM, 0)
+    return max(posicao, limite) if posicao is not None else limite
+
+
+def alteracoes(queryset, modelo, cursor, serializar, limite=LIMITE):
+    """
+    Uma página de alterações de `queryset` (Tarefa ou Projeto) depois de `cursor`.
+    `serializar` recebe a lista de linhas e devolve a representação delas.
+    """
+    agora = timezone.now()
+    posicao_alteradas, posicao_removidas = decodificar_cursor(cursor)
+    if posicao_removidas is None:
+        # Quem começa do zero não tem o que apagar: só interessam as exclusões daqui em diante
+        posicao_removidas = (agora - MARGEM, 0)
+
+    linhas = list(
+        _depois(queryset, 'data_atualizacao', posicao_alteradas).order_by('data_atualizacao', 'pk')[:limite]
+    )
+    exclusoes = list(
+        _depois(RegistroExclusao.objects.filter(modelo=modelo), 'data_exclusao', posicao_removidas)
+        .order_by('data_exclusao', 'pk')
+        .values_list('data_exclusao', 'pk', 'objeto_id')[:limite]
+    )
+
+    ultima_linha = None
+    if linhas:
+        ultima = linhas[-1]
+        ultima_linha = (
+            (ultima['data_atualizacao'], ultima['id']) if isinstance(ultima, dict)
+            else (ultima.data_atualizacao, ultima.pk)
+        )
+    ultima_exclusao = exclusoes[-1][:2] if exclusoes else None
+    mais = len(linhas) == limite or len(exclusoes) == limite
+    proximo = codificar_cursor(
+        _proxima(posicao_alteradas, ultima_linha, len(linhas) == limite, agora),
+        _proxima(posicao_removidas, ultima_exclusao, len(exclusoes) == limite, agora),
+    )
+    return {
+        'alteradas': serializar(linhas),
+        'removidas': [objeto_id for _, _, objeto_id in exclusoes],
+        'cursor': proximo,
+        'mais': mais,
+    }
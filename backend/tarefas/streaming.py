@@ -0,0 +1,90 @@
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
+
+from .renderizadores import codificar
+
+TAMANHO_LOTE = 1000
+
+FORMATOS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def lotes(queryset, tamanho=TAMANHO_LOTE):
+    """
+    Percorre o queryset com .iterator(), entregando listas de no máximo `tamanho`
+    objetos. No PostgreSQL, o .iterator() usa um cursor no servidor; dentro da
+    transação ele é lido aos poucos (fora dela, seria um cursor WITH HOLD, que o
+    banco materializa inteiro antes de devolver a primeira linha).
+    """
+    with transaction.atomic(using=queryset.db):
+        iterador = queryset.iterator(chunk_size=tamanho)
+        while lote := list(islice(iterador, tamanho)):
+            yield lote
+
+
+def gerar_json(queryset, serializar_lote, tamanho=TAMANHO_LOTE):
+    """Gera um array JSON, serializando um lote por vez."""
+    yield b'['
+    primeiro = True
+    for lote in lotes(queryset, tamanho):
+        corpo = b','.join(codificar(item) for item in serializar_lote(lote))
+        yield corpo if primeiro else b',' + corpo
+        primeiro = False
+    yield b']'
+
+
+def gerar_ndjson(queryset, serializar_lote, tamanho=TAMANHO_LOTE):
+    """Gera um objeto JSON por linha, serializando um lote por vez."""
+    for lote in lotes(queryset, tamanho):
+        yield b''.join(codificar(item) + b'\n' for item in serializar_lote(lote))
+
+
+GERADORES = {
+    'json': gerar_json,
+    'ndjson': gerar_ndjson,
+}
+
+
+async def _assincrono(conteudo):
+    """Entrega um gerador síncrono sob ASGI, uma parte por vez, na thread das consultas da requisição."""
+    proximo = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (parte := await proximo(conteudo, None)) is not None:
+            yield parte
+    finally:
+        await sync_to_async(conteudo.close, thread_sensitive=True)()
+
+
+def resposta_streaming(conteudo, request=None, **kwargs):
+    """
+    StreamingHttpResponse de um gerador síncrono. Sob ASGI, o Django consumiria
+    o gerador inteiro (list()) antes de enviar; por isso ele é adaptado a um
+    iterador assíncrono.
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        conteudo = _assincrono(conteudo)
+    return StreamingHttpResponse(conteudo, **kwargs)
+
+
+def fixar_banco(queryset):
+    """
+    Fixa o banco escolhido pelo roteador agora: o conteúdo em stream é lido
+    depois que os middlewares (e a escolha da réplica) já terminaram.
+    """
+    return queryset.using(queryset.db)
+
+
+def resposta_em_stream(queryset, serializar_lote, formato, tamanho=TAMANHO_LOTE, request=None):
+    """
+    Resposta que serializa e envia o queryset aos poucos, com memória constante
+    independentemente do número de linhas. `serializar_lote` recebe uma lista de
+    itens do queryset e devolve a lista de representações.
+    """
+    conteudo = GERADORES[formato](fixar_banco(queryset), serializar_lote, tamanho)
+    return resposta_streaming(conteudo, request, content_type=FORMATOS[formato])
@@ -1,3 +1,1208 @@
-from django.test import TestCase
+import asyncio
+import csv
+import gzip
+import json
+import os
+import runpy
+import tempfile
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import (
+    AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+    skipUnlessDBFeature,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from .autenticacao import (
+    TokenAuthenticationEmCache, cache_local, geracao, guardar_token, invalidar_tokens, obter_token,
+)
+from .cache_respostas import metricas, zerar_metricas
+from .eventos import broker
+from .models import AtualizacaoResumo, Projeto, RegistroExclusao, ResumoDiario, Tarefa
+from .replicas import (
+    RoteadorReplicas, cliente_do_token, escrita_recente, identificar_cliente, leituras_em_replica, leu_de_replica,
+    middleware_replicas, registrar_escrita,
+)
+from .resumos import atualizar as atualizar_resumos, divergencias
+from .sincronizacao import alteracoes, codificar_cursor
+
+
+class BaseAPITestCase(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user(username='teste', password='123456')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def criar_tarefas(self, quantidade, **extra):
+        tarefas = []
+        for i in range(quantidade):
+            proprietario = User.objects.create_user(username=f'dono{User.objects.count()}')
+            projeto = Projeto.objects.create(
+                nome=f'Projeto {i}', descricao='Descrição', proprietario=proprietario
+            )
+            dados = {'atribuido_a': proprietario, **extra}
+            tarefas.append(Tarefa.objects.create(titulo=f'Tarefa {i}', projeto=projeto, **dados))
+        return tarefas
+
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        return len(contexto.captured_queries)
+
+
+class ConsultasListagemTests(BaseAPITestCase):
+    def test_listagem_de_tarefas_nao_cresce_com_o_tamanho_da_pagina(self):
+        url = '/api/tarefas/?expand=projeto.proprietario,atribuido_a'
+        self.criar_tarefas(2)
+        poucas = self.contar_consultas(url)
+        self.criar_tarefas(18)
+        muitas = self.contar_consultas(url)
+        self.assertEqual(poucas, muitas)
+        self.assertEqual(muitas, 2)  # COUNT da paginação + SELECT com joins
+
+    def test_listagem_de_projetos_nao_cresce_com_o_tamanho_da_pagina(self):
+        self.criar_tarefas(2)
+        poucas = self.contar_consultas('/api/projetos/?expand=proprietario')
+        self.criar_tarefas(18)
+        self.assertEqual(poucas, self.contar_consultas('/api/projetos/?expand=proprietario'))
+
+    def test_acoes_de_listagem_nao_fazem_n_mais_um(self):
+        tarefas = self.criar_tarefas(5, atribuido_a=self.usuario)
+        projeto = tarefas[0].projeto
+        Tarefa.objects.bulk_create(
+            Tarefa(titulo=f'Extra {i}', projeto=projeto, atribuido_a=self.usuario) for i in range(10)
+        )
+        expand = 'expand=projeto.proprietario,atribuido_a'
+        self.assertEqual(
+            self.contar_consultas(f'/api/tarefas/tarefas_por_usuario/?user_id={self.usuario.pk}&{expand}'), 2
+        )
+        self.assertEqual(self.contar_consultas(f'/api/projetos/{projeto.pk}/tarefas_do_projeto/?{expand}'), 3)
+
+
+class ResumoProgressoTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.projeto = Projeto.objects.create(nome='P', descricao='D', proprietario=self.usuario)
+        for status_tarefa in ['pendente', 'pendente', 'em_progresso', 'concluída']:
+            Tarefa.objects.create(titulo='T', projeto=self.projeto, status=status_tarefa)
+
+    def test_resumo_progresso_em_uma_consulta(self):
+        with CaptureQueriesContext(connection) as contexto:
+            resposta = self.client.get(f'/api/projetos/{self.projeto.pk}/resumo_progresso/')
+        self.assertEqual(resposta.data, {
+            'total_tarefas': 4, 'concluidas': 1, 'pendentes': 2, 'em_progresso': 1,
+        })
+        self.assertEqual(len(contexto.captured_queries), 1)  # contadores lidos no get_object
+
+    def test_resumo_progresso_lote_por_ids_e_por_proprietario(self):
+        vazio = Projeto.objects.create(nome='V', descricao='D', proprietario=self.usuario)
+        with CaptureQueriesContext(connection) as contexto:
+            resposta = self.client.get(f'/api/projetos/resumo_progresso_lote/?ids={self.projeto.pk},{vazio.pk}')
+        self.assertEqual(len(contexto.captured_queries), 1)
+        self.assertEqual([p['total_tarefas'] for p in resposta.data], [4, 0])
+        resposta = self.client.get('/api/projetos/resumo_progresso_lote/')
+        self.assertEqual([p['id'] for p in resposta.data], [self.projeto.pk, vazio.pk])
+        self.assertEqual(self.client.get('/api/projetos/resumo_progresso_lote/?ids=x').status_code, 400)
+
+
+class ContadoresProjetoTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.projeto = Projeto.objects.create(nome='P', descricao='D', proprietario=self.usuario)
+
+    def assertContadores(self, pendentes, em_progresso, concluidas, projeto=None):
+        projeto = Projeto.objects.get(pk=(projeto or self.projeto).pk)
+        self.assertEqual(
+            (projeto.tarefas_pendentes, projeto.tarefas_em_progresso, projeto.tarefas_concluidas),
+            (pendentes, em_progresso, concluidas),
+        )
+        self.assertFalse(list(Projeto.objects.divergencias()))
+
+    def test_escritas_pela_api_mantem_os_contadores(self):
+        tarefa = Tarefa.objects.create(titulo='T', projeto=self.projeto)
+        outra = Tarefa.objects.create(titulo='T2', projeto=self.projeto)
+        self.assertContadores(2, 0, 0)
+        self.client.post(f'/api/tarefas/{tarefa.pk}/mudar_status/', {'status': 'em_progresso'})
+        self.assertContadores(1, 1, 0)
+        self.client.post(f'/api/tarefas/{tarefa.pk}/marcar_concluida/')
+        self.assertContadores(1, 0, 1)
+        self.client.patch(f'/api/tarefas/{outra.pk}/', {'status': 'em_progresso'})
+        self.assertContadores(0, 1, 1)
+        self.client.delete(f'/api/tarefas/{outra.pk}/')
+        self.assertContadores(0, 0, 1)
+
+    def test_operacoes_em_massa_mantem_os_contadores(self):
+        outro = Projeto.objects.create(nome='O', descricao='D', proprietario=self.usuario)
+        Tarefa.objects.bulk_create(
+            [Tarefa(titulo='T', projeto=self.projeto) for _ in range(3)]
+            + [Tarefa(titulo='T', projeto=outro, status='concluída')]
+        )
+        self.assertContadores(3, 0, 0)
+        Tarefa.objects.filter(projeto=self.projeto).update(status='em_progresso')
+        self.assertContadores(0, 3, 0)
+        tarefas = list(Tarefa.objects.filter(projeto=self.projeto)[:2])
+        for tarefa in tarefas:
+            tarefa.status = 'pendente'
+            tarefa.projeto = outro
+        Tarefa.objects.bulk_update(tarefas, ['status', 'projeto'])
+        self.assertContadores(0, 1, 0)
+        self.assertContadores(2, 0, 1, projeto=outro)
+        Tarefa.objects.filter(status='pendente').delete()
+        self.assertContadores(0, 0, 1, projeto=outro)
+
+    def test_resumo_e_contagem_por_projeto_leem_os_contadores(self):
+        Tarefa.objects.create(titulo='T', projeto=self.projeto)
+        with CaptureQueriesContext(connection) as contexto:
+            resposta = self.client.get('/api/tarefas/numero_tarefas_por_projeto/')
+        self.assertEqual(len(contexto.captured_queries), 1)
+        self.assertNotIn('tarefas_tarefa', contexto.captured_queries[0]['sql'])
+        self.assertEqual(resposta.data, [{'projeto__nome': 'P', 'total': 1}])
+
+    def test_comando_recalcula_e_verifica(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        Tarefa.objects.create(titulo='T', projeto=self.projeto)
+        Projeto.objects.filter(pk=self.projeto.pk).update(tarefas_pendentes=7)
+        with self.assertRaises(CommandError):
+            call_command('recalcular_contadores', '--verificar', stdout=StringIO())
+        call_command('recalcular_contadores', stdout=StringIO())
+        self.assertContadores(1, 0, 0)
+
+    def test_save_de_projeto_carregado_antes_nao_sobrescreve_contadores(self):
+        projeto = Projeto.objects.get(pk=self.projeto.pk)
+        Tarefa.objects.create(titulo='Outra', projeto=self.projeto)
+        projeto.nome = 'Renomeado'
+        projeto.save()
+        self.assertContadores(1, 0, 0)
+        # Nem pedindo o contador em update_fields
+        projeto.tarefas_pendentes = 5
+        projeto.save(update_fields=['nome', 'tarefas_pendentes'])
+        self.assertContadores(1, 0, 0)
+
+
+class PaginacaoCursorTests(BaseAPITestCase):
+    def test_percorre_todas_as_tarefas_sem_count(self):
+        self.criar_tarefas(25)
+        ids, url = [], '/api/tarefas/?paginacao=cursor&page_size=10'
+        while url:
+            with CaptureQueriesContext(connection) as contexto:
+                resposta = self.client.get(url)
+            self.assertEqual(len(contexto.captured_queries), 1)
+            self.assertNotIn('COUNT', contexto.captured_queries[0]['sql'])
+            ids += [tarefa['id'] for tarefa in resposta.data['results']]
+            url = resposta.data['next']
+        self.assertEqual(ids, list(Tarefa.objects.order_by('data_criacao', 'id').values_list('id', flat=True)))
+
+    def test_paginacao_por_numero_continua_funcionando(self):
+        self.criar_tarefas(25)
+        resposta = self.client.get('/api/projetos/?page=2')
+        self.assertEqual(resposta.data['count'], 25)
+        self.assertEqual(len(resposta.data['results']), 5)
+
+
+class ListagemStreamingTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tarefas = self.criar_tarefas(25, atribuido_a=self.usuario)
+
+    def test_acoes_de_listagem_sao_paginadas(self):
+        resposta = self.client.get(f'/api/tarefas/tarefas_por_usuario/?user_id={self.usuario.pk}')
+        self.assertEqual(resposta.data['count'], 25)
+        self.assertEqual(len(resposta.data['results']), 20)
+
+    def test_stream_json_e_ndjson(self):
+        url = f'/api/tarefas/tarefas_por_usuario/?user_id={self.usuario.pk}'
+        paginada = self.client.get(url + '&page_size=100&paginacao=cursor').data['results']
+        resposta = self.client.get(url + '&stream=json')
+        self.assertTrue(resposta.streaming)
+        self.assertEqual(json.loads(b''.join(resposta.streaming_content)), json.loads(json.dumps(paginada)))
+
+        resposta = self.client.get(url + '&stream=ndjson')
+        self.assertEqual(resposta['Content-Type'], 'application/x-ndjson')
+        linhas = b''.join(resposta.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(linha)['id'] for linha in linhas], [t['id'] for t in paginada])
+
+    def test_stream_invalido(self):
+        self.assertEqual(self.client.get('/api/tarefas/?stream=xml').status_code, 400)
+
+
+class CamposDinamicosTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tarefa = self.criar_tarefas(1)[0]
+
+    def consultar(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            resposta = self.client.get(url)
+        return resposta.data['results'][0], contexto.captured_queries[-1]['sql']
+
+    def test_relacoes_saem_como_id_por_padrao_e_sem_joins(self):
+        tarefa, sql = self.consultar('/api/tarefas/')
+        self.assertEqual(tarefa['projeto'], self.tarefa.projeto_id)
+        self.assertEqual(tarefa['atribuido_a'], self.tarefa.atribuido_a_id)
+        self.assertNotIn('JOIN', sql)
+
+    def test_expand_aninha_e_faz_os_joins_correspondentes(self):
+        tarefa, sql = self.consultar('/api/tarefas/?expand=projeto.proprietario,atribuido_a')
+        self.assertEqual(tarefa['projeto']['proprietario']['username'], self.tarefa.projeto.proprietario.username)
+        self.assertEqual(tarefa['atribuido_a']['id'], self.tarefa.atribuido_a_id)
+        self.assertEqual(sql.count('JOIN'), 3)
+
+        tarefa, sql = self.consultar('/api/tarefas/?expand=projeto')
+        self.assertEqual(tarefa['projeto']['proprietario'], self.tarefa.projeto.proprietario_id)
+        self.assertEqual(sql.count('JOIN'), 1)
+
+    def test_fields_limita_os_campos_inclusive_aninhados(self):
+        tarefa, _ = self.consultar('/api/tarefas/?fields=id,titulo,projeto.nome')
+        self.assertEqual(tarefa, {'id': self.tarefa.pk, 'titulo': 'Tarefa 0', 'projeto': {'nome': 'Projeto 0'}})
+        projeto, sql = self.consultar('/api/projetos/?fields=id,nome')
+        self.assertEqual(set(projeto), {'id', 'nome'})
+
+
+class LeituraRapidaTests(BaseAPITestCase):
+    def test_saida_identica_a_dos_serializers(self):
+        from django.test import RequestFactory
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.request import Request
+
+        from .leitura_rapida import leitor_para
+        from .serializers import ProjetoSerializer, TarefaSerializer, UserSerializer
+
+        tarefas = self.criar_tarefas(3)
+        Tarefa.objects.filter(pk=tarefas[0].pk).update(
+            atribuido_a=None, status='concluída', data_conclusao=timezone.now()
+        )
+        Tarefa.objects.create(titulo='Sem descrição', descricao=None, projeto=tarefas[1].projeto)
+
+        renderizar = JSONRenderer().render
+        consultas = ['', 'expand=projeto.proprietario,atribuido_a', 'expand=atribuido_a', 'fields=id,projeto.nome']
+        for serializer_class in (TarefaSerializer, ProjetoSerializer, UserSerializer):
+            queryset = serializer_class.Meta.model.objects.order_by('pk')
+            for consulta in consultas:
+                with self.subTest(serializer=serializer_class.__name__, consulta=consulta):
+                    request = Request(RequestFactory().get(f'/?{consulta}'))
+                    leitor = leitor_para(serializer_class, request)
+                    esperado = serializer_class(queryset, many=True, context={'request': request}).data
+                    obtido = [leitor(linha) for linha in leitor.valores(queryset)]
+                    self.assertEqual(renderizar(obtido), renderizar(esperado))
+
+
+class RenderizadoresTests(BaseAPITestCase):
+    def test_mesma_saida_do_json_renderer(self):
+        from decimal import Decimal
+        from rest_framework.renderers import JSONRenderer
+
+        from .renderizadores import JSONRapidoRenderer
+        from .serializers import TarefaSerializer
+
+        self.criar_tarefas(3)
+        Tarefa.objects.update(descricao='Acentuação e separador\u2028de linha')
+        dados = TarefaSerializer(
+            Tarefa.objects.all(), many=True, expandir=['projeto.proprietario', 'atribuido_a']
+        ).data
+        for payload in (dados, {'valor': Decimal('1.50'), 'lista': [1, None, True]}):
+            self.assertEqual(JSONRapidoRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_api_usa_o_parser_e_o_renderer_configurados(self):
+        tarefa = self.criar_tarefas(1)[0]
+        resposta = self.client.post(
+            f'/api/tarefas/{tarefa.pk}/mudar_status/', {'status': 'em_progresso'}, format='json'
+        )
+        self.assertEqual(resposta.json(), {'status': 'Status alterado para em_progresso'})
+        resposta = self.client.post(
+            f'/api/tarefas/{tarefa.pk}/mudar_status/', b'{invalido', content_type='application/json'
+        )
+        self.assertEqual(resposta.status_code, 400)
+
+
+class LoteTarefasTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.projeto = Projeto.objects.create(nome='P', descricao='D', proprietario=self.usuario)
+
+    def test_cria_atualiza_e_remove_em_lote(self):
+        itens = [{'titulo': f'T{i}', 'projeto': self.projeto.pk} for i in range(50)]
+        itens.append({'titulo': 'Sem projeto válido', 'projeto': 999999})
+        itens.append({'projeto': self.projeto.pk})
+        with CaptureQueriesContext(connection) as contexto:
+            resposta = self.client.post('/api/tarefas/lote/', itens, format='json')
+        self.assertLess(len(contexto.captured_queries), 15)
+        self.assertEqual((resposta.data['sucesso'], resposta.data['erros']), (50, 2))
+        self.assertEqual(resposta.data['resultados'][50]['erros'], {'projeto': ['Projeto não encontrado']})
+        self.assertIn('titulo', resposta.data['resultados'][51]['erros'])
+        ids = [resultado['id'] for resultado in resposta.data['resultados'][:50]]
+        self.assertEqual(Projeto.objects.get(pk=self.projeto.pk).tarefas_pendentes, 50)
+
+        atualizacoes = [{'id': pk, 'status': 'concluída', 'atribuido_a': self.usuario.pk} for pk in ids[:10]]
+        atualizacoes.append({'id': 0, 'titulo': 'Não existe'})
+        resposta = self.client.patch('/api/tarefas/lote/', atualizacoes, format='json')
+        self.assertEqual((resposta.data['sucesso'], resposta.data['erros']), (10, 1))
+        self.assertEqual(Tarefa.objects.filter(status='concluída', atribuido_a=self.usuario).count(), 10)
+
+        resposta = self.client.delete('/api/tarefas/lote/', {'ids': ids[5:20] + [0]}, format='json')
+        self.assertEqual((resposta.data['sucesso'], resposta.data['erros']), (15, 1))
+        projeto = Projeto.objects.get(pk=self.projeto.pk)
+        self.assertEqual((projeto.tarefas_pendentes, projeto.tarefas_concluidas), (30, 5))
+        self.assertFalse(list(Projeto.objects.divergencias()))
+
+    def test_lote_invalido(self):
+        self.assertEqual(self.client.post('/api/tarefas/lote/', {'titulo': 'x'}, format='json').status_code, 400)
+        self.assertEqual(self.client.delete('/api/tarefas/lote/', {'ids': ['a']}, format='json').status_code, 400)
+
+    def test_criacao_individual_aceita_projeto_e_projeto_id(self):
+        for campo in ('projeto', 'projeto_id'):
+            resposta = self.client.post('/api/tarefas/', {'titulo': 'T', campo: self.projeto.pk}, format='json')
+            self.assertEqual(resposta.status_code, 201)
+            self.assertEqual(resposta.data['projeto'], self.projeto.pk)
+        self.assertEqual(self.client.post('/api/tarefas/', {'titulo': 'T'}, format='json').status_code, 400)
+
+
+class AcoesEmLoteTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.projeto = Projeto.objects.create(nome='P', descricao='D', proprietario=self.usuario)
+        self.outro = Projeto.objects.create(nome='Q', descricao='D', proprietario=self.usuario)
+        Tarefa.objects.bulk_create(
+            [Tarefa(titulo=f'T{i}', projeto=self.projeto) for i in range(6)]
+            + [Tarefa(titulo='Outra', projeto=self.outro)]
+        )
+
+    def test_tres_comandos_por_selecao(self):
+        from tarefas.lotes import mudar_status_em_lote
+        with CaptureQueriesContext(connection) as contexto:
+            mudar_status_em_lote(Tarefa.objects.all(), 'em_progresso')
+        comandos = [q['sql'].split()[0] for q in contexto.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(comandos, ['SELECT', 'UPDATE', 'UPDATE'])
+        self.assertEqual(Projeto.objects.get(pk=self.outro.pk).tarefas_em_progresso, 1)
+
+    def test_muda_status_por_filtro(self):
+        dados = {'status': 'concluída', 'filtro': {'projeto': self.projeto.pk, 'status': 'pendente'}}
+        resposta = self.client.post('/api/tarefas/mudar_status_lote/', dados, format='json')
+        self.assertEqual(resposta.data, {'atualizadas': 6})
+        self.assertFalse(Tarefa.objects.filter(projeto=self.projeto, data_conclusao__isnull=True).exists())
+        self.assertEqual(Projeto.objects.get(pk=self.outro.pk).tarefas_pendentes, 1)
+        self.assertFalse(list(Projeto.objects.divergencias()))
+
+        # Repetir não toca linhas que já estão no status pedido
+        resposta = self.client.post('/api/tarefas/mudar_status_lote/', dados, format='json')
+        self.assertEqual(resposta.data, {'atualizadas': 0})
+
+    def test_atribui_e_remove_por_ids(self):
+        ids = list(Tarefa.objects.filter(projeto=self.projeto).values_list('pk', flat=True)[:3])
+        dados = {'user_id': self.usuario.pk, 'ids': ids}
+        resposta = self.client.post('/api/tarefas/atribuir_usuario_lote/', dados, format='json')
+        self.assertEqual(resposta.data, {'atualizadas': 3})
+        dados = {'user_id': None, 'filtro': {'atribuido_a': self.usuario.pk}}
+        resposta = self.client.post('/api/tarefas/atribuir_usuario_lote/', dados, format='json')
+        self.assertEqual(resposta.data, {'atualizadas': 3})
+
+    def test_requisicoes_invalidas(self):
+        url = '/api/tarefas/mudar_status_lote/'
+        self.assertEqual(self.client.post(url, {'status': 'concluída'}, format='json').status_code, 400)
+        dados = {'status': 'arquivada', 'ids': [1]}
+        self.assertEqual(self.client.post(url, dados, format='json').status_code, 400)
+        dados = {'status': 'pendente', 'filtro': {'titulo': 'x'}}
+        self.assertEqual(self.client.post(url, dados, format='json').status_code, 400)
+        dados = {'user_id': 999999, 'ids': [1]}
+        self.assertEqual(self.client.post('/api/tarefas/atribuir_usuario_lote/', dados, format='json').status_code, 404)
+
+    def test_tipos_invalidos_respondem_400(self):
+        invalidos = [
+            ('/api/tarefas/mudar_status_lote/', {'status': 'concluída', 'filtro': {'projeto': 'abc'}}),
+            ('/api/tarefas/mudar_status_lote/', {'status': 'concluída', 'filtro': {'projeto': [1]}}),
+            ('/api/tarefas/mudar_status_lote/', {'status': 'concluída', 'filtro': {'atribuido_a': True}}),
+            ('/api/tarefas/mudar_status_lote/', {'status': 'concluída', 'filtro': {'status': ['pendente']}}),
+            ('/api/tarefas/mudar_status_lote/', {'status': 'concluída', 'ids': [True]}),
+            ('/api/tarefas/mudar_status_lote/', {'status': ['concluída'], 'ids': [1]}),
+            ('/api/tarefas/mudar_status_lote/', {'status': {'x': 1}, 'ids': [1]}),
+            ('/api/tarefas/atribuir_usuario_lote/', {'user_id': 'abc', 'ids': [1]}),
+            ('/api/tarefas/atribuir_usuario_lote/', {'user_id': True, 'ids': [1]}),
+        ]
+        for url, dados in invalidos:
+            with self.subTest(dados=dados):
+                self.assertEqual(self.client.post(url, dados, format='json').status_code, 400)
+        resposta = self.client.delete('/api/tarefas/lote/', {'ids': [True]}, format='json')
+        self.assertEqual(resposta.status_code, 400)
+        resposta = self.client.patch('/api/tarefas/lote/', [{'id': True, 'titulo': 'x'}], format='json')
+        self.assertEqual(resposta.data['erros'], 1)
+
+
+class EscritasDirecionadasTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.projeto = Projeto.objects.create(nome='P', descricao='D', proprietario=self.usuario)
+        self.tarefa = Tarefa.objects.create(titulo='T', descricao='x' * 1000, projeto=self.projeto)
+
+    def test_acoes_nao_regravam_descricao(self):
+        url = f'/api/tarefas/{self.tarefa.pk}/'
+        with CaptureQueriesContext(connection) as contexto:
+            self.client.post(url + 'atribuir_usuario/', {'user_id': self.usuario.pk}, format='json')
+            self.client.post(url + 'mudar_status/', {'status': 'em_progresso'}, format='json')
+            self.client.post(url + 'marcar_concluida/')
+            self.client.post(url + 'remover_usuario/')
+        atualizacoes = [q['sql'] for q in contexto.captured_queries if q['sql'].startswith('UPDATE "tarefas_tarefa"')]
+        self.assertEqual(len(atualizacoes), 4)
+        self.assertFalse(any('"descricao"' in sql for sql in atualizacoes))
+
+    def test_concluir_duas_vezes_preserva_a_data(self):
+        url = f'/api/tarefas/{self.tarefa.pk}/marcar_concluida/'
+        self.client.post(url)
+        primeira = Tarefa.objects.get(pk=self.tarefa.pk).data_conclusao
+        self.client.post(url)
+        self.assertEqual(Tarefa.objects.get(pk=self.tarefa.pk).data_conclusao, primeira)
+        self.assertEqual(Projeto.objects.get(pk=self.projeto.pk).tarefas_concluidas, 1)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcorrenciaAcoesTests(TransactionTestCase):
+    """Vários workers agindo ao mesmo tempo sobre as mesmas tarefas (precisa de um banco com locks de linha)."""
+
+    def test_acoes_concorrentes_nao_perdem_escritas(self):
+        usuario = User.objects.create_user(username='teste', password='123456')
+        projeto = Projeto.objects.create(nome='P', descricao='D', proprietario=usuario)
+        tarefas = [Tarefa.objects.create(titulo=f'T{i}', projeto=projeto) for i in range(20)]
+        acoes = [
+            ('marcar_concluida/', {}),
+            ('atribuir_usuario/', {'user_id': usuario.pk}),
+            ('mudar_status/', {'status': 'concluída'}),
+            ('marcar_concluida/', {}),
+        ]
+        barreira = threading.Barrier(len(acoes))
+        falhas = []
+
+        def worker(sufixo, dados):
+            cliente = APIClient()
+            cliente.force_authenticate(usuario)
+            try:
+                barreira.wait()
+                for tarefa in tarefas:
+                    resposta = cliente.post(f'/api/tarefas/{tarefa.pk}/{sufixo}', dados, format='json')
+                    if resposta.status_code != 200:
+                        falhas.append(resposta.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=acao) for acao in acoes]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(falhas, [])
+        # Nenhuma escrita apagou a outra: todas concluídas e atribuídas, contadores exatos
+        self.assertEqual(Tarefa.objects.filter(status='concluída', atribuido_a=usuario).count(), 20)
+        projeto.refresh_from_db()
+        self.assertEqual((projeto.tarefas_concluidas, projeto.tarefas_pendentes), (20, 0))
+        self.assertFalse(list(Projeto.objects.divergencias()))
+
+
+class AutenticacaoEmCacheTests(TestCase):
+    def setUp(self):
+        cache_local().limpar()
+        self.usuario = User.objects.create_user(username='teste', password='123456')
+        self.client = APIClient()
+
+    def entrar(self):
+        resposta = self.client.post('/api/auth/login/', {'username': 'teste', 'password': '123456'}, format='json')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {resposta.data["token"]}')
+        return resposta.data['token']
+
+    def consultas_de_token(self):
+        with CaptureQueriesContext(connection) as contexto:
+            resposta = self.client.get('/api/usuarios/')
+        return resposta, [q for q in contexto.captured_queries if 'authtoken_token' in q['sql']]
+
+    @override_settings(REPLICAS_LEITURA={'REPLICAS': ['replica'], 'ATRASO_MAXIMO': 5, 'CACHE': 'default'})
+    def test_login_fixa_no_primario_quem_vai_usar_o_token(self):
+        from django.core.cache import cache
+        cache.clear()
+        chave = self.entrar()
+        # O cliente fixado é o das próximas requisições, que trazem o token
+        seguinte = RequestFactory().get('/api/tarefas/', HTTP_AUTHORIZATION=f'Token {chave}')
+        self.assertEqual(cliente_do_token(chave), identificar_cliente(seguinte))
+        self.assertTrue(escrita_recente(identificar_cliente(seguinte)))
+
+    def test_login_popula_o_cache(self):
+        self.entrar()
+        resposta, consultas = self.consultas_de_token()
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(consultas, [])
+
+    def test_token_removido_deixa_de_valer(self):
+        Token.objects.get(key=self.entrar()).delete()
+        resposta, _ = self.consultas_de_token()
+        self.assertEqual(resposta.status_code, 401)
+
+    def test_usuario_desativado_deixa_de_autenticar(self):
+        self.entrar()
+        self.usuario.is_active = False
+        self.usuario.save()
+        resposta, _ = self.consultas_de_token()
+        self.assertEqual(resposta.status_code, 401)
+
+    def test_cada_requisicao_recebe_a_propria_copia_do_usuario(self):
+        chave = self.entrar()
+        autenticacao = TokenAuthenticationEmCache()
+        primeiro, _ = autenticacao.authenticate_credentials(chave)
+        primeiro.is_active = False
+        segundo, _ = autenticacao.authenticate_credentials(chave)
+        self.assertIsNot(primeiro, segundo)
+        self.assertTrue(segundo.is_active)
+
+    @override_settings(TOKEN_CACHE={'CACHE_COMPARTILHADO': 'default'})
+    def test_gravacao_atrasada_no_cache_compartilhado_nao_volta_a_valer(self):
+        from django.core.cache import cache
+        cache.clear()
+        chave = self.entrar()
+        token = Token.objects.select_related('user').get(key=chave)
+        # Uma requisição leu a geração e o banco; a invalidação chega antes de ela gravar
+        lida = geracao(chave)
+        invalidar_tokens(chave)
+        guardar_token(token, lida)
+        cache_local().limpar()
+        self.assertIsNone(obter_token(chave))
+        # A próxima leitura do banco grava sob a geração nova e volta a ser usada
+        TokenAuthenticationEmCache().authenticate_credentials(chave)
+        cache_local().limpar()
+        self.assertEqual(obter_token(chave).user.pk, self.usuario.pk)
+
+    def test_lru_descarta_o_menos_usado(self):
+        cache = type(cache_local())(tamanho=2, ttl=60)
+        cache.guardar('a', 1)
+        cache.guardar('b', 2)
+        cache.obter('a')
+        cache.guardar('c', 3)
+        self.assertEqual((cache.obter('a'), cache.obter('b'), cache.obter('c')), (1, None, 3))
+
+
+class CacheRespostasTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.projeto = Projeto.objects.create(nome='P', descricao='D', proprietario=self.usuario)
+        self.tarefa = Tarefa.objects.create(titulo='T', projeto=self.projeto)
+        zerar_metricas()
+
+    def test_segunda_leitura_nao_consulta_o_banco(self):
+        url = f'/api/projetos/{self.projeto.pk}/resumo_progresso/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as contexto:
+            resposta = self.client.get(url)
+        self.assertEqual(resposta['X-Cache'], 'HIT')
+        self.assertEqual(len(contexto.captured_queries), 0)
+        self.assertEqual(resposta.data['pendentes'], 1)
+        self.assertEqual(metricas(), {'acertos': 1, 'falhas': 1, 'nao_modificadas': 0, 'taxa_acerto': 0.5})
+
+    def test_resposta_lida_de_replica_nao_entra_no_cache(self):
+        url = f'/api/projetos/{self.projeto.pk}/resumo_progresso/'
+        with mock.patch('tarefas.cache_respostas.leu_de_replica', return_value=True):
+            resposta = self.client.get(url)
+        self.assertEqual(resposta['X-Cache'], 'MISS')
+        self.assertNotIn('ETag', resposta)
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+    def test_acoes_post_invalidam(self):
+        url = f'/api/projetos/{self.projeto.pk}/resumo_progresso/'
+        self.client.get(url)
+        self.client.post(f'/api/tarefas/{self.tarefa.pk}/marcar_concluida/')
+        resposta = self.client.get(url)
+        self.assertEqual(resposta['X-Cache'], 'MISS')
+        self.assertEqual(resposta.data['concluidas'], 1)
+
+        url = f'/api/tarefas/{self.tarefa.pk}/'
+        self.client.get(url)
+        self.client.post(url + 'atribuir_usuario/', {'user_id': self.usuario.pk}, format='json')
+        self.assertEqual(self.client.get(url).data['atribuido_a'], self.usuario.pk)
+
+        Tarefa.objects.filter(pk=self.tarefa.pk).update(titulo='Renomeada')
+        self.assertEqual(self.client.get(url).data['titulo'], 'Renomeada')
+
+    def test_entradas_por_usuario(self):
+        url = '/api/projetos/resumo_progresso_lote/'
+        self.assertEqual(len(self.client.get(url).data), 1)
+        outro = User.objects.create_user(username='outro')
+        self.client.force_authenticate(outro)
+        resposta = self.client.get(url)
+        self.assertEqual((resposta['X-Cache'], resposta.data), ('MISS', []))
+
+    def test_get_condicional(self):
+        url = '/api/tarefas/?expand=projeto'
+        etag = self.client.get(url)['ETag']
+        self.assertTrue(etag.startswith('"'))
+        with CaptureQueriesContext(connection) as contexto:
+            resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 304)
+        self.assertEqual((resposta.content, len(contexto.captured_queries)), (b'', 0))
+        self.assertEqual(resposta['ETag'], etag)
+
+        # Outra URL e qualquer escrita geram outro ETag
+        self.assertNotEqual(self.client.get('/api/tarefas/')['ETag'], etag)
+        self.client.post(f'/api/tarefas/{self.tarefa.pk}/mudar_status/', {'status': 'em_progresso'}, format='json')
+        resposta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+
+    def test_if_none_match_qualquer_so_vale_para_recurso_existente(self):
+        url = f'/api/tarefas/{self.tarefa.pk}/'
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 304)
+        self.assertEqual(self.client.get('/api/tarefas/999999/', HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+
+class SincronizacaoTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.projeto = Projeto.objects.create(nome='P', descricao='D', proprietario=self.usuario)
+        self.tarefas = [Tarefa.objects.create(titulo=f'T{i}', projeto=self.projeto) for i in range(5)]
+
+    def sincronizar(self, url, cursor=None):
+        resposta = self.client.get(url, {'desde': cursor} if cursor else {})
+        self.assertEqual(resposta.status_code, 200)
+        return resposta.data
+
+    def test_so_devolve_o_que_mudou(self):
+        url = '/api/tarefas/alteracoes/'
+        inicial = self.sincronizar(url)
+        self.assertEqual(len(inicial['alteradas']), 5)
+
+        # Simula a passagem do tempo além da margem do cursor
+        Tarefa.objects.update(data_atualizacao=F('data_atualizacao') - timedelta(minutes=1))
+        cursor = self.sincronizar(url)['cursor']
+        self.assertEqual(self.sincronizar(url, cursor)['alteradas'], [])
+
+        self.client.post(f'/api/tarefas/{self.tarefas[0].pk}/marcar_concluida/')
+        removida = self.tarefas[1].pk
+        self.tarefas[1].delete()
+        Tarefa.objects.filter(pk=self.tarefas[2].pk).update(titulo='Renomeada')
+        dados = self.sincronizar(url, cursor)
+        self.assertEqual(
+            sorted(item['id'] for item in dados['alteradas']), [self.tarefas[0].pk, self.tarefas[2].pk]
+        )
+        self.assertEqual(dados['removidas'], [removida])
+
+    def test_paginas_com_o_mesmo_instante(self):
+        Tarefa.objects.update(status='em_progresso')  # todas com a mesma data_atualizacao
+        vistos, cursor, mais = [], None, True
+        while mais:
+            dados = alteracoes(Tarefa.objects.all(), 'tarefa', cursor, lambda itens: [t.pk for t in itens], limite=2)
+            vistos.extend(dados['alteradas'])
+            cursor, mais = dados['cursor'], dados['mais']
+        self.assertEqual(vistos, sorted(t.pk for t in self.tarefas))
+
+    def test_exclusao_de_projeto_registra_as_tarefas(self):
+        cursor = self.sincronizar('/api/projetos/alteracoes/')['cursor']
+        projeto_id = self.projeto.pk
+        self.projeto.delete()
+        self.assertEqual(RegistroExclusao.objects.filter(modelo='tarefa').count(), 5)
+        self.assertEqual(self.sincronizar('/api/projetos/alteracoes/', cursor)['removidas'], [projeto_id])
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get('/api/tarefas/alteracoes/', {'desde': 'xyz'}).status_code, 400)
+        # Posições sem fuso horário não podem ser comparadas com o relógio
+        sem_fuso = timezone.now().replace(tzinfo=None)
+        cursor = codificar_cursor((sem_fuso, 1), (sem_fuso, 1))
+        self.assertEqual(self.client.get('/api/tarefas/alteracoes/', {'desde': cursor}).status_code, 400)
+
+
+class EventosTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.projeto = Projeto.objects.create(nome='P', descricao='D', proprietario=self.usuario)
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def assinar(self, *canais):
+        async def assinar():
+            return broker.assinar(canais)
+        assinatura = self.loop.run_until_complete(assinar())
+        self.addCleanup(broker.cancelar, assinatura)
+        return assinatura
+
+    def receber(self, assinatura):
+        return self.loop.run_until_complete(assinatura.proximos(espera=1))
+
+    def test_escritas_publicam_eventos_coalescidos_depois_do_commit(self):
+        do_projeto = self.assinar(f'projeto:{self.projeto.pk}')
+        minhas = self.assinar(f'usuario:{self.usuario.pk}')
+        with self.captureOnCommitCallbacks(execute=True):
+            tarefa = Tarefa.objects.create(titulo='T', projeto=self.projeto)
+            tarefa.status = 'em_progresso'
+            tarefa.save()
+        eventos = self.receber(do_projeto)
+        self.assertEqual([(e['tipo'], e['status']) for e in eventos], [('criada', 'em_progresso')])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/tarefas/{tarefa.pk}/atribuir_usuario/', {'user_id': self.usuario.pk}, format='json')
+        self.assertEqual(self.receber(minhas)[0]['atribuido_a'], self.usuario.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tarefa.objects.filter(pk=tarefa.pk).delete()
+        self.assertEqual([e['tipo'] for e in self.receber(do_projeto)], ['removida'])
+        self.assertEqual([e['tipo'] for e in self.receber(minhas)], ['removida'])
+
+    def test_rollback_nao_publica(self):
+        assinatura = self.assinar(f'projeto:{self.projeto.pk}')
+        with self.captureOnCommitCallbacks(execute=False):
+            Tarefa.objects.create(titulo='T', projeto=self.projeto)
+        self.assertEqual(self.receber(assinatura), [])
+
+    async def test_fluxo_sse(self):
+        ticket = (await sync_to_async(self.client.post)('/api/eventos/ticket/')).data['ticket']
+        resposta = await AsyncClient().get('/api/eventos/', {'projeto': self.projeto.pk, 'ticket': ticket})
+        self.assertEqual(resposta['Content-Type'], 'text/event-stream')
+        partes = aiter(resposta.streaming_content)
+        self.assertEqual(await anext(partes), b'retry: 3000\n\n')
+        proxima = asyncio.ensure_future(anext(partes))
+        await asyncio.sleep(0)
+        broker.publicar([{
+            'canais': {f'projeto:{self.projeto.pk}'},
+            'dados': {'tipo': 'criada', 'id': 1, 'projeto': self.projeto.pk, 'status': 'pendente', 'atribuido_a': None},
+        }])
+        try:
+            evento = await asyncio.wait_for(proxima, 2)
+        finally:
+            await partes.aclose()
+        self.assertTrue(evento.startswith(b'event: criada\ndata: {"tipo":"criada"'))
+        self.assertEqual((await sync_to_async(self.client.get)('/api/eventos/')).status_code, 501)
+
+    async def test_ticket_de_uso_unico_e_projetos_visiveis(self):
+        def preparar():
+            token = Token.objects.create(user=self.usuario)
+            outro = User.objects.create_user(username='outro', password='123456')
+            alheio = Projeto.objects.create(nome='Q', descricao='D', proprietario=outro)
+            atribuido = Projeto.objects.create(nome='R', descricao='D', proprietario=outro)
+            Tarefa.objects.create(titulo='T', projeto=atribuido, atribuido_a=self.usuario)
+            return token, alheio, atribuido
+
+        async def status(parametros, **cabecalhos):
+            resposta = await AsyncClient().get('/api/eventos/', parametros, headers=cabecalhos)
+            if resposta.streaming:
+                await resposta.streaming_content.aclose()
+            return resposta.status_code
+
+        token, alheio, atribuido = await sync_to_async(preparar)()
+        ticket = (await sync_to_async(self.client.post)('/api/eventos/ticket/')).data['ticket']
+        self.assertEqual(await status({'minhas': 1, 'ticket': ticket}), 200)
+        self.assertEqual(await status({'minhas': 1, 'ticket': ticket}), 401)
+        # O token não é mais aceito na URL, só no cabeçalho
+        self.assertEqual(await status({'minhas': 1, 'token': token.key}), 401)
+        autorizacao = {'Authorization': f'Token {token.key}'}
+        self.assertEqual(await status({'projeto': f'{self.projeto.pk},{atribuido.pk}'}, **autorizacao), 200)
+        self.assertEqual(await status({'projeto': f'{self.projeto.pk},{alheio.pk}'}, **autorizacao), 403)
+        self.assertEqual(await status({'projeto': 999999}, **autorizacao), 403)
+        self.assertEqual((await sync_to_async(APIClient().post)('/api/eventos/ticket/')).status_code, 401)
+
+class ViewsAssincronasTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tarefas = self.criar_tarefas(25, status='em_progresso')
+        Tarefa.objects.filter(pk__in=[t.pk for t in self.tarefas[:3]]).update(atribuido_a=self.usuario)
+        self.token = Token.objects.create(user=self.usuario)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    async def obter(self, url):
+        return await AsyncClient().get(url, headers={'Authorization': f'Token {self.token.key}'})
+
+    async def test_mesma_resposta_das_rotas_drf(self):
+        projeto_id = self.tarefas[0].projeto_id
+        rotas = [
+            ('/api/tarefas/?page=2&expand=projeto', '/api/async/tarefas/?page=2&expand=projeto'),
+            ('/api/tarefas/?fields=id,titulo', '/api/async/tarefas/?fields=id,titulo'),
+            ('/api/tarefas/?status=em_progresso&ordenar=-data_criacao&busca=Tarefa%201',
+             '/api/async/tarefas/?status=em_progresso&ordenar=-data_criacao&busca=Tarefa%201'),
+            (f'/api/tarefas/tarefas_por_usuario/?user_id={self.usuario.pk}',
+             f'/api/async/tarefas/tarefas_por_usuario/?user_id={self.usuario.pk}'),
+            (f'/api/projetos/{projeto_id}/resumo_progresso/', f'/api/async/projetos/{projeto_id}/resumo_progresso/'),
+        ]
+        for sincrona, assincrona in rotas:
+            esperado = await sync_to_async(self.client.get)(sincrona)
+            resposta = await self.obter(assincrona)
+            self.assertEqual(resposta.status_code, 200)
+            # Mesmos bytes, a menos do prefixo dos links de paginação
+            self.assertEqual(resposta.content, esperado.content.replace(b'/api/', b'/api/async/'))
+
+    async def test_erros_e_ultima_pagina_como_nas_rotas_drf(self):
+        rotas = [
+            ('/api/tarefas/?page=last', 200),
+            ('/api/tarefas/?page=9', 404),
+            ('/api/tarefas/?page=abc', 404),
+            ('/api/tarefas/tarefas_por_usuario/?user_id=abc', 400),
+            ('/api/tarefas/tarefas_por_usuario/', 400),
+        ]
+        for sincrona, status in rotas:
+            esperado = await sync_to_async(self.client.get)(sincrona)
+            resposta = await self.obter(sincrona.replace('/api/', '/api/async/'))
+            self.assertEqual((resposta.status_code, esperado.status_code), (status, status), sincrona)
+            self.assertEqual(resposta.content, esperado.content.replace(b'/api/', b'/api/async/'))
+        ultima = await self.obter('/api/async/tarefas/?page=last')
+        self.assertEqual(len(json.loads(ultima.content)['results']), 5)
+
+    async def test_token_fora_da_lru_local_nao_bloqueia_o_loop(self):
+        cache_local().limpar()
+        threads = []
+        original = cache_local().obter
+
+        def obter(chave):
+            threads.append(threading.current_thread())
+            return original(chave)
+
+        with mock.patch('tarefas.autenticacao.obter_token', side_effect=obter):
+            resposta = await self.obter('/api/async/tarefas/')
+        self.assertEqual(resposta.status_code, 200)
+        # O cache compartilhado e o banco são consultados fora da thread do loop
+        self.assertTrue(threads)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    async def test_exige_token(self):
+        self.assertEqual((await AsyncClient().get('/api/async/tarefas/')).status_code, 401)
+        self.assertEqual((await self.obter('/api/async/tarefas/?page=9')).status_code, 404)
+
+
+class FiltrosTarefasTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tarefas = self.criar_tarefas(4)
+        Tarefa.objects.filter(pk=self.tarefas[0].pk).update(
+            status='concluída', data_conclusao=timezone.now() - timedelta(days=2), titulo='Relatório mensal'
+        )
+        Tarefa.objects.filter(pk=self.tarefas[1].pk).update(
+            status='concluída', data_conclusao=timezone.now(), descricao='Revisar o relatório'
+        )
+        Tarefa.objects.filter(pk=self.tarefas[2].pk).update(status='em_progresso', atribuido_a=None)
+
+    def ids(self, url):
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200, resposta.content)
+        return [item['id'] for item in resposta.data['results']]
+
+    def test_filtros_combinados(self):
+        t = [tarefa.pk for tarefa in self.tarefas]
+        self.assertEqual(self.ids('/api/tarefas/?status=concluída,em_progresso'), t[:3])
+        self.assertEqual(self.ids(f'/api/tarefas/?projeto={self.tarefas[3].projeto_id}'), [t[3]])
+        self.assertEqual(self.ids('/api/tarefas/?atribuido_a=nenhum'), [t[2]])
+        ontem = (timezone.now() - timedelta(days=1)).isoformat()
+        self.assertEqual(self.ids(f'/api/tarefas/?concluida_apos={ontem.replace("+", "%2B")}'), [t[1]])
+        self.assertEqual(self.ids('/api/tarefas/?busca=relatório'), t[:2])
+        self.assertEqual(self.ids('/api/tarefas/?busca=relatório mensal'), [t[0]])
+
+    def test_ordenacao_e_paginacao_por_cursor(self):
+        t = [tarefa.pk for tarefa in self.tarefas]
+        self.assertEqual(self.ids('/api/tarefas/?ordenar=-data_criacao'), t[::-1])
+        # Ordenar pela conclusão lista só as concluídas, inclusive na paginação por cursor
+        self.assertEqual(self.ids('/api/tarefas/?ordenar=-data_conclusao&paginacao=cursor&page_size=1'), [t[1]])
+        self.assertEqual(self.ids('/api/tarefas/?ordenar=data_conclusao&paginacao=cursor'), [t[0], t[1]])
+
+    def test_parametros_invalidos(self):
+        for url in ('/api/tarefas/?status=feita', '/api/tarefas/?projeto=x',
+                    '/api/tarefas/?criada_apos=ontem', '/api/tarefas/?ordenar=titulo'):
+            self.assertEqual(self.client.get(url).status_code, 400, url)
+
+
+class DashboardTests(BaseAPITestCase):
+    def test_totais_e_tarefas_do_usuario(self):
+        tarefas = self.criar_tarefas(3)
+        tarefas[0].status = 'concluída'
+        tarefas[0].atribuido_a = self.usuario
+        tarefas[0].save()
+        Projeto.objects.create(nome='Meu', descricao='Descrição', proprietario=self.usuario)
+
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get('/api/dashboard/')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertLessEqual(len(consultas), 3)
+        self.assertEqual(resposta.data, {
+            'projetos': 4,
+            'usuarios': User.objects.count(),
+            'tarefas': {'total': 3, 'pendentes': 2, 'em_progresso': 0, 'concluidas': 1},
+            'meus_projetos': 1,
+            'minhas_tarefas': {'total': 1, 'pendentes': 0, 'em_progresso': 0, 'concluidas': 1},
+        })
+
+        Tarefa.objects.filter(pk=tarefas[1].pk).update(status='em_progresso')
+        self.assertEqual(self.client.get('/api/dashboard/').data['tarefas']['em_progresso'], 1)
+
+
+class AnaliseTests(BaseAPITestCase):
+    def concluir(self, tarefa, criada, horas):
+        Tarefa.objects.filter(pk=tarefa.pk).update(
+            status='concluída', data_criacao=criada, data_conclusao=criada + timedelta(hours=horas)
+        )
+
+    def test_conclusoes_por_dia_com_percentis(self):
+        from django.core.cache import cache
+        cache.clear()
+        ontem = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
+        tarefas = self.criar_tarefas(5)
+        for tarefa, horas in zip(tarefas, [1, 2, 3, 4, 10]):
+            self.concluir(tarefa, ontem - timedelta(days=1), 24 + horas)
+
+        url = f'/api/analise/conclusoes/?periodo=dia&inicio={(ontem - timedelta(days=1)).date()}'
+        resposta = self.client.get(url)
+        self.assertEqual(resposta.status_code, 200)
+        anteontem, dia, hoje = resposta.data['serie']
+        self.assertEqual(anteontem['concluidas'], 0)
+        self.assertEqual(dia, {
+            'inicio': ontem, 'concluidas': 5, 'tempo_medio_horas': 28.0, 'p50': 27.0, 'p90': 34.0,
+        })
+        self.assertEqual(hoje['concluidas'], 0)
+
+        # Baldes fechados não são recalculados; o de hoje acompanha as escritas
+        Tarefa.objects.filter(pk=tarefas[0].pk).update(data_conclusao=ontem - timedelta(hours=12))
+        self.concluir(tarefas[1], timezone.now() - timedelta(hours=3), 2)
+        anteontem, dia, hoje = self.client.get(url).data['serie']
+        self.assertEqual((anteontem['concluidas'], dia['concluidas'], hoje['concluidas']), (0, 5, 1))
+        with CaptureQueriesContext(connection) as consultas:
+            self.client.get(f'{url}&fim={ontem.date()}')
+        self.assertEqual(len(consultas), 0)
+
+        self.assertEqual(self.client.get('/api/analise/conclusoes/?periodo=mes').status_code, 400)
+
+    def test_tarefa_reaberta_sai_da_serie(self):
+        from django.core.cache import cache
+        cache.clear()
+        tarefa = self.criar_tarefas(1)[0]
+        self.concluir(tarefa, timezone.now() - timedelta(hours=3), 2)
+        url = '/api/analise/conclusoes/?periodo=dia'
+        self.assertEqual(self.client.get(url).data['serie'][-1]['concluidas'], 1)
+        resposta = self.client.patch(f'/api/tarefas/{tarefa.pk}/', {'status': 'pendente'}, format='json')
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(self.client.get(url).data['serie'][-1]['concluidas'], 0)
+
+    def test_envelhecimento_das_abertas(self):
+        tarefas = self.criar_tarefas(3)
+        Tarefa.objects.filter(pk=tarefas[0].pk).update(data_criacao=timezone.now() - timedelta(days=40))
+        Tarefa.objects.filter(pk=tarefas[1].pk).update(data_criacao=timezone.now() - timedelta(days=3))
+        self.concluir(tarefas[2], timezone.now(), 1)
+        dados = self.client.get('/api/analise/envelhecimento/').data
+        self.assertEqual(
+            {k: v for k, v in dados.items() if k != 'idade_maxima_horas'},
+            {'abertas': 2, 'ate_1_dia': 0, 'ate_7_dias': 1, 'ate_30_dias': 0, 'mais_de_30_dias': 1},
+        )
+        self.assertAlmostEqual(dados['idade_maxima_horas'], 960, delta=1)
+        projeto = tarefas[1].projeto_id
+        self.assertEqual(self.client.get(f'/api/analise/envelhecimento/?projeto={projeto}').data['abertas'], 1)
+
+
+class ResumoDiarioTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.hoje = timezone.localdate()
+        self.tarefas = self.criar_tarefas(3)
+        Tarefa.objects.filter(pk=self.tarefas[0].pk).update(data_criacao=timezone.now() - timedelta(days=10))
+
+    def atualizar(self):
+        dias = atualizar_resumos()
+        # Simula a passagem do tempo além da MARGEM da marca
+        AtualizacaoResumo.objects.update(marca=timezone.now())
+        return dias
+
+    def resumo(self):
+        return {
+            (linha.dia, linha.projeto_id, linha.status): linha.quantidade
+            for linha in ResumoDiario.objects.all()
+        }
+
+    def test_atualizacao_incremental_so_recalcula_dias_tocados(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from django.core.management.base import CommandError
+
+        self.assertEqual(self.atualizar(), 2)
+        t = self.tarefas
+        self.assertEqual(self.resumo(), {
+            (self.hoje - timedelta(days=10), t[0].projeto_id, 'pendente'): 1,
+            (self.hoje, t[1].projeto_id, 'pendente'): 1,
+            (self.hoje, t[2].projeto_id, 'pendente'): 1,
+        })
+        self.assertEqual(self.atualizar(), 0)
+
+        Tarefa.objects.filter(pk=t[0].pk).update(status='concluída')
+        self.assertEqual(self.atualizar(), 1)
+        self.assertEqual(self.resumo()[self.hoje - timedelta(days=10), t[0].projeto_id, 'concluída'], 1)
+
+        t[1].delete()
+        self.assertEqual(self.atualizar(), 1)
+        self.assertNotIn((self.hoje, t[1].projeto_id, 'pendente'), self.resumo())
+        call_command('atualizar_resumos', '--verificar', stdout=StringIO())
+
+        # Alteração que não passa pelo ORM: a verificação acusa, o recálculo completo corrige
+        ResumoDiario.objects.filter(projeto=t[2].projeto).update(quantidade=5)
+        with self.assertRaises(CommandError):
+            call_command('atualizar_resumos', '--verificar', stdout=StringIO())
+        call_command('atualizar_resumos', '--completo', stdout=StringIO())
+        self.assertEqual(divergencias(), {})
+
+    def test_exclusoes_recalculam_so_o_dia_de_criacao(self):
+        self.atualizar()
+        antiga = self.tarefas[0]
+        # Sem varrer a tabela de tarefas inteira
+        with mock.patch('tarefas.resumos.divergencias', side_effect=AssertionError):
+            Tarefa.objects.filter(pk=antiga.pk).delete()
+            self.assertEqual(self.atualizar(), 1)
+            self.tarefas[1].projeto.delete()
+            self.assertEqual(self.atualizar(), 1)
+        self.assertEqual(
+            RegistroExclusao.objects.get(modelo='tarefa', objeto_id=antiga.pk).dia_criacao,
+            self.hoje - timedelta(days=10),
+        )
+        self.assertEqual(self.resumo(), {(self.hoje, self.tarefas[2].projeto_id, 'pendente'): 1})
+        self.assertEqual(divergencias(), {})
+
+    def test_numero_por_projeto_em_um_periodo_le_o_resumo(self):
+        atualizar_resumos()
+        url = f'/api/tarefas/numero_tarefas_por_projeto/?criada_apos={self.hoje - timedelta(days=1)}'
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = self.client.get(url)
+        self.assertNotIn('tarefas_tarefa', consultas.captured_queries[-1]['sql'])
+        self.assertEqual(
+            sorted(item['projeto__nome'] for item in resposta.data),
+            sorted(t.projeto.nome for t in self.tarefas[1:]),
+        )
+
+
+class ExportacaoTests(BaseAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tarefas = self.criar_tarefas(5)
+        Tarefa.objects.filter(pk=self.tarefas[0].pk).update(atribuido_a=None, status='concluída')
+
+    def test_csv_com_projeto_e_responsavel(self):
+        resposta = self.client.get('/api/tarefas/exportar/')
+        self.assertTrue(resposta.streaming)
+        self.assertEqual(resposta['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('filename="tarefas.csv"', resposta['Content-Disposition'])
+        linhas = list(csv.DictReader(b''.join(resposta.streaming_content).decode().splitlines()))
+        self.assertEqual([int(linha['id']) for linha in linhas], [t.pk for t in self.tarefas])
+        self.assertEqual(linhas[0]['atribuido_a'], '')
+        self.assertEqual(linhas[1]['projeto'], self.tarefas[1].projeto.nome)
+        self.assertEqual(linhas[1]['atribuido_a'], self.tarefas[1].atribuido_a.username)
+        self.assertEqual(linhas[1]['data_criacao'], self.tarefas[1].data_criacao.isoformat())
+
+    def test_ndjson_filtrado_em_gzip(self):
+        resposta = self.client.get('/api/tarefas/exportar/?formato=ndjson&gzip=1&status=pendente')
+        self.assertEqual(resposta['Content-Type'], 'application/gzip')
+        self.assertIn('filename="tarefas.ndjson.gz"', resposta['Content-Disposition'])
+        linhas = gzip.decompress(b''.join(resposta.streaming_content)).decode().splitlines()
+        self.assertEqual([json.loads(linha)['id'] for linha in linhas], [t.pk for t in self.tarefas[1:]])
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get('/api/tarefas/exportar/?formato=xml').status_code, 400)
+        self.assertEqual(self.client.get('/api/tarefas/exportar/?status=arquivada').status_code, 400)
+
+    async def test_asgi_envia_sem_consumir_o_gerador_inteiro(self):
+        token = await sync_to_async(Token.objects.create)(user=self.usuario)
+        resposta = await AsyncClient().get(
+            '/api/projetos/exportar/?formato=ndjson', headers={'Authorization': f'Token {token.key}'}
+        )
+        self.assertTrue(resposta.is_async)
+        conteudo = b''.join([parte async for parte in resposta.streaming_content])
+        self.assertEqual(len(conteudo.splitlines()), 5)
+
+    def test_comando_exportar(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'projetos.csv.gz')
+            call_command('exportar', 'projetos', '--gzip', '--saida', caminho)
+            with gzip.open(caminho, 'rt') as arquivo:
+                linhas = list(csv.DictReader(arquivo))
+        self.assertEqual(len(linhas), 5)
+        self.assertEqual(linhas[0]['tarefas_concluidas'], '1')
+
+    def test_comando_exportar_com_filtro_invalido(self):
+        from django.core.management.base import CommandError
+        with self.assertRaisesMessage(CommandError, 'projeto: Informe um id numérico'):
+            call_command('exportar', 'tarefas', '--filtro', 'projeto=abc')
+
+
+@override_settings(REPLICAS_LEITURA={'REPLICAS': ['replica'], 'ATRASO_MAXIMO': 5, 'CACHE': 'default'})
+class ReplicasTests(SimpleTestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.roteador = RoteadorReplicas()
+
+    def test_leitura_vai_para_replica_ate_a_primeira_escrita(self):
+        self.assertEqual(self.roteador.db_for_read(Tarefa), 'default')
+        with leituras_em_replica():
+            self.assertEqual(self.roteador.db_for_read(Tarefa), 'replica')
+            self.assertEqual(self.roteador.db_for_write(Tarefa), 'default')
+            self.assertEqual(self.roteador.db_for_read(Tarefa), 'default')
+        self.assertFalse(self.roteador.allow_migrate('replica', 'tarefas'))
+
+    def test_middleware_so_libera_metodos_seguros(self):
+        bancos = {}
+
+        def view(request):
+            bancos[request.method] = self.roteador.db_for_read(Tarefa)
+
+        middleware = middleware_replicas(view)
+        fabrica = RequestFactory()
+        middleware(fabrica.get('/api/tarefas/'))
+        middleware(fabrica.post('/api/tarefas/'))
+        self.assertEqual(bancos, {'GET': 'replica', 'POST': 'default'})
+
+    def test_escrita_fixa_no_primario_so_o_cliente_que_escreveu(self):
+        bancos = {}
+
+        def view(request):
+            if request.method == 'POST':
+                # Chamado por cache_respostas.invalidar() em toda escrita pelo ORM
+                registrar_escrita()
+            else:
+                bancos[request.headers['Authorization']] = self.roteador.db_for_read(Tarefa)
+
+        middleware = middleware_replicas(view)
+        fabrica = RequestFactory()
+        middleware(fabrica.post('/api/tarefas/', HTTP_AUTHORIZATION='Token a'))
+        middleware(fabrica.get('/api/tarefas/', HTTP_AUTHORIZATION='Token a'))
+        middleware(fabrica.get('/api/tarefas/', HTTP_AUTHORIZATION='Token b'))
+        self.assertEqual(bancos, {'Token a': 'default', 'Token b': 'replica'})
+
+    def test_leitura_em_replica_e_marcada(self):
+        with leituras_em_replica():
+            self.assertFalse(leu_de_replica())
+            self.roteador.db_for_read(Tarefa)
+            self.assertTrue(leu_de_replica())
+        self.assertFalse(leu_de_replica())
+
+
+class ConexoesBancoTests(SimpleTestCase):
+    """Padrões de DATABASES conforme o servidor e o driver instalado."""
+
+    def carregar(self, pool_instalado=False, **ambiente):
+        """Executa o settings.py com só as variáveis DB_*/DJANGO_ASGI de `ambiente`."""
+        caminho = os.path.join(settings.BASE_DIR, 'backend', 'settings.py')
+        with mock.patch.dict(os.environ, ambiente), \
+                mock.patch('importlib.util.find_spec', return_value=object() if pool_instalado else None):
+            for nome in {'DJANGO_ASGI', 'DB_POOL', 'DB_CONN_MAX_AGE'} - set(ambiente):
+                os.environ.pop(nome, None)
+            return runpy.run_path(caminho)['DATABASES']['default']
+
+    def test_asgi_sem_conexoes_persistentes(self):
+        self.assertEqual(self.carregar()['CONN_MAX_AGE'], 60)
+        self.assertEqual(self.carregar(DJANGO_ASGI='1')['CONN_MAX_AGE'], 0)
+        self.assertEqual(self.carregar(DJANGO_ASGI='1', DB_CONN_MAX_AGE='30')['CONN_MAX_AGE'], 30)
+        # Com o psycopg 3 instalado, o padrão sob ASGI é o pool
+        banco = self.carregar(pool_instalado=True, DJANGO_ASGI='1')
+        self.assertEqual(banco['CONN_MAX_AGE'], 0)
+        self.assertIn('pool', banco['OPTIONS'])
+        self.assertNotIn('OPTIONS', self.carregar(pool_instalado=True))
+
+    def test_pool_sem_psycopg3(self):
+        from django.core.exceptions import ImproperlyConfigured
+        with self.assertRaisesMessage(ImproperlyConfigured, 'psycopg 3'):
+            self.carregar(DB_POOL='1')
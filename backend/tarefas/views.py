@@ -1,14 +1,35 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth.models import User
-from .models import Projeto, Tarefa
+from .models import Projeto, ResumoDiario, Tarefa
+from .analise import PeriodoInvalido, envelhecimento, serie_conclusoes
+from .autenticacao import autenticar_assincrono, chave_do_cabecalho, guardar_token
+from .cache_respostas import PROJETO, RESUMO, TAREFA, USUARIO, em_cache
+from .dashboard import estatisticas
+from .eventos import VALIDADE_TICKET, broker, consumir_ticket, emitir_ticket
+from .exportacao import FORMATOS as FORMATOS_EXPORTACAO, ExportacaoInvalida, exportar, nome_arquivo
+from .filtros import FiltroTarefas, OrdenacaoTarefas, data_hora, inteiro
+from .leitura_rapida import leitor_para
+from .lotes import (
+    LoteInvalido, atribuir_em_lote, atualizar_em_lote, criar_em_lote, mudar_status_em_lote,
+    remover_em_lote, selecionar_tarefas,
+)
+from .paginacao import PaginacaoCursor, PaginacaoHibrida
+from .replicas import cliente_do_token, registrar_escrita
 from .serializers import ProjetoSerializer, TarefaSerializer, UserSerializer
+from .sincronizacao import CursorExpirado, CursorInvalido, alteracoes
+from .renderizadores import codificar
+from .streaming import FORMATOS, resposta_em_stream, resposta_streaming
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.utils import timezone
-from django.db.models import Count
+from django.db.models import F, Sum
+from rest_framework.exceptions import AuthenticationFailed
 
 class CustomAuthToken(ObtainAuthToken):
     permission_classes = [AllowAny]
@@ -19,11 +40,81 @@ class CustomAuthToken(ObtainAuthToken):
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
         token, created = Token.objects.get_or_create(user=user)
+        if created:
+            # A requisição de login ainda não tem o token: fixa no primário quem vai usá-lo,
+            # para que uma réplica atrasada não recuse o token recém-criado
+            registrar_escrita(cliente_do_token(token.key))
+        token.user = user
+        guardar_token(token)
         return Response({
             'token': token.key,
             'user': UserSerializer(user).data
         })
 
+class ListagemMixin:
+    """
+    Responde listagens paginadas ou, com ?stream=json|ndjson, em streaming. Nas
+    leituras, usa o caminho rápido de `leitura_rapida` quando o serializer permite.
+    """
+    stream_query_param = 'stream'
+    leitura_rapida = True
+
+    def serializador_de_lista(self, queryset, serializer_class, ordenacao=None):
+        """Devolve (queryset a paginar, função que serializa uma lista de itens dele)."""
+        contexto = self.get_serializer_context()
+        leitor = None
+        if self.leitura_rapida and not queryset._prefetch_related_lookups:
+            leitor = leitor_para(serializer_class, self.request)
+        if leitor is None:
+            return queryset, lambda itens: serializer_class(itens, many=True, context=contexto).data
+        # As colunas de ordenação (a do queryset ou a da paginação por cursor) precisam estar nas linhas
+        if ordenacao is None:
+            ordenacao = [campo.lstrip('-') for campo in queryset.query.order_by] or PaginacaoCursor.ordering
+        return leitor.valores(queryset, *ordenacao), lambda linhas: [leitor(l) for l in linhas]
+
+    def responder_lista(self, queryset, serializer_class=None):
+        serializer_class = serializer_class or self.get_serializer_class()
+        queryset, serializar = self.serializador_de_lista(queryset, serializer_class)
+        formato = self.request.query_params.get(self.stream_query_param)
+        if formato is not None:
+            if formato not in FORMATOS:
+                return Response({'error': f'stream deve ser um de: {", ".join(FORMATOS)}'}, status=400)
+            return resposta_em_stream(queryset, serializar, formato, request=self.request)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializar(page))
+        return Response(serializar(queryset))
+
+    def list(self, request, *args, **kwargs):
+        return self.responder_lista(self.filter_queryset(self.get_queryset()))
+
+    def responder_alteracoes(self, modelo):
+        """Sincronização incremental: o que mudou depois de ?desde=<cursor> (ver tarefas.sincronizacao)."""
+        queryset, serializar = self.serializador_de_lista(
+            self.filter_queryset(self.get_queryset()), self.get_serializer_class(), ('data_atualizacao', 'id')
+        )
+        try:
+            dados = alteracoes(queryset, modelo, self.request.query_params.get('desde'), serializar)
+        except CursorInvalido as erro:
+            return Response({'error': str(erro)}, status=400)
+        except CursorExpirado as erro:
+            return Response({'error': str(erro)}, status=410)
+        return Response(dados)
+
+    def responder_exportacao(self, modelo, parametros=None):
+        """Arquivo ?formato=csv|ndjson, comprimido com ?gzip=1, gerado em streaming (ver tarefas.exportacao)."""
+        formato = self.request.query_params.get('formato', 'csv')
+        gzip = self.request.query_params.get('gzip') in ('1', 'true')
+        try:
+            conteudo = exportar(modelo, formato, gzip, parametros)
+        except ExportacaoInvalida as erro:
+            return Response({'error': str(erro)}, status=400)
+        resposta = resposta_streaming(
+            conteudo, self.request, content_type='application/gzip' if gzip else FORMATOS_EXPORTACAO[formato]
+        )
+        resposta['Content-Disposition'] = f'attachment; filename="{nome_arquivo(modelo, formato, gzip)}"'
+        return resposta
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -34,10 +125,24 @@ class UserViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         return [IsAuthenticated()]
 
-class ProjetoViewSet(viewsets.ModelViewSet):
+class ProjetoViewSet(ListagemMixin, viewsets.ModelViewSet):
     queryset = Projeto.objects.all()
     serializer_class = ProjetoSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PaginacaoHibrida
+
+    def get_queryset(self):
+        return self.get_serializer_class().otimizar_queryset(
+            super().get_queryset(), context=self.get_serializer_context()
+        )
+
+    @em_cache(PROJETO, USUARIO)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @em_cache(PROJETO, USUARIO)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         # Se não especificar proprietário, usar o usuário atual
@@ -46,26 +151,49 @@ class ProjetoViewSet(viewsets.ModelViewSet):
         else:
             serializer.save()
 
+    @action(detail=False, methods=['get'])
+    @em_cache(PROJETO, USUARIO)
+    def alteracoes(self, request):
+        return self.responder_alteracoes('projeto')
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        return self.responder_exportacao('projetos')
+
     @action(detail=True, methods=['get'])
+    @em_cache(TAREFA, PROJETO, USUARIO)
     def tarefas_do_projeto(self, request, pk=None):
         projeto = self.get_object()
-        tarefas = projeto.tarefas.all()
-        serializer = TarefaSerializer(tarefas, many=True)
-        return Response(serializer.data)
+        tarefas = TarefaSerializer.otimizar_queryset(
+            projeto.tarefas.order_by('data_criacao', 'id'), context=self.get_serializer_context()
+        )
+        return self.responder_lista(tarefas, TarefaSerializer)
 
     @action(detail=True, methods=['get'])
+    @em_cache(PROJETO)
     def resumo_progresso(self, request, pk=None):
         projeto = self.get_object()
-        total = projeto.tarefas.count()
-        concluidas = projeto.tarefas.filter(status='concluída').count()
-        pendentes = projeto.tarefas.filter(status='pendente').count()
-        em_progresso = projeto.tarefas.filter(status='em_progresso').count()
-        return Response({
-            "total_tarefas": total,
-            "concluidas": concluidas,
-            "pendentes": pendentes,
-            "em_progresso": em_progresso
-        })
+        return Response(projeto.resumo_progresso())
+
+    @action(detail=False, methods=['get'])
+    @em_cache(PROJETO)
+    def resumo_progresso_lote(self, request):
+        ids = request.query_params.get('ids')
+        proprietario = request.query_params.get('proprietario', request.user.pk)
+        projetos = Projeto.objects.all()
+        try:
+            if ids:
+                projetos = projetos.filter(pk__in=[int(pk) for pk in ids.split(',') if pk])
+            else:
+                projetos = projetos.filter(proprietario_id=int(proprietario))
+        except ValueError:
+            return Response({'error': 'ids e proprietario devem ser numéricos'}, status=400)
+        dados = (
+            projetos.com_progresso()
+            .values('id', 'nome', 'total_tarefas', 'concluidas', 'pendentes', 'em_progresso')
+            .order_by('id')
+        )
+        return Response(list(dados))
 
     @action(detail=True, methods=['post'])
     def atribuir_proprietario(self, request, pk=None):
@@ -74,22 +202,80 @@ class ProjetoViewSet(viewsets.ModelViewSet):
         try:
             user = User.objects.get(pk=user_id)
             projeto.proprietario = user
-            projeto.save()
+            projeto.save(update_fields=['proprietario'])
             return Response({'status': 'Proprietário atualizado'})
         except User.DoesNotExist:
             return Response({'error': 'Usuário não encontrado'}, status=404)
 
-class TarefaViewSet(viewsets.ModelViewSet):
+class TarefaViewSet(ListagemMixin, viewsets.ModelViewSet):
     queryset = Tarefa.objects.all()
     serializer_class = TarefaSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PaginacaoHibrida
+    filter_backends = [FiltroTarefas, OrdenacaoTarefas]
+
+    def get_queryset(self):
+        return self.get_serializer_class().otimizar_queryset(
+            super().get_queryset(), context=self.get_serializer_context()
+        )
+
+    @em_cache(TAREFA, PROJETO, USUARIO)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @em_cache(TAREFA, PROJETO, USUARIO)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def lote(self, request):
+        # POST: lista de tarefas; PATCH: lista de {id, campos...}; DELETE: {"ids": [...]}
+        try:
+            if request.method == 'POST':
+                resultados = criar_em_lote(request.data)
+            elif request.method == 'PATCH':
+                resultados = atualizar_em_lote(request.data)
+            else:
+                resultados = remover_em_lote(request.data.get('ids') if isinstance(request.data, dict) else None)
+        except LoteInvalido as erro:
+            return Response({'error': str(erro)}, status=400)
+        erros = sum(1 for resultado in resultados if resultado['resultado'] == 'erro')
+        return Response({
+            'total': len(resultados),
+            'sucesso': len(resultados) - erros,
+            'erros': erros,
+            'resultados': resultados,
+        })
+
+    @action(detail=False, methods=['post'])
+    def mudar_status_lote(self, request):
+        # {"status": "concluída", "ids": [...]} ou {"status": ..., "filtro": {"projeto": 1, "status": "pendente"}}
+        try:
+            tarefas = selecionar_tarefas(request.data)
+            atualizadas = mudar_status_em_lote(tarefas, request.data.get('status'))
+        except LoteInvalido as erro:
+            return Response({'error': str(erro)}, status=400)
+        return Response({'atualizadas': atualizadas})
+
+    @action(detail=False, methods=['post'])
+    def atribuir_usuario_lote(self, request):
+        # {"user_id": 3, "ids": [...]} ou com "filtro"; user_id nulo remove o responsável
+        try:
+            tarefas = selecionar_tarefas(request.data)
+            atualizadas = atribuir_em_lote(tarefas, request.data.get('user_id'))
+        except LoteInvalido as erro:
+            return Response({'error': str(erro)}, status=400)
+        except LookupError:
+            return Response({'error': 'Usuário não encontrado'}, status=404)
+        return Response({'atualizadas': atualizadas})
 
     @action(detail=True, methods=['post'])
     def marcar_concluida(self, request, pk=None):
         tarefa = self.get_object()
-        tarefa.status = 'concluída'
-        tarefa.data_conclusao = timezone.now()
-        tarefa.save()
+        # Só a primeira conclusão grava status e data; as demais não tocam a linha
+        Tarefa.objects.filter(pk=tarefa.pk).exclude(status='concluída').update(
+            status='concluída', data_conclusao=timezone.now()
+        )
         return Response({'status': 'Tarefa marcada como concluída'})
 
     @action(detail=True, methods=['post'])
@@ -99,7 +285,7 @@ class TarefaViewSet(viewsets.ModelViewSet):
         try:
             user = User.objects.get(pk=user_id)
             tarefa.atribuido_a = user
-            tarefa.save()
+            tarefa.save(update_fields=['atribuido_a'])
             return Response({'status': 'Usuário atribuído'})
         except User.DoesNotExist:
             return Response({'error': 'Usuário não encontrado'}, status=404)
@@ -108,7 +294,7 @@ class TarefaViewSet(viewsets.ModelViewSet):
     def remover_usuario(self, request, pk=None):
         tarefa = self.get_object()
         tarefa.atribuido_a = None
-        tarefa.save()
+        tarefa.save(update_fields=['atribuido_a'])
         return Response({'status': 'Usuário removido da tarefa'})
 
     @action(detail=True, methods=['post'])
@@ -117,26 +303,165 @@ class TarefaViewSet(viewsets.ModelViewSet):
         novo_status = request.data.get('status')
         if novo_status not in dict(Tarefa.STATUS_CHOICES):
             return Response({'error': 'Status inválido'}, status=400)
-        tarefa.status = novo_status
+        valores = {'status': novo_status}
         if novo_status == 'concluída':
-            tarefa.data_conclusao = timezone.now()
-        tarefa.save()
+            valores['data_conclusao'] = timezone.now()
+        Tarefa.objects.filter(pk=tarefa.pk).exclude(status=novo_status).update(**valores)
         return Response({'status': f'Status alterado para {novo_status}'})
 
     @action(detail=False, methods=['get'])
+    @em_cache(TAREFA, PROJETO, USUARIO)
+    def alteracoes(self, request):
+        return self.responder_alteracoes('tarefa')
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        # Aceita os mesmos filtros da listagem; a ordem é sempre a do id
+        return self.responder_exportacao('tarefas', request.query_params)
+
+    @action(detail=False, methods=['get'])
+    @em_cache(TAREFA, PROJETO, USUARIO)
     def tarefas_por_usuario(self, request):
         user_id = request.query_params.get('user_id')
         if not user_id:
             return Response({'error': 'user_id é obrigatório'}, status=400)
-        tarefas = Tarefa.objects.filter(atribuido_a__id=user_id)
-        serializer = self.get_serializer(tarefas, many=True)
-        return Response(serializer.data)
+        tarefas = self.get_queryset().filter(atribuido_a__id=inteiro('user_id', user_id))
+        return self.responder_lista(self.filter_queryset(tarefas))
 
     @action(detail=False, methods=['get'])
+    @em_cache(PROJETO, RESUMO)
     def numero_tarefas_por_projeto(self, request):
+        # Com ?criada_apos=/?criada_antes= (datas), conta pelo resumo diário, até a última atualização dele
+        periodo = {
+            lookup: data_hora(parametro, request.query_params[parametro]).date()
+            for parametro, lookup in (('criada_apos', 'dia__gte'), ('criada_antes', 'dia__lt'))
+            if request.query_params.get(parametro)
+        }
+        if periodo:
+            dados = (
+                ResumoDiario.objects.filter(**periodo)
+                .values('projeto__nome')
+                .annotate(total=Sum('quantidade'))
+                .order_by('total')
+            )
+            return Response(list(dados))
         dados = (
-            Tarefa.objects.values('projeto__nome')
-            .annotate(total=Count('id'))
+            Projeto.objects.com_progresso()
+            .filter(total_tarefas__gt=0)
+            .values(projeto__nome=F('nome'), total=F('total_tarefas'))
             .order_by('total')
         )
         return Response(list(dados))
+
+
+class DashboardViewSet(viewsets.ViewSet):
+    """Totais do sistema e do usuário autenticado para a página inicial."""
+    permission_classes = [IsAuthenticated]
+
+    @em_cache(TAREFA, PROJETO, USUARIO)
+    def list(self, request):
+        return Response(estatisticas(request.user))
+
+
+class AnaliseViewSet(viewsets.ViewSet):
+    """Vazão, tempo de ciclo e envelhecimento das tarefas, opcionalmente de um ?projeto= ou ?usuario=."""
+    permission_classes = [IsAuthenticated]
+
+    def escopo(self):
+        parametros = self.request.query_params
+        return {
+            nome: inteiro(nome, parametros[nome]) if parametros.get(nome) else None
+            for nome in ('projeto', 'usuario')
+        }
+
+    @action(detail=False, methods=['get'])
+    def conclusoes(self, request):
+        periodo = request.query_params.get('periodo', 'dia')
+        inicio, fim = (
+            data_hora(nome, request.query_params[nome]) if request.query_params.get(nome) else None
+            for nome in ('inicio', 'fim')
+        )
+        try:
+            serie = serie_conclusoes(periodo, inicio, fim, **self.escopo())
+        except PeriodoInvalido as erro:
+            return Response({'error': str(erro)}, status=400)
+        return Response({'periodo': periodo, 'serie': serie})
+
+    @action(detail=False, methods=['get'])
+    def envelhecimento(self, request):
+        # Sem cache de respostas: as idades mudam com o tempo, mesmo sem escritas
+        return Response(envelhecimento(**self.escopo()))
+
+
+# Intervalo dos comentários de keep-alive no fluxo de eventos, em segundos
+BATIMENTO_EVENTOS = 15
+
+
+async def _fluxo_eventos(assinatura):
+    try:
+        yield b'retry: 3000\n\n'
+        while True:
+            eventos = await assinatura.proximos(espera=BATIMENTO_EVENTOS)
+            if not eventos:
+                yield b': ping\n\n'
+            for evento in eventos:
+                yield b'event: ' + evento['tipo'].encode() + b'\ndata: ' + codificar(evento) + b'\n\n'
+    finally:
+        broker.cancelar(assinatura)
+
+
+class TicketEventos(APIView):
+    """Ticket de uso único para abrir /api/eventos/ no EventSource, que não envia o token no cabeçalho."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response({'ticket': emitir_ticket(request.user.pk), 'validade': VALIDADE_TICKET})
+
+
+async def eventos_tarefas(request):
+    """
+    Server-Sent Events com as tarefas criadas, alteradas e removidas. Assina
+    `?projeto=1,2` (só projetos de que o usuário é proprietário ou em que tem
+    tarefas atribuídas) e/ou `?minhas=1` (tarefas atribuídas ao usuário). O
+    token vai em `Authorization: Token ...` ou, para o EventSource do
+    navegador, um ticket de POST /api/eventos/ticket/ vai em `?ticket=`.
+    """
+    if not isinstance(request, ASGIRequest):
+        # Sob WSGI a resposta em stream seria consumida inteira antes do envio
+        return JsonResponse(
+            {'error': 'Eventos em tempo real exigem o servidor ASGI; use /api/tarefas/alteracoes/'}, status=501
+        )
+    chave = chave_do_cabecalho(request)
+    if chave:
+        try:
+            usuario_id = (await autenticar_assincrono(chave)).pk
+        except AuthenticationFailed as erro:
+            return JsonResponse({'error': str(erro.detail)}, status=401)
+    elif request.GET.get('ticket'):
+        usuario_id = await consumir_ticket(request.GET['ticket'])
+        if usuario_id is None or not await User.objects.filter(pk=usuario_id, is_active=True).aexists():
+            return JsonResponse({'error': 'Ticket inválido, expirado ou já usado'}, status=401)
+    else:
+        return JsonResponse({'error': 'Token ou ticket não informado'}, status=401)
+
+    try:
+        projetos = {int(pk) for pk in request.GET.get('projeto', '').split(',') if pk}
+    except ValueError:
+        return JsonResponse({'error': 'projeto deve ser numérico'}, status=400)
+    if projetos:
+        visiveis = Projeto.objects.filter(pk__in=projetos).visiveis_para(usuario_id).values_list('pk', flat=True)
+        # Mesma resposta para projeto inexistente e sem acesso: não revela quais existem
+        negados = projetos - {pk async for pk in visiveis}
+        if negados:
+            lista = ', '.join(map(str, sorted(negados)))
+            return JsonResponse({'error': f'Sem acesso aos projetos: {lista}'}, status=403)
+    canais = {f'projeto:{pk}' for pk in projetos}
+    if request.GET.get('minhas'):
+        canais.add(f'usuario:{usuario_id}')
+    if not canais:
+        return JsonResponse({'error': 'Informe projeto e/ou minhas=1'}, status=400)
+
+    resposta = StreamingHttpResponse(_fluxo_eventos(broker.assinar(canais)), content_type='text/event-stream')
+    resposta['Cache-Control'] = 'no-cache'
+    resposta['X-Accel-Buffering'] = 'no'
+    return resposta
@@ -0,0 +1,126 @@
+"""
+Versões assíncronas (ASGI) das leituras mais usadas, com o ORM assíncrono do
+Django e o caminho rápido de `leitura_rapida`. Respondem o mesmo JSON das
+rotas DRF equivalentes, sob `/api/async/`:
+
+    /api/async/tarefas/                          -> /api/tarefas/ (paginação por página)
+    /api/async/tarefas/tarefas_por_usuario/      -> /api/tarefas/tarefas_por_usuario/
+    /api/async/projetos/<id>/resumo_progresso/   -> /api/projetos/<id>/resumo_progresso/
+
+Ficam de fora a API navegável, a paginação por cursor, o streaming e o cache
+de respostas. Sob WSGI elas também funcionam, mas sem ganho.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.request import Request
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .autenticacao import autenticar_assincrono, chave_do_cabecalho
+from .filtros import filtrar_tarefas, inteiro, ordenar_tarefas
+from .leitura_rapida import leitor_para
+from .models import Projeto, Tarefa
+from .renderizadores import codificar
+from .serializers import TarefaSerializer
+
+
+def _json(dados, status=200):
+    return HttpResponse(codificar(dados), status=status, content_type='application/json')
+
+
+async def _autenticar(request):
+    """Usuário do token em `Authorization: Token ...`; só consulta o banco em cache miss."""
+    chave = chave_do_cabecalho(request)
+    if chave is None:
+        return None
+    try:
+        return await autenticar_assincrono(chave)
+    except AuthenticationFailed:
+        return None
+
+
+def autenticado(view):
+    async def envolvida(request, *args, **kwargs):
+        if request.method != 'GET':
+            return _json({'detail': f'Method "{request.method}" not allowed.'}, status=405)
+        request.user = await _autenticar(request)
+        if request.user is None:
+            return _json({'detail': 'Authentication credentials were not provided.'}, status=401)
+        return await view(request, *args, **kwargs)
+    return envolvida
+
+
+async def _serializar(queryset, request):
+    """Mesma saída do TarefaSerializer, pelo caminho rápido quando possível."""
+    leitor = leitor_para(TarefaSerializer, request)
+    if leitor is None:
+        def serializar():
+            consulta = TarefaSerializer.otimizar_queryset(queryset, context={'request': request})
+            return TarefaSerializer(consulta, many=True, context={'request': request}).data
+        return await sync_to_async(serializar)()
+    return [leitor(linha) async for linha in leitor.valores(queryset)]
+
+
+async def _listar(request, queryset):
+    """
+    Filtros e ordenação de `tarefas.filtros` e paginação por número de página
+    (ou `page=last`), com a mesma resposta do PageNumberPagination.
+    """
+    drf_request = Request(request)
+    try:
+        queryset = ordenar_tarefas(filtrar_tarefas(queryset, request.GET), request.GET.get('ordenar'))
+    except ValidationError as erro:
+        return _json(erro.detail, status=400)
+    tamanho = settings.REST_FRAMEWORK['PAGE_SIZE']
+    total = await queryset.acount()
+    paginas = max(1, -(-total // tamanho))
+    pagina = request.GET.get('page', 1)
+    if pagina == 'last':
+        pagina = paginas
+    try:
+        pagina = int(pagina)
+    except ValueError:
+        pagina = 0
+    if not 1 <= pagina <= paginas:
+        return _json({'detail': 'Invalid page.'}, status=404)
+    inicio = (pagina - 1) * tamanho
+    resultados = await _serializar(queryset[inicio:inicio + tamanho], drf_request)
+
+    url = request.build_absolute_uri()
+    anterior = None
+    if pagina > 1:
+        anterior = remove_query_param(url, 'page') if pagina == 2 else replace_query_param(url, 'page', pagina - 1)
+    return _json({
+        'count': total,
+        'next': replace_query_param(url, 'page', pagina + 1) if pagina < paginas else None,
+        'previous': anterior,
+        'results': resultados,
+    })
+
+
+@autenticado
+async def listar_tarefas(request):
+    return await _listar(request, Tarefa.objects.all())
+
+
+@autenticado
+async def tarefas_por_usuario(request):
+    user_id = request.GET.get('user_id')
+    if not user_id:
+        return _json({'error': 'user_id é obrigatório'}, status=400)
+    try:
+        user_id = inteiro('user_id', user_id)
+    except ValidationError as erro:
+        return _json(erro.detail, status=400)
+    return await _listar(request, Tarefa.objects.filter(atribuido_a__id=user_id))
+
+
+@autenticado
+async def resumo_progresso(request, pk):
+    projeto = await Projeto.objects.filter(pk=pk).only(
+        'tarefas_pendentes', 'tarefas_em_progresso', 'tarefas_concluidas'
+    ).afirst()
+    if projeto is None:
+        return _json({'detail': 'No Projeto matches the given query.'}, status=404)
+    return _json(projeto.resumo_progresso())
@@ -1,7 +1,7 @@
 "use client"
 
 import { useState, useEffect } from "react"
-import { servicoProjeto, servicoTarefa, servicoUsuario } from "../services/api"
+import { servicoDashboard } from "../services/api"
 import { FolderOpen, CheckSquare, Users, TrendingUp, RefreshCw } from "lucide-react"
 import toast from "react-hot-toast"
 
@@ -34,23 +34,16 @@ function PaginaDashboard() {
     try {
       setCarregando(true)
 
-      // Carregar dados
-      const projetos = await servicoProjeto.obterTodos()
-      const tarefas = await servicoTarefa.obterTodas()
-      const usuarios = await servicoUsuario.obterTodos()
-
-      // Calcular estatísticas das tarefas
-      const tarefasConcluidas = tarefas.filter((tarefa) => tarefa?.status === "concluída").length
-      const tarefasPendentes = tarefas.filter((tarefa) => tarefa?.status === "pendente").length
-      const tarefasEmProgresso = tarefas.filter((tarefa) => tarefa?.status === "em_progresso").length
+      // Contagens agregadas no servidor
+      const dados = await servicoDashboard.obterEstatisticas()
 
       const novasEstatisticas = {
-        totalProjetos: projetos.length,
-        totalTarefas: tarefas.length,
-        totalUsuarios: usuarios.length,
-        tarefasConcluidas,
-        tarefasPendentes,
-        tarefasEmProgresso,
+        totalProjetos: dados.projetos,
+        totalTarefas: dados.tarefas.total,
+        totalUsuarios: dados.usuarios,
+        tarefasConcluidas: dados.tarefas.concluidas,
+        tarefasPendentes: dados.tarefas.pendentes,
+        tarefasEmProgresso: dados.tarefas.em_progresso,
       }
 
       setEstatisticas(novasEstatisticas)
@@ -80,20 +80,87 @@ export interface Projeto {
   nome: string
   descricao: string
   data_criacao: string
+  data_atualizacao: string
   proprietario: Usuario
 }
 
+// Nas tarefas o projeto vem expandido só um nível: o proprietário fica como id
+export interface ProjetoDaTarefa extends Omit<Projeto, "proprietario"> {
+  proprietario: number
+}
+
 export interface Tarefa {
   id: number
   titulo: string
   descricao: string
   status: "pendente" | "em_progresso" | "concluída"
   data_criacao: string
+  data_atualizacao: string
   data_conclusao: string | null
-  projeto: Projeto
+  projeto: ProjetoDaTarefa
   atribuido_a: Usuario | null
 }
 
+// Relações aninhadas pedidas via ?expand= (por padrão a API devolve só os ids)
+const EXPANDIR_PROJETO = { expand: "proprietario" }
+const EXPANDIR_TAREFA = { expand: "projeto,atribuido_a" }
+
+// Filtros de /tarefas/ (status separados por vírgula; datas em ISO 8601)
+export interface FiltrosTarefa {
+  status?: string
+  projeto?: number
+  atribuido_a?: number | "nenhum"
+  criada_apos?: string
+  criada_antes?: string
+  concluida_apos?: string
+  concluida_antes?: string
+  busca?: string
+  ordenar?: string
+}
+
+// Resposta de /alteracoes/: o que mudou depois do cursor enviado em ?desde=
+export interface Alteracoes<T> {
+  alteradas: T[]
+  removidas: number[]
+  cursor: string
+  mais: boolean
+}
+
+// Espelho local mantido pela sincronização incremental
+export interface Espelho<T extends { id: number }> {
+  itens: Map<number, T>
+  cursor?: string
+}
+
+// Aplica as páginas de alterações até alcançar o fim; os itens chegam "ao menos uma vez"
+const sincronizar = async <T extends { id: number }>(url: string, params: object, espelho: Espelho<T>) => {
+  let mais = true
+  while (mais) {
+    const resposta = await api.get<Alteracoes<T>>(url, { params: { ...params, desde: espelho.cursor } })
+    resposta.data.alteradas.forEach((item) => espelho.itens.set(item.id, item))
+    resposta.data.removidas.forEach((id) => espelho.itens.delete(id))
+    espelho.cursor = resposta.data.cursor
+    mais = resposta.data.mais
+  }
+  return espelho
+}
+
+// Resposta de /dashboard/: contagens calculadas no servidor
+export interface ContagemPorStatus {
+  total: number
+  pendentes: number
+  em_progresso: number
+  concluidas: number
+}
+
+export interface EstatisticasDashboard {
+  projetos: number
+  usuarios: number
+  tarefas: ContagemPorStatus
+  meus_projetos: number
+  minhas_tarefas: ContagemPorStatus
+}
+
 export interface LoginCredentials {
   username: string
   password: string
@@ -155,13 +222,13 @@ export const servicoUsuario = {
 export const servicoProjeto = {
   // Listar todos os projetos
   obterTodos: async (): Promise<Projeto[]> => {
-    const resposta = await api.get("/projetos/")
+    const resposta = await api.get("/projetos/", { params: EXPANDIR_PROJETO })
     return extrairResultados<Projeto>(resposta.data)
   },
 
   // Buscar projeto por ID
   obterPorId: async (id: number): Promise<Projeto> => {
-    const resposta = await api.get(`/projetos/${id}/`)
+    const resposta = await api.get(`/projetos/${id}/`, { params: EXPANDIR_PROJETO })
     return resposta.data
   },
 
@@ -187,7 +254,7 @@ export const servicoProjeto = {
 
   // Buscar tarefas do projeto
   obterTarefas: async (id: number): Promise<Tarefa[]> => {
-    const resposta = await api.get(`/projetos/${id}/tarefas_do_projeto/`)
+    const resposta = await api.get(`/projetos/${id}/tarefas_do_projeto/`, { params: EXPANDIR_TAREFA })
     return extrairResultados<Tarefa>(resposta.data)
   },
 
@@ -197,6 +264,18 @@ export const servicoProjeto = {
     return resposta.data
   },
 
+  // Resumo de progresso de vários projetos em uma requisição
+  obterResumoProgressoLote: async (ids?: number[]) => {
+    const resposta = await api.get("/projetos/resumo_progresso_lote/", {
+      params: ids ? { ids: ids.join(",") } : undefined,
+    })
+    return resposta.data
+  },
+
+  // Atualiza um espelho local com o que mudou desde a última sincronização
+  sincronizar: (espelho: Espelho<Projeto> = { itens: new Map() }) =>
+    sincronizar("/projetos/alteracoes/", EXPANDIR_PROJETO, espelho),
+
   // Atribuir proprietário
   atribuirProprietario: async (id: number, idUsuario: number) => {
     const resposta = await api.post(`/projetos/${id}/atribuir_proprietario/`, { user_id: idUsuario })
@@ -206,15 +285,15 @@ export const servicoProjeto = {
 
 // Serviços para Tarefas
 export const servicoTarefa = {
-  // Listar todas as tarefas
-  obterTodas: async (): Promise<Tarefa[]> => {
-    const resposta = await api.get("/tarefas/")
+  // Listar tarefas, com filtros aplicados no servidor
+  obterTodas: async (filtros: FiltrosTarefa = {}): Promise<Tarefa[]> => {
+    const resposta = await api.get("/tarefas/", { params: { ...EXPANDIR_TAREFA, ...filtros } })
     return extrairResultados<Tarefa>(resposta.data)
   },
 
   // Buscar tarefa por ID
   obterPorId: async (id: number): Promise<Tarefa> => {
-    const resposta = await api.get(`/tarefas/${id}/`)
+    const resposta = await api.get(`/tarefas/${id}/`, { params: EXPANDIR_TAREFA })
     return resposta.data
   },
 
@@ -264,10 +343,16 @@ export const servicoTarefa = {
 
   // Tarefas por usuário
   obterPorUsuario: async (idUsuario: number): Promise<Tarefa[]> => {
-    const resposta = await api.get(`/tarefas/tarefas_por_usuario/?user_id=${idUsuario}`)
+    const resposta = await api.get("/tarefas/tarefas_por_usuario/", {
+      params: { user_id: idUsuario, ...EXPANDIR_TAREFA },
+    })
     return extrairResultados<Tarefa>(resposta.data)
   },
 
+  // Atualiza um espelho local com o que mudou desde a última sincronização
+  sincronizar: (espelho: Espelho<Tarefa> = { itens: new Map() }) =>
+    sincronizar("/tarefas/alteracoes/", EXPANDIR_TAREFA, espelho),
+
   // Número de tarefas por projeto
   obterContagemPorProjeto: async () => {
     const resposta = await api.get("/tarefas/numero_tarefas_por_projeto/")
@@ -275,4 +360,13 @@ export const servicoTarefa = {
   },
 }
 
+// Serviços para o Dashboard
+export const servicoDashboard = {
+  // Totais do sistema e do usuário atual, sem baixar as tabelas
+  obterEstatisticas: async (): Promise<EstatisticasDashboard> => {
+    const resposta = await api.get("/dashboard/")
+    return resposta.data
+  },
+}
+
 export default api